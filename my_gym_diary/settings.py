@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "workouts.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -82,6 +84,156 @@ DATABASES = {
     }
 }
 
+# With MY_GYM_DIARY_DATABASE_PROFILE=production, SQLite runs in WAL mode, so
+# that readers and a writer do not block each other, with tuned pragmas and
+# persistent connections. Reports and charts are read on a read-only
+# connection, so they keep being served while sets are imported.
+# Transactions take the write lock when they start, and wait for it for up
+# to busy_timeout milliseconds, instead of failing with "database is locked".
+DATABASE_PROFILE = os.environ.get("MY_GYM_DIARY_DATABASE_PROFILE", "development")
+
+if DATABASE_PROFILE == "production":
+    SQLITE_PRAGMAS = {
+        "synchronous": os.environ.get("MY_GYM_DIARY_SQLITE_SYNCHRONOUS", "NORMAL"),
+        # Negative sizes are in KiB: 64 MiB of page cache per connection.
+        "cache_size": int(os.environ.get("MY_GYM_DIARY_SQLITE_CACHE_SIZE", -64000)),
+        "mmap_size": int(os.environ.get("MY_GYM_DIARY_SQLITE_MMAP_SIZE", 256 * 2**20)),
+        "busy_timeout": int(os.environ.get("MY_GYM_DIARY_SQLITE_BUSY_TIMEOUT", 5000)),
+    }
+    SQLITE_INIT_COMMAND = "".join(
+        f"PRAGMA {name}={value};" for name, value in SQLITE_PRAGMAS.items()
+    )
+    DATABASES["default"] |= {
+        "CONN_MAX_AGE": int(os.environ.get("MY_GYM_DIARY_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": f"PRAGMA journal_mode=WAL;{SQLITE_INIT_COMMAND}",
+            "transaction_mode": "IMMEDIATE",
+        },
+    }
+    DATABASES["read_only"] = DATABASES["default"] | {
+        "NAME": f"file:{DATABASES['default']['NAME']}?mode=ro",
+        "OPTIONS": {"init_command": f"PRAGMA query_only=1;{SQLITE_INIT_COMMAND}"},
+        "TEST": {"MIRROR": "default"},
+    }
+    WORKOUTS_READ_ONLY_DATABASE = "read_only"
+
+DATABASE_ROUTERS = ["workouts.routers.ReadOnlyRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Backends for the cache of reports of workouts, selected with the
+# MY_GYM_DIARY_REPORT_CACHE environment variable. The local memory cache is
+# private to each process, use the file or database cache to share it.
+# The database cache needs `python manage.py createcachetable`.
+REPORT_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "workouts-reports",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache" / "reports",
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "workouts_report_cache",
+    },
+}
+
+# Backends for the version of the exercises cached by every process, selected
+# with the MY_GYM_DIARY_EXERCISE_CACHE environment variable. Processes reload
+# the exercises when the version changes, so with more than one process it must
+# be shared by them: the system checks reject the local memory cache without
+# DEBUG. The version is read on every lookup of exercises, which is a stat and
+# a small read with the file cache, the default of the production profile, but
+# a query with the database cache. The cache holds only the version, so that it
+# is never culled.
+EXERCISE_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "workouts-exercises",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache" / "exercises",
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "workouts_exercise_cache",
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "reports": REPORT_CACHE_BACKENDS[
+        os.environ.get("MY_GYM_DIARY_REPORT_CACHE", "locmem")
+    ]
+    | {"TIMEOUT": 24 * 60 * 60},
+    "exercises": EXERCISE_CACHE_BACKENDS[
+        os.environ.get(
+            "MY_GYM_DIARY_EXERCISE_CACHE",
+            "file" if DATABASE_PROFILE == "production" else "locmem",
+        )
+    ]
+    | {"TIMEOUT": None},
+}
+
+WORKOUTS_REPORT_CACHE = "reports"
+
+WORKOUTS_EXERCISE_CACHE = "exercises"
+
+# The feed of changes holds back the changes of the last seconds, which may
+# belong to transactions not committed yet: objects are timestamped when they
+# are written, not when their transaction commits. The delay must be longer
+# than the longest transaction writing exercises, workouts or sets, or clients
+# may skip its changes for good. Imports commit every chunk of rows, and
+# `load_workouts` warns about chunks slower than the delay.
+WORKOUTS_CHANGES_DELAY = float(os.environ.get("MY_GYM_DIARY_CHANGES_DELAY", 30))
+
+# Charts and analytics read the sets from memory-mapped snapshots in this
+# directory, refreshed after every write, instead of from the database.
+# Snapshots are disabled if MY_GYM_DIARY_SNAPSHOT_DIR is not set.
+WORKOUTS_SNAPSHOT_DIR = os.environ.get("MY_GYM_DIARY_SNAPSHOT_DIR")
+
+
+# Metrics
+# Queries slower than MY_GYM_DIARY_SLOW_QUERY_SECONDS are counted, and a
+# sample of them is logged with their SQL to the "workouts.slow_queries"
+# logger. Metrics are exposed in the Prometheus format at /metrics, to staff
+# users and to the comma-separated addresses of MY_GYM_DIARY_METRICS_ALLOWED_IPS,
+# e.g. of the Prometheus server.
+
+WORKOUTS_SLOW_QUERY_SECONDS = (
+    float(os.environ["MY_GYM_DIARY_SLOW_QUERY_SECONDS"])
+    if "MY_GYM_DIARY_SLOW_QUERY_SECONDS" in os.environ
+    else None
+)
+WORKOUTS_SLOW_QUERY_SAMPLE_RATE = float(
+    os.environ.get("MY_GYM_DIARY_SLOW_QUERY_SAMPLE_RATE", "1")
+)
+WORKOUTS_METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.environ.get("MY_GYM_DIARY_METRICS_ALLOWED_IPS", "").split(",")
+    if ip.strip()
+]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "workouts.slow_queries": {"handlers": ["console"], "level": "WARNING"},
+        "workouts.imports": {"handlers": ["console"], "level": "WARNING"},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
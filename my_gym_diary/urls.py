@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from workouts.views import prometheus_metrics
+
 admin.site.site_header = "My Gym Diary Admin"
 admin.site.site_title = "My Gym Diary Portal"
 admin.site.index_title = "Welcome to My Gym Diary"
@@ -24,4 +26,5 @@ admin.site.index_title = "Welcome to My Gym Diary"
 urlpatterns = [
     path("workouts/", include("workouts.urls")),
     path("admin/", admin.site.urls),
+    path("metrics", prometheus_metrics, name="metrics"),
 ]
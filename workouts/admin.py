@@ -1,9 +1,16 @@
+import abc
+import hashlib
+from functools import cached_property
 from typing import Any
 
+from django.conf import settings
 from django.contrib import admin
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db import connections, models
 from django.db.models.query import QuerySet
 
-from .models import Exercise, SetOfExercise, Workout
+from .models import DataVersion, Exercise, ImportRun, SetOfExercise, Workout
 
 
 @admin.register(Exercise)
@@ -13,9 +20,52 @@ class ExerciseAdmin(admin.ModelAdmin):
     ordering = ("code",)
 
 
-class RepetitionsRangesFilter(admin.SimpleListFilter):
+class GroupedFacetsMixin(abc.ABC):
+    """Count the facets of a list filter with a single grouped query.
+
+    Counts are grouped by `facet_group_by`, turned into the counts of the
+    choices by `get_grouped_facet_counts`, and cached until the data changes.
+    """
+
+    facet_group_by: str
+
+    @abc.abstractmethod
+    def get_grouped_facet_counts(self, counts: dict[Any, int]) -> dict[str, int]:
+        """Return the counts of the choices from the counts of the groups."""
+
+    def get_facet_queryset(self, changelist) -> dict[str, int]:
+        filtered_qs = changelist.get_queryset(
+            self.request, exclude_parameters=self.expected_parameters()
+        )
+        query_hash = hashlib.sha256(str(filtered_qs.query).encode()).hexdigest()
+        key = (
+            f"workouts:facets:{DataVersion.objects.current().key}"
+            f":{type(self).__name__}:{query_hash}"
+        )
+        cache = caches[settings.WORKOUTS_REPORT_CACHE]
+        facet_counts = cache.get(key)
+        if facet_counts is None:
+            counts = (
+                filtered_qs.order_by()
+                .values_list(self.facet_group_by)
+                .annotate(models.Count("pk"))
+            )
+            facet_counts = self.get_grouped_facet_counts(dict(counts))
+            cache.set(key, facet_counts)
+        return facet_counts
+
+
+class ExerciseFilter(GroupedFacetsMixin, admin.RelatedFieldListFilter):
+    facet_group_by = "exercise"
+
+    def get_grouped_facet_counts(self, counts: dict[int, int]) -> dict[str, int]:
+        return {f"{pk}__c": counts.get(pk, 0) for pk, _ in self.lookup_choices}
+
+
+class RepetitionsRangesFilter(GroupedFacetsMixin, admin.SimpleListFilter):
     title = "repetitions range"
     parameter_name = "n_repetitions"
+    facet_group_by = "n_repetitions"
 
     def lookups(self, request, model_admin):
         return [
@@ -29,16 +79,109 @@ class RepetitionsRangesFilter(admin.SimpleListFilter):
             return queryset
         return queryset.repetitions_range(range)
 
+    def get_grouped_facet_counts(self, counts: dict[int, int]) -> dict[str, int]:
+        ranges = [
+            SetOfExercise.REPETITIONS_RANGES(value) for value, _ in self.lookup_choices
+        ]
+        return {
+            f"{i}__c": sum(
+                count
+                for n_repetitions, count in counts.items()
+                if range.contains(n_repetitions)
+            )
+            for i, range in enumerate(ranges)
+        }
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that does not count all the rows of large tables.
+
+    The rows of an unfiltered table are estimated, from the statistics of the
+    planner on PostgreSQL or from the largest primary key elsewhere. Rows of
+    filtered querysets are counted up to `max_count`, so that the last pages
+    of huge results cannot be reached, but counting them stays cheap.
+    """
+
+    max_count = 10_000
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = _estimate_count(queryset)
+            if estimate > self.max_count:
+                return estimate
+        return queryset.order_by()[: self.max_count + 1].count()
+
+
+def _estimate_count(queryset: QuerySet) -> int:
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            (estimate,) = cursor.fetchone()
+        # Tables never analyzed have no estimate.
+        if estimate >= 0:
+            return int(estimate)
+    return queryset.aggregate(max_pk=models.Max("pk"))["max_pk"] or 0
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin for tables too large to be counted or joined row by row."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
 @admin.register(SetOfExercise)
-class SetOfExerciseAdmin(admin.ModelAdmin):
+class SetOfExerciseAdmin(LargeTableAdmin):
     list_display = ("workout", "exercise", "n_repetitions", "weight", "notes")
-    search_fields = ("notes", "exercise__code", "exercise__name", "workout__date")
-    list_filter = ("exercise", "workout__date", RepetitionsRangesFilter)
-    ordering = ("-workout__date", "exercise__code", "-weight")
+    list_select_related = ("workout", "exercise")
+    search_fields = ("notes", "exercise__code", "exercise__name", "workout_date")
+    list_filter = (("exercise", ExerciseFilter), RepetitionsRangesFilter)
+    date_hierarchy = "workout_date"
+    # Matches the index on (workout_date, id), so pages are read in its order.
+    ordering = ("-workout_date", "-id")
     show_facets = admin.ShowFacets.ALWAYS
 
 
 @admin.register(Workout)
 class WorkoutAdmin(admin.ModelAdmin):
+    list_display = (
+        "date",
+        "n_exercises",
+        "n_sets",
+        "total_volume",
+        "total_repetitions",
+    )
     ordering = ("-date",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_statistics()
+
+    @admin.display(description="exercises", ordering="n_exercises")
+    def n_exercises(self, obj: Workout) -> int:
+        return obj.n_exercises
+
+    @admin.display(description="sets", ordering="n_sets")
+    def n_sets(self, obj: Workout) -> int:
+        return obj.n_sets
+
+    @admin.display(description="volume", ordering="total_volume")
+    def total_volume(self, obj: Workout) -> float | None:
+        return obj.total_volume
+
+    @admin.display(description="repetitions", ordering="total_repetitions")
+    def total_repetitions(self, obj: Workout) -> int | None:
+        return obj.total_repetitions
+
+
+@admin.register(ImportRun)
+class ImportRunAdmin(admin.ModelAdmin):
+    list_display = ("path", "imported_at", "n_rows", "n_created_sets", "sha256")
+    search_fields = ("path", "sha256")
+    ordering = ("-imported_at",)
+    readonly_fields = ("path", "sha256", "n_rows", "n_created_sets", "imported_at")
@@ -0,0 +1,81 @@
+"""Vectorized analytics on the DataFrames of `SetOfExerciseQuerySet.to_dataframe`.
+
+Every function takes a DataFrame with the columns `date`, `exercise`,
+`n_repetitions`, `weight` and `volume`, one row per set of exercise.
+`workouts.snapshots.sets_dataframe` reads one from the memory-mapped
+snapshots, when they are up to date.
+"""
+
+from collections.abc import Sequence
+
+import pandas as pd
+
+DEFAULT_PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def rolling_volume(
+    df: pd.DataFrame, window: int = 7, per_exercise: bool = False
+) -> pd.DataFrame:
+    """Rolling average of the daily volume, over windows of `window` days.
+
+    Days without sets count as zero volume. The result is indexed by day, with
+    one column per exercise if `per_exercise`, or a single `volume` column.
+    """
+    if per_exercise:
+        daily_volume = df.pivot_table(
+            index="date",
+            columns="exercise",
+            values="volume",
+            aggfunc="sum",
+            fill_value=0.0,
+            observed=True,
+        )
+    else:
+        daily_volume = df.groupby("date")[["volume"]].sum()
+    if daily_volume.empty:
+        return daily_volume
+    days = pd.date_range(daily_volume.index.min(), daily_volume.index.max())
+    return (
+        daily_volume.reindex(days, fill_value=0.0)
+        .rolling(window, min_periods=1)
+        .mean()
+        .rename_axis(index="date")
+    )
+
+
+def weekly_progression(df: pd.DataFrame) -> pd.DataFrame:
+    """Weekly statistics of every exercise, and their change from the week before.
+
+    The result is indexed by exercise and by the Monday starting the week. The
+    changes compare consecutive weeks in which the exercise was performed.
+    """
+    weeks = df["date"].dt.to_period("W-SUN").dt.start_time
+    weekly = (
+        df.groupby(["exercise", weeks.rename("week")], observed=True)
+        .agg(
+            n_sets=pd.NamedAgg(column="volume", aggfunc="size"),
+            total_repetitions=pd.NamedAgg(column="n_repetitions", aggfunc="sum"),
+            max_weight=pd.NamedAgg(column="weight", aggfunc="max"),
+            total_volume=pd.NamedAgg(column="volume", aggfunc="sum"),
+        )
+        .sort_index()
+    )
+    changes = weekly.groupby(level="exercise", observed=True)[
+        ["max_weight", "total_volume"]
+    ].diff()
+    return weekly.join(changes.add_suffix("_change"))
+
+
+def percentiles(
+    df: pd.DataFrame,
+    q: Sequence[float] = DEFAULT_PERCENTILES,
+    columns: Sequence[str] = ("weight", "n_repetitions"),
+) -> pd.DataFrame:
+    """Percentiles of the weight and repetitions of the sets of every exercise.
+
+    The result is indexed by exercise, with a column for every pair of column
+    and percentile.
+    """
+    return (
+        df.groupby("exercise", observed=True)[list(columns)].quantile(list(q)).unstack()
+    )
@@ -0,0 +1,183 @@
+"""Measure the time and the database queries of the hot paths of the app.
+
+Benchmarks are meant to run on a diary made with the `generate_workouts`
+command, and their results to be compared across releases.
+"""
+
+import datetime
+import statistics
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import partial
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import synthetic
+from .models import SetOfExercise, Workout, get_start_end_dates_from_period
+
+PERIODICITIES = ["daily", "weekly", "monthly", "yearly", "total"]
+
+
+def uncached() -> override_settings:
+    """Compute reports every time, within this context, instead of caching them."""
+    return override_settings(
+        CACHES=settings.CACHES
+        | {"uncached": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+        WORKOUTS_REPORT_CACHE="uncached",
+    )
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    n_queries: int
+    min_seconds: float
+    median_seconds: float
+
+
+def measure(name: str, func: Callable[[], object], repeat: int) -> BenchmarkResult:
+    """Time `func` `repeat` times, counting the queries of its last run.
+
+    Only queries on the connection of the current thread are counted, so not
+    those that async views run in worker threads.
+    """
+    seconds = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - start)
+    return BenchmarkResult(
+        name=name,
+        n_queries=len(queries.captured_queries),
+        min_seconds=min(seconds),
+        median_seconds=statistics.median(seconds),
+    )
+
+
+@contextmanager
+def _admin_client() -> Iterator[Client]:
+    """Client logged in as a superuser, which exists only within this context."""
+    user = get_user_model().objects.create_user(
+        username=f"benchmark-{time.time_ns()}", is_staff=True, is_superuser=True
+    )
+    try:
+        client = Client()
+        client.force_login(user)
+        yield client
+    finally:
+        user.delete()
+
+
+def _compute_report(**kwargs) -> list[dict] | dict | tuple[list[dict], dict]:
+    report = SetOfExercise.objects.compute_report(**kwargs)
+    return report if isinstance(report, dict | tuple) else list(report)
+
+
+def _import_and_roll_back(path: Path) -> None:
+    with transaction.atomic():
+        SetOfExercise.objects.create_from_excel(path)
+        transaction.set_rollback(True)
+
+
+def get_benchmarks(
+    client: Client, admin_client: Client, excel_path: Path
+) -> dict[str, Callable[[], object]]:
+    """Return the benchmarks, by name, on the latest year of the diary."""
+    last_date = (
+        Workout.objects.order_by("-date").values_list("date", flat=True).first()
+        or datetime.date.today()
+    )
+    start_date = last_date - datetime.timedelta(days=365)
+    month_start_date, month_end_date = get_start_end_dates_from_period(
+        last_date, "month"
+    )
+    benchmarks = {}
+    for periodicity in PERIODICITIES:
+        for per_exercise in [True, False]:
+            for use_rollups in [True, False]:
+                name = (
+                    f"compute_report {periodicity}"
+                    f"{' per exercise' if per_exercise else ''}"
+                    f"{'' if use_rollups else ' from sets'}"
+                )
+                benchmarks[name] = partial(
+                    _compute_report,
+                    start_date=start_date,
+                    end_date=last_date,
+                    periodicity=periodicity,
+                    per_exercise=per_exercise,
+                    use_rollups=use_rollups,
+                )
+    benchmarks["compute_report with totals"] = partial(
+        _compute_report,
+        start_date=month_start_date,
+        end_date=month_end_date,
+        periodicity="total",
+        with_totals=True,
+    )
+    benchmarks["create_from_excel"] = partial(_import_and_roll_back, excel_path)
+    chart_params = {
+        "start_date": start_date.isoformat(),
+        "end_date": last_date.isoformat(),
+        "metrics": ["n_sets", "total_volume", "max_weight"],
+    }
+    for name, url, params in [
+        ("view index", reverse("index"), {}),
+        ("view index async", reverse("index_async"), {}),
+        ("view chart data", reverse("chart_data"), chart_params),
+        ("view chart data async", reverse("chart_data_async"), chart_params),
+        ("view records", reverse("records"), {}),
+    ]:
+        benchmarks[name] = partial(client.get, url, params)
+    for model in ["setofexercise", "workout", "exercise"]:
+        benchmarks[f"admin {model} changelist"] = partial(
+            admin_client.get, reverse(f"admin:workouts_{model}_changelist")
+        )
+    return benchmarks
+
+
+def run_benchmarks(
+    repeat: int = 5, n_excel_rows: int = 1000, pattern: str = ""
+) -> list[BenchmarkResult]:
+    """Run the benchmarks whose name contains `pattern`, with reports uncached."""
+    with tempfile.TemporaryDirectory() as directory:
+        excel_path = Path(directory) / "benchmark.xlsx"
+        # Dates far in the future, so that all the rows are new.
+        start_date = datetime.date(2100, 1, 1)
+        rows = islice(
+            synthetic.iter_rows(
+                start_date,
+                start_date + datetime.timedelta(days=36500),
+                synthetic.get_exercises(8),
+            ),
+            n_excel_rows,
+        )
+        synthetic.write_excel(excel_path, rows)
+        # The requests of test clients are for the host "testserver".
+        allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with (
+            uncached(),
+            override_settings(ALLOWED_HOSTS=allowed_hosts),
+            _admin_client() as admin_client,
+        ):
+            benchmarks = get_benchmarks(Client(), admin_client, excel_path)
+            return [
+                measure(name, func, repeat)
+                for name, func in benchmarks.items()
+                if pattern in name
+            ]
+
+
+def results_as_records(results: list[BenchmarkResult]) -> list[dict]:
+    return [asdict(result) for result in results]
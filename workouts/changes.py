@@ -0,0 +1,138 @@
+"""Feed of the exercises, workouts and sets changed since a cursor.
+
+Clients keep the cursor of the last change they received, and ask for the
+changes after it, in batches, to stay in sync without downloading the whole
+diary. Changes are saved and updated objects, ordered by their `modified`
+timestamp, and the tombstones of deleted objects.
+"""
+
+import datetime
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import pagination, serializers
+from .models import Exercise, SetOfExercise, Tombstone, Workout
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    get_queryset: Callable[[], models.QuerySet]
+    serialize: Callable[[models.Model], dict] | None
+
+
+# Changes with the same timestamp are ordered by source, then by id.
+SOURCES = [
+    Source("exercise", Exercise.objects.all, serializers.serialize_exercise),
+    Source("workout", Workout.objects.all, serializers.serialize_workout),
+    Source(
+        "set_of_exercise",
+        lambda: SetOfExercise.objects.select_related("exercise"),
+        serializers.serialize_set,
+    ),
+    Source("tombstone", Tombstone.objects.all, None),
+]
+
+
+@dataclass
+class Change:
+    modified: datetime.datetime
+    source: int
+    obj: models.Model
+
+    @property
+    def key(self) -> tuple[datetime.datetime, int, int]:
+        return (self.modified, self.source, self.obj.pk)
+
+    def as_dict(self) -> dict:
+        source = SOURCES[self.source]
+        if source.serialize is None:
+            return {
+                "model": self.obj.model,
+                "id": self.obj.object_id,
+                "modified": self.modified,
+                "deleted": True,
+                "data": None,
+            }
+        return {
+            "model": source.name,
+            "id": self.obj.pk,
+            "modified": self.modified,
+            "deleted": False,
+            "data": source.serialize(self.obj),
+        }
+
+
+@dataclass
+class ChangesBatch:
+    changes: list[dict]
+    cursor: str | None
+    has_more: bool
+
+
+def parse_cursor(cursor: list) -> tuple[datetime.datetime, int, int]:
+    """Return the key of the change of a cursor, raising `ValueError` if invalid."""
+    try:
+        modified, source, pk = cursor
+        modified = parse_datetime(modified)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+    if (
+        modified is None
+        or not isinstance(source, int)
+        or not isinstance(pk, int)
+        or not 0 <= source < len(SOURCES)
+    ):
+        raise ValueError("Invalid cursor.")
+    return modified, source, pk
+
+
+def get_changes(
+    cursor: list | None = None, limit: int = pagination.DEFAULT_PAGE_SIZE
+) -> ChangesBatch:
+    """Return up to `limit` changes after `cursor`, and the cursor of the last.
+
+    Every source is read with a single query on its index of `modified`, for
+    at most `limit + 1` rows, and the results are merged. Changes of the last
+    `WORKOUTS_CHANGES_DELAY` seconds are left for the next batch: they may
+    belong to transactions still in progress, whose timestamps are earlier
+    than their commit. Changes of transactions longer than the delay may be
+    missed.
+    """
+    until = timezone.now() - datetime.timedelta(seconds=settings.WORKOUTS_CHANGES_DELAY)
+    if cursor is not None:
+        modified, cursor_source, pk = parse_cursor(cursor)
+    changes = []
+    for i, source in enumerate(SOURCES):
+        queryset = source.get_queryset().filter(modified__lte=until)
+        if cursor is not None:
+            if i < cursor_source:
+                queryset = queryset.filter(modified__gt=modified)
+            elif i == cursor_source:
+                queryset = queryset.filter(
+                    models.Q(modified__gt=modified)
+                    | models.Q(modified=modified, pk__gt=pk),
+                    modified__gte=modified,
+                )
+            else:
+                queryset = queryset.filter(modified__gte=modified)
+        changes.extend(
+            Change(obj.modified, i, obj)
+            for obj in queryset.order_by("modified", "pk")[: limit + 1]
+        )
+    changes.sort(key=lambda change: change.key)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        modified, source, pk = changes[-1].key
+        cursor = [modified.isoformat(), source, pk]
+    return ChangesBatch(
+        changes=[change.as_dict() for change in changes],
+        cursor=pagination.encode_cursor(cursor) if cursor is not None else None,
+        has_more=has_more,
+    )
@@ -0,0 +1,138 @@
+"""Series of daily statistics for charts, downsampled to a budget of points.
+
+Charts of long periods would otherwise send, and render, one point per day.
+Series are downsampled with Largest-Triangle-Three-Buckets, which keeps the
+peaks and troughs that make the shape of a series.
+"""
+
+import datetime
+from collections import defaultdict
+from collections.abc import Sequence
+
+import numpy as np
+
+from . import snapshots
+from .reports import get_report
+
+METRICS = {
+    "n_sets": "Sets",
+    "total_volume": "Volume",
+    "total_repetitions": "Repetitions",
+    "max_weight": "Max weight",
+}
+DEFAULT_N_POINTS = 500
+MIN_N_POINTS = 3
+MAX_N_POINTS = 5000
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_points: int) -> np.ndarray:
+    """Return the indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are
+    split in `n_points - 2` buckets, and from every bucket the point forming
+    the largest triangle with the point kept from the bucket before and with
+    the average of the bucket after is kept.
+    """
+    n = len(x)
+    if n_points >= n:
+        return np.arange(n)
+    if n_points < MIN_N_POINTS:
+        raise ValueError(f"At least {MIN_N_POINTS} points are needed.")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_points - 1).astype(int)
+    kept = np.empty(n_points, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+    for i_bucket in range(n_points - 2):
+        start, stop = edges[i_bucket], edges[i_bucket + 1]
+        if i_bucket + 2 < len(edges):
+            next_start, next_stop = stop, edges[i_bucket + 2]
+        else:
+            next_start, next_stop = n - 1, n
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+        previous = kept[i_bucket]
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        kept[i_bucket + 1] = start + int(areas.argmax())
+    return kept
+
+
+def get_chart_series(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    metrics: Sequence[str] = ("n_sets",),
+    exercises: Sequence[str] | None = None,
+    n_points: int = DEFAULT_N_POINTS,
+) -> list[dict]:
+    """Return a daily series for every metric, downsampled to `n_points`.
+
+    Metrics are of all the exercises together, or of each exercise whose code
+    is in `exercises`, if given. Every series has a `label`, its `metric`,
+    its `exercise` code (or None) and its `data`, as `{"x": date, "y": value}`.
+    Statistics are computed from the snapshots of `workouts.snapshots`, if they
+    are up to date, or from the daily report otherwise.
+    """
+    invalid_metrics = set(metrics) - set(METRICS)
+    if invalid_metrics:
+        raise ValueError(
+            f"Invalid metrics {sorted(invalid_metrics)}. "
+            f"Acceptable values are: {list(METRICS)}"
+        )
+    snapshot = snapshots.load()
+    if snapshot is not None:
+        daily = snapshot.daily_statistics(start_date, end_date, exercises or None)
+    else:
+        daily = _daily_statistics_from_report(start_date, end_date, exercises)
+    series = []
+    for exercise, statistics in daily.items():
+        for metric in metrics:
+            values = statistics.values[metric].astype(float)
+            kept = lttb(statistics.days, values, n_points)
+            label = METRICS[metric]
+            if exercise is not None:
+                label = f"{statistics.name}: {label}"
+            series.append(
+                {
+                    "label": label,
+                    "metric": metric,
+                    "exercise": exercise,
+                    "data": [
+                        {
+                            "x": snapshots.from_days(statistics.days[i]).isoformat(),
+                            "y": values[i].item(),
+                        }
+                        for i in kept.tolist()
+                    ],
+                }
+            )
+    return series
+
+
+def _daily_statistics_from_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    exercises: Sequence[str] | None = None,
+) -> dict[str | None, snapshots.DailyStatistics]:
+    per_exercise = bool(exercises)
+    report = get_report(start_date, end_date, "daily", per_exercise=per_exercise)
+    rows_per_exercise = defaultdict(list)
+    for row in report:
+        if per_exercise and row["code"] not in exercises:
+            continue
+        rows_per_exercise[row["code"] if per_exercise else None].append(row)
+    daily = {}
+    for exercise, rows in rows_per_exercise.items():
+        rows.sort(key=lambda row: row["date"])
+        daily[exercise] = snapshots.DailyStatistics(
+            rows[0]["name"] if exercise is not None else None,
+            np.array([snapshots.to_days(row["date"]) for row in rows]),
+            {
+                metric: np.array([float(row[metric] or 0) for row in rows])
+                for metric in METRICS
+            },
+        )
+    return daily
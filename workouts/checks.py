@@ -0,0 +1,32 @@
+"""System checks of the settings of the app."""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_exercise_cache(app_configs, **kwargs):
+    """Reject a `WORKOUTS_EXERCISE_CACHE` that is not shared by the processes.
+
+    Every process caches the exercises, and reloads them when their version in
+    this cache changes: with a cache private to each process, the others never
+    see the change. Skipped with `DEBUG`, as the development server runs a
+    single process.
+    """
+    if settings.DEBUG:
+        return []
+    cache = caches[settings.WORKOUTS_EXERCISE_CACHE]
+    if not isinstance(cache, LocMemCache | DummyCache):
+        return []
+    return [
+        Error(
+            f"The {settings.WORKOUTS_EXERCISE_CACHE!r} cache of exercises is not "
+            "shared by the processes, which do not see the changes of the others.",
+            hint="Use a file cache, or a database cache.",
+            obj="WORKOUTS_EXERCISE_CACHE",
+            id="workouts.E001",
+        )
+    ]
@@ -0,0 +1,26 @@
+"""Run blocking database work from async views without stalling the event loop."""
+
+from collections.abc import Awaitable, Callable
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def in_worker_thread(func: Callable) -> Callable[..., Awaitable]:
+    """Make a blocking function awaitable, running it in a thread of its own.
+
+    Unlike the default of `sync_to_async`, calls are not serialized on a single
+    thread, so independent queries run concurrently, each on the connection of
+    its thread. Connections are then closed as at the end of a request, per
+    `CONN_MAX_AGE`.
+    """
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
@@ -0,0 +1,134 @@
+"""Stream sets of exercises and reports as CSV, NDJSON or Excel.
+
+Rows are read from the database in chunks and written out one at a time, so
+memory stays constant however many rows are exported. Sets are exported in
+the columns read by `SetOfExerciseManager.create_from_file`, so exported
+files can be loaded back.
+"""
+
+import csv
+import datetime
+import json
+import tempfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+import openpyxl
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from .imports import REQUIRED_COLUMNS
+
+SETS_COLUMNS = REQUIRED_COLUMNS + ["Notes"]
+DEFAULT_CHUNK_SIZE = 2000
+_XLSX_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    extension: str
+    content_type: str
+
+
+FORMATS = {
+    "csv": ExportFormat("csv", "text/csv"),
+    "ndjson": ExportFormat("ndjson", "application/x-ndjson"),
+    "xlsx": ExportFormat(
+        "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ),
+}
+
+
+def iter_sets(
+    queryset: models.QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> tuple[list[str], Iterator[tuple]]:
+    """Return the columns of sets of exercises, and an iterator on their rows.
+
+    The code of the exercise is read with a join, and no model instance is
+    created, so rows come straight from the database cursor.
+    """
+    rows = (
+        queryset.order_by("workout_date", "id")
+        .values_list(
+            "workout_date", "exercise__code", "weight", "n_repetitions", "notes"
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    return SETS_COLUMNS, rows
+
+
+def iter_report(
+    report: models.QuerySet | dict, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> tuple[list[str], Iterator[tuple]]:
+    """Return the columns of a report, and an iterator on its rows."""
+    if isinstance(report, dict):
+        return list(report), iter([tuple(report.values())])
+    columns = [*report.query.values_select, *report.query.annotation_select]
+    return columns, (
+        tuple(row[column] for column in columns)
+        for row in report.iterator(chunk_size=chunk_size)
+    )
+
+
+class _Echo:
+    """File-like object returning what is written to it, for `csv.writer`."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(columns: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_ndjson(columns: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def stream_xlsx(columns: list[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """Write rows to a write-only workbook, then yield the file in blocks.
+
+    A workbook is a zip archive, which is complete only once all rows are
+    written, so its first bytes come out only after the last row is read.
+    Write-only workbooks keep memory constant in the meantime.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    for row in rows:
+        sheet.append(row)
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        file.seek(0)
+        while block := file.read(_XLSX_BLOCK_SIZE):
+            yield block
+
+
+STREAMS = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+    "xlsx": stream_xlsx,
+}
+
+
+def stream(
+    format: str, columns: list[str], rows: Iterable[tuple]
+) -> Iterator[str | bytes]:
+    """Stream rows in one of `FORMATS`."""
+    try:
+        stream_format = STREAMS[format]
+    except KeyError:
+        raise ValueError(
+            f"Invalid format {format!r}. Acceptable values are: {list(FORMATS)}"
+        ) from None
+    return stream_format(columns, rows)
@@ -1,10 +1,12 @@
 import datetime
+from decimal import Decimal
 
 from django import forms
 from django_flatpickr.schemas import FlatpickrOptions
 from django_flatpickr.widgets import DatePickerInput
 
-from .models import get_start_end_dates_from_period
+from . import charts, exports, imports, pagination
+from .models import Exercise, SetOfExercise, get_start_end_dates_from_period
 
 _start_date, _end_date = get_start_end_dates_from_period(datetime.date.today(), "month")
 
@@ -22,3 +24,158 @@ class DateRangeForm(forms.Form):
             range_from="start_date", options=FlatpickrOptions(altFormat="Y-m-d")
         ),
     )
+
+
+class ChartForm(DateRangeForm):
+    metrics = forms.MultipleChoiceField(
+        label="Metrics",
+        choices=charts.METRICS,
+        initial=["n_sets"],
+        required=False,
+    )
+    exercises = forms.ModelMultipleChoiceField(
+        label="Exercises",
+        queryset=Exercise.objects.order_by("code"),
+        to_field_name="code",
+        required=False,
+        help_text="Leave empty to chart all the exercises together.",
+    )
+    n_points = forms.IntegerField(
+        label="Maximum points per series",
+        initial=charts.DEFAULT_N_POINTS,
+        min_value=charts.MIN_N_POINTS,
+        max_value=charts.MAX_N_POINTS,
+        required=False,
+    )
+
+    def clean_metrics(self):
+        return self.cleaned_data["metrics"] or self.fields["metrics"].initial
+
+    def clean_n_points(self):
+        return self.cleaned_data["n_points"] or charts.DEFAULT_N_POINTS
+
+
+class ExportSetsForm(forms.Form):
+    format = forms.ChoiceField(choices={name: name.upper() for name in exports.FORMATS})
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+
+
+class ExportReportForm(DateRangeForm):
+    PERIODICITIES = ["daily", "weekly", "monthly", "yearly", "total"]
+
+    format = forms.ChoiceField(choices={name: name.upper() for name in exports.FORMATS})
+    periodicity = forms.ChoiceField(choices={name: name for name in PERIODICITIES})
+    per_exercise = forms.BooleanField(required=False)
+
+
+class KeysetPageForm(forms.Form):
+    cursor = forms.CharField(required=False)
+    limit = forms.IntegerField(
+        min_value=1, max_value=pagination.MAX_PAGE_SIZE, required=False
+    )
+
+    def clean_cursor(self):
+        cursor = self.cleaned_data["cursor"]
+        if not cursor:
+            return None
+        try:
+            return pagination.decode_cursor(cursor)
+        except ValueError as exc:
+            raise forms.ValidationError("Invalid cursor.") from exc
+
+    def clean_limit(self):
+        return self.cleaned_data["limit"] or pagination.DEFAULT_PAGE_SIZE
+
+
+class ApiWorkoutsForm(KeysetPageForm):
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+
+
+class ApiSetsForm(ApiWorkoutsForm):
+    exercise = forms.CharField(required=False, help_text="Code or name")
+    repetitions_range = forms.ChoiceField(
+        choices=[("", "")]
+        + [(range.value, range.value) for range in SetOfExercise.REPETITIONS_RANGES],
+        required=False,
+    )
+
+    def clean_exercise(self):
+        code = self.cleaned_data["exercise"]
+        if not code:
+            return None
+        try:
+            return Exercise.objects.resolve(code)
+        except Exercise.DoesNotExist as exc:
+            raise forms.ValidationError(f"Unknown exercise {code!r}.") from exc
+
+
+# The float bound of imports, which is not exact.
+MAX_WEIGHT = Decimal(f"{imports.MAX_WEIGHT:.{imports.WEIGHT_DECIMAL_PLACES}f}")
+
+
+class LogSetForm(forms.Form):
+    exercise = forms.CharField(help_text="Code or name")
+    n_repetitions = forms.IntegerField(min_value=1, max_value=32767)
+    # Negative weights are assisted sets, as in imports.
+    weight = forms.DecimalField(
+        min_value=-MAX_WEIGHT,
+        max_value=MAX_WEIGHT,
+        decimal_places=imports.WEIGHT_DECIMAL_PLACES,
+    )
+    notes = forms.CharField(max_length=1000, required=False, empty_value=None)
+
+
+class LogWorkoutForm(forms.Form):
+    """A workout and all its sets, as a single JSON document.
+
+    Every set is validated by its own `LogSetForm`, and their exercises are
+    resolved together, with at most one query.
+    """
+
+    MAX_SETS = 500
+
+    date = forms.DateField()
+
+    def __init__(self, data: dict | None = None, **kwargs):
+        super().__init__(data, **kwargs)
+        sets = data.get("sets") if isinstance(data, dict) else None
+        self.set_forms = (
+            [LogSetForm(values if isinstance(values, dict) else {}) for values in sets]
+            if isinstance(sets, list)
+            else None
+        )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.set_forms is None:
+            self.add_error(None, "Sets must be a list.")
+        elif not self.set_forms:
+            self.add_error(None, "A workout needs at least one set.")
+        elif len(self.set_forms) > self.MAX_SETS:
+            self.add_error(None, f"A workout can have at most {self.MAX_SETS} sets.")
+        else:
+            if all([form.is_valid() for form in self.set_forms]):
+                self._resolve_exercises()
+            if any(form.errors for form in self.set_forms):
+                self.add_error(None, "Some sets are invalid.")
+        return cleaned_data
+
+    def _resolve_exercises(self) -> None:
+        exercises = Exercise.objects.resolve_many(
+            form.cleaned_data["exercise"] for form in self.set_forms
+        )
+        for form in self.set_forms:
+            code = form.cleaned_data["exercise"]
+            if code.lower() in exercises:
+                form.cleaned_data["exercise"] = exercises[code.lower()]
+            else:
+                form.add_error("exercise", f"Unknown exercise {code!r}.")
+
+    @property
+    def set_errors(self) -> dict[int, dict]:
+        """Errors of the invalid sets, by their position in the list."""
+        return {
+            i: form.errors for i, form in enumerate(self.set_forms or []) if form.errors
+        }
@@ -0,0 +1,332 @@
+"""Read and parse spreadsheets of workouts in chunks of rows of bounded size.
+
+Nothing in this module touches the database, so files can be parsed in
+worker processes and handed over to a single writer.
+"""
+
+import datetime
+import hashlib
+import time
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from .validators import validator_only_latin_letters
+
+DEFAULT_CHUNK_SIZE = 5000
+EXCEL_SUFFIXES = {".xlsx", ".xlsm"}
+CSV_SUFFIXES = {".csv"}
+SUPPORTED_SUFFIXES = EXCEL_SUFFIXES | CSV_SUFFIXES
+
+REQUIRED_COLUMNS = ["Date", "Exercise", "Weight", "Reps"]
+
+# Mirror the constraints of the fields of `Exercise` and `SetOfExercise`.
+MAX_LENGTH_CODE = 5
+MAX_REPETITIONS = 32767
+WEIGHT_DECIMAL_PLACES = 1
+MAX_WEIGHT = 10**5 - 10**-WEIGHT_DECIMAL_PLACES
+
+
+class Row(NamedTuple):
+    """Values needed to create a set of exercise."""
+
+    code: str
+    date: datetime.date
+    n_repetitions: int
+    weight: Decimal
+    notes: str | None
+    fingerprint: str | None = None
+
+
+def spreadsheet_row(position: int) -> int:
+    """Number of a row of data in its file, as spreadsheets show it.
+
+    The header is row 1, so the first row of data, at position 0, is row 2.
+    """
+    return position + 2
+
+
+@dataclass(frozen=True)
+class RowError:
+    """Reason why the value of a row in a column cannot be imported.
+
+    `row` is the number of the row in its file, see `spreadsheet_row`.
+    """
+
+    row: int
+    column: str
+    reason: str
+
+
+def iter_excel_chunks(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Yield the rows of the first sheet of an Excel file, `chunk_size` at a time.
+
+    The workbook is opened in read-only mode, so rows are read lazily from
+    disk instead of loading the whole workbook in memory.
+    Chunks are indexed by row position, as `pd.read_excel` would do.
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = (
+            row
+            for row in workbook.worksheets[0].iter_rows(values_only=True)
+            if any(value is not None for value in row)
+        )
+        header = next(rows, None)
+        if header is None:
+            return
+        n_columns = len(header)
+        # Rows end at their last cell with a value, so pad them to the header.
+        rows = (row[:n_columns] + (None,) * (n_columns - len(row)) for row in rows)
+        start = 0
+        while chunk := list(islice(rows, chunk_size)):
+            yield pd.DataFrame(
+                chunk,
+                columns=list(header),
+                index=pd.RangeIndex(start, start + len(chunk)),
+            )
+            start += len(chunk)
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Yield the rows of a CSV file, `chunk_size` at a time."""
+    with pd.read_csv(path, chunksize=chunk_size, parse_dates=["Date"]) as reader:
+        yield from reader
+
+
+def iter_chunks(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Yield the rows of an Excel or CSV file, `chunk_size` at a time."""
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be a positive number of rows.")
+    suffix = Path(path).suffix.lower()
+    if suffix in EXCEL_SUFFIXES:
+        return iter_excel_chunks(path, chunk_size)
+    elif suffix in CSV_SUFFIXES:
+        return iter_csv_chunks(path, chunk_size)
+    else:
+        raise ValueError(
+            f"Unsupported file type {suffix!r}. "
+            f"Supported types are: {sorted(SUPPORTED_SUFFIXES)}"
+        )
+
+
+def _first_failure(index: pd.Index, checks: list[tuple[pd.Series, str]]) -> pd.Series:
+    """Return, for every row, the reason of the first failed check or ''."""
+    return pd.Series(
+        np.select(
+            [
+                pd.Series(invalid, index=index).fillna(True).to_numpy(dtype=bool)
+                for invalid, _ in checks
+            ],
+            [reason for _, reason in checks],
+            default="",
+        ),
+        index=index,
+    )
+
+
+def validate_dataframe(df: pd.DataFrame) -> tuple[pd.DataFrame, list[RowError]]:
+    """Validate all the rows of a DataFrame at once, with column-wise checks.
+
+    Returns the valid rows, with normalized values and types, and an error for
+    every invalid value. Rows with at least one invalid value are dropped.
+    Raises `ValueError` if a required column is missing.
+    """
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in df]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {missing_columns}")
+
+    codes = df["Exercise"].astype("string").str.strip()
+    dates = pd.to_datetime(df["Date"], errors="coerce")
+    repetitions = pd.to_numeric(df["Reps"], errors="coerce")
+    weights = pd.to_numeric(df["Weight"], errors="coerce")
+    weights_scaled = weights * 10**WEIGHT_DECIMAL_PLACES
+    missing = {column: df[column].isna() for column in REQUIRED_COLUMNS}
+    failures = {
+        "Exercise": _first_failure(
+            df.index,
+            [
+                (missing["Exercise"] | (codes == ""), "Missing value"),
+                (
+                    ~codes.str.match(validator_only_latin_letters.regex.pattern),
+                    validator_only_latin_letters.message,
+                ),
+                (
+                    codes.str.len() > MAX_LENGTH_CODE,
+                    f"Code longer than {MAX_LENGTH_CODE} characters.",
+                ),
+            ],
+        ),
+        "Date": _first_failure(
+            df.index,
+            [
+                (missing["Date"], "Missing value"),
+                (dates.isna(), "Not a valid date."),
+                (
+                    dates != dates.dt.normalize(),
+                    "Date has a time of day, but there is one workout per date.",
+                ),
+            ],
+        ),
+        "Reps": _first_failure(
+            df.index,
+            [
+                (missing["Reps"], "Missing value"),
+                (repetitions.isna(), "Not a number."),
+                (repetitions != repetitions.round(), "Not a whole number."),
+                (repetitions < 1, "Not a positive number."),
+                (
+                    repetitions > MAX_REPETITIONS,
+                    f"Greater than {MAX_REPETITIONS}.",
+                ),
+            ],
+        ),
+        "Weight": _first_failure(
+            df.index,
+            [
+                (missing["Weight"], "Missing value"),
+                (weights.isna() | ~np.isfinite(weights), "Not a number."),
+                (
+                    ~np.isclose(weights_scaled, weights_scaled.round()),
+                    f"More than {WEIGHT_DECIMAL_PLACES} decimal places.",
+                ),
+                (weights.abs() > MAX_WEIGHT, f"Greater than {MAX_WEIGHT:.1f}."),
+            ],
+        ),
+    }
+    failures = pd.DataFrame(failures)
+    invalid = (failures != "").any(axis="columns")
+    errors = [
+        RowError(row=spreadsheet_row(id_row), column=column, reason=reason)
+        for (id_row, column), reason in failures[invalid]
+        .stack()
+        .loc[lambda reasons: reasons != ""]
+        .items()
+    ]
+    valid = ~invalid
+    if "Notes" in df:
+        notes = df["Notes"].astype(object).where(df["Notes"].notna(), None)
+    else:
+        notes = pd.Series([None] * len(df), index=df.index, dtype=object)
+    valid_df = pd.DataFrame(
+        {
+            "Date": dates[valid],
+            "Exercise": codes[valid],
+            "Weight": weights[valid].round(WEIGHT_DECIMAL_PLACES),
+            "Reps": repetitions[valid].astype(int),
+            "Notes": notes[valid],
+        }
+    )
+    return valid_df, errors
+
+
+def source_of(path: Path) -> str:
+    """Identify a file by its absolute path, as the source of the sets of its rows."""
+    return str(Path(path).resolve())
+
+
+def file_sha256(path: Path) -> str:
+    """Hash the content of a file, reading it in blocks."""
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+class RowFingerprints:
+    """Compute stable fingerprints of the rows of a file.
+
+    Identical rows are common (e.g. three sets of 10 repetitions at the same
+    weight), so they are told apart by how many times they occurred before in
+    the same file. The same file, or a file with rows appended to it, always
+    gives the same fingerprints to the same rows.
+    """
+
+    def __init__(self):
+        self._occurrences = Counter()
+        # Fingerprints given so far, to find the rows removed from a file.
+        self.seen = set()
+
+    def __call__(self, row: Row) -> str:
+        key = hashlib.sha256(
+            "\x1f".join(
+                [
+                    row.date.isoformat(),
+                    row.code.lower(),
+                    str(row.n_repetitions),
+                    str(row.weight),
+                    row.notes or "",
+                ]
+            ).encode()
+        ).digest()
+        occurrence = self._occurrences[key]
+        self._occurrences[key] += 1
+        fingerprint = hashlib.sha256(key + occurrence.to_bytes(8)).hexdigest()
+        self.seen.add(fingerprint)
+        return fingerprint
+
+
+def parse_dataframe(
+    df: pd.DataFrame, fingerprints: RowFingerprints | None = None
+) -> tuple[list[Row], list[RowError]]:
+    """Validate the rows of a DataFrame and convert the valid ones to `Row`s.
+
+    If `fingerprints` is given, the rows are fingerprinted with it; use the
+    same instance for all the chunks of a file.
+    """
+    valid_df, errors = validate_dataframe(df)
+    rows = [
+        Row(*values)
+        for values in zip(
+            valid_df["Exercise"].tolist(),
+            valid_df["Date"].dt.date.tolist(),
+            valid_df["Reps"].tolist(),
+            [
+                Decimal(f"{weight:.{WEIGHT_DECIMAL_PLACES}f}")
+                for weight in valid_df["Weight"]
+            ],
+            [None if notes is None else str(notes) for notes in valid_df["Notes"]],
+        )
+    ]
+    if fingerprints is not None:
+        rows = [row._replace(fingerprint=fingerprints(row)) for row in rows]
+    return rows, errors
+
+
+@dataclass
+class ParsedChunk:
+    """Rows of a chunk of a file, ready to be written to the database."""
+
+    rows: list[Row]
+    errors: list[RowError]
+    n_rows: int
+    parse_seconds: float
+
+
+def iter_parsed_chunks(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[ParsedChunk]:
+    """Read, parse and fingerprint a file, yielding one chunk of rows at a time."""
+    fingerprints = RowFingerprints()
+    chunks = iter_chunks(path, chunk_size)
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        rows, errors = parse_dataframe(chunk, fingerprints)
+        yield ParsedChunk(rows, errors, len(chunk), time.perf_counter() - start)
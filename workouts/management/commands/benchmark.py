@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from workouts.benchmarks import results_as_records, run_benchmarks
+from workouts.models import SetOfExercise
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the reports, imports, views and admin changelists of the app, and "
+        "count their queries, on the current database. Reports are not cached. "
+        "Generate a diary to benchmark with generate_workouts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--excel-rows",
+            type=int,
+            default=1000,
+            help="Number of rows of the Excel file imported by create_from_excel",
+        )
+        parser.add_argument(
+            "--filter", default="", help="Only run benchmarks whose name contains it"
+        )
+        parser.add_argument(
+            "--output", type=Path, help="JSON file where to save the results"
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            help="JSON file of earlier results, to compare the results with",
+        )
+
+    def handle(self, *args, **kwargs):
+        baseline = {}
+        if kwargs["baseline"] is not None:
+            baseline = {
+                result["name"]: result
+                for result in json.loads(kwargs["baseline"].read_text())["results"]
+            }
+        n_sets = SetOfExercise.objects.count()
+        results = run_benchmarks(
+            repeat=kwargs["repeat"],
+            n_excel_rows=kwargs["excel_rows"],
+            pattern=kwargs["filter"],
+        )
+        self.stdout.write(
+            f"{n_sets} sets on {connection.vendor}, best and median of "
+            f"{kwargs['repeat']} runs"
+        )
+        self.stdout.write(
+            f"{'benchmark':<45}{'queries':>8}{'best ms':>10}{'median ms':>10}"
+            + (f"{'vs base':>9}" if baseline else "")
+        )
+        for result in results:
+            line = (
+                f"{result.name:<45}{result.n_queries:>8}"
+                f"{result.min_seconds * 1000:>10.1f}"
+                f"{result.median_seconds * 1000:>10.1f}"
+            )
+            if result.name in baseline:
+                change = (
+                    result.median_seconds / baseline[result.name]["median_seconds"] - 1
+                )
+                line += f"{change:>+9.0%}"
+            self.stdout.write(line)
+        if kwargs["output"] is not None:
+            kwargs["output"].write_text(
+                json.dumps(
+                    {
+                        "n_sets": n_sets,
+                        "database": connection.vendor,
+                        "django": django.get_version(),
+                        "repeat": kwargs["repeat"],
+                        "results": results_as_records(results),
+                    },
+                    indent=2,
+                )
+            )
+            self.stderr.write(self.style.SUCCESS(f"Saved to {kwargs['output']}"))
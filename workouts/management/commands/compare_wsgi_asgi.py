@@ -0,0 +1,125 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from workouts.benchmarks import uncached
+
+# Pairs of views doing the same work, the first synchronous, the second async.
+VIEWS = {
+    "index": ("index", "index_async"),
+    "chart": ("chart_data", "chart_data_async"),
+}
+
+
+def _check(url: str, response) -> None:
+    if response.status_code != 200:
+        raise CommandError(f"{url} answered {response.status_code}")
+
+
+def _summary(latencies: list[float], seconds: float) -> dict[str, float]:
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "mean": statistics.fmean(latencies) * 1000,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+        "throughput": len(latencies) / seconds,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the latency of the synchronous views served by the WSGI handler "
+        "with their async versions served by the ASGI handler, under concurrent "
+        "requests. Requests are made in process, so no server is needed: WSGI "
+        "requests run on a pool of threads, like a threaded WSGI server, ASGI "
+        "requests on a single event loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--view", choices=list(VIEWS), default="index")
+        parser.add_argument(
+            "--query",
+            default="",
+            help="Query string of the requests, e.g. for the dates of the chart",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Serve reports from the cache, instead of computing them every time",
+        )
+
+    def handle(self, *args, **kwargs):
+        sync_view, async_view = VIEWS[kwargs["view"]]
+        query = f"?{kwargs['query']}" if kwargs["query"] else ""
+        n_requests = kwargs["requests"]
+        concurrency = kwargs["concurrency"]
+        reports_cache = nullcontext() if kwargs["warm_cache"] else uncached()
+        # The requests of test clients are for the host "testserver".
+        allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with reports_cache, override_settings(ALLOWED_HOSTS=allowed_hosts):
+            results = {
+                "WSGI": self.measure_wsgi(
+                    reverse(sync_view) + query, n_requests, concurrency
+                ),
+                "ASGI": asyncio.run(
+                    self.measure_asgi(
+                        reverse(async_view) + query, n_requests, concurrency
+                    )
+                ),
+            }
+        self.stdout.write(
+            f"{n_requests} requests to {kwargs['view']}, {concurrency} at a time"
+        )
+        self.stdout.write(
+            f"{'':<6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'req/s':>10}"
+        )
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<6}"
+                + "".join(
+                    f"{summary[key]:>10.1f}"
+                    for key in ["mean", "p50", "p95", "p99", "throughput"]
+                )
+            )
+
+    def measure_wsgi(
+        self, url: str, n_requests: int, concurrency: int
+    ) -> dict[str, float]:
+        def request(_) -> float:
+            start = time.perf_counter()
+            response = Client().get(url)
+            _check(url, response)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(request, range(n_requests)))
+        return _summary(latencies, time.perf_counter() - start)
+
+    async def measure_asgi(
+        self, url: str, n_requests: int, concurrency: int
+    ) -> dict[str, float]:
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient()
+
+        async def request() -> float:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                _check(url, response)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(request() for _ in range(n_requests)))
+        return _summary(latencies, time.perf_counter() - start)
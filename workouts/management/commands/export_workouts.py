@@ -0,0 +1,64 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts import exports
+from workouts.forms import ExportReportForm
+from workouts.models import SetOfExercise
+
+
+class Command(BaseCommand):
+    help = (
+        "Export sets of exercises, in the columns read by load_workouts, "
+        "or a report of them. Rows are streamed, so memory stays constant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("what", choices=["sets", "report"])
+        parser.add_argument("--format", choices=list(exports.FORMATS), default="csv")
+        parser.add_argument(
+            "--output", help="Path of the exported file, instead of standard output"
+        )
+        parser.add_argument("--start-date", type=datetime.date.fromisoformat)
+        parser.add_argument("--end-date", type=datetime.date.fromisoformat)
+        parser.add_argument(
+            "--periodicity",
+            choices=ExportReportForm.PERIODICITIES,
+            default="total",
+            help="Periodicity of the report",
+        )
+        parser.add_argument(
+            "--per-exercise", action="store_true", help="Report every exercise"
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs["format"] == "xlsx" and kwargs["output"] is None:
+            raise CommandError("Excel files can only be exported with --output.")
+        start_date = kwargs["start_date"]
+        end_date = kwargs["end_date"]
+        if kwargs["what"] == "sets":
+            sets = SetOfExercise.objects.all()
+            if start_date is not None:
+                sets = sets.filter(workout_date__gte=start_date)
+            if end_date is not None:
+                sets = sets.filter(workout_date__lte=end_date)
+            columns, rows = exports.iter_sets(sets)
+        else:
+            if start_date is None or end_date is None:
+                raise CommandError("Reports need --start-date and --end-date.")
+            report = SetOfExercise.objects.compute_report(
+                start_date,
+                end_date,
+                periodicity=kwargs["periodicity"],
+                per_exercise=kwargs["per_exercise"],
+            )
+            columns, rows = exports.iter_report(report)
+        chunks = exports.stream(kwargs["format"], columns, rows)
+        if kwargs["output"] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(kwargs["output"], "wb") as file:
+            for chunk in chunks:
+                file.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+        self.stderr.write(self.style.SUCCESS(f"Exported to {kwargs['output']}"))
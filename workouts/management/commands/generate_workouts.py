@@ -0,0 +1,137 @@
+import datetime
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from workouts import snapshots, synthetic
+from workouts.models import (
+    DataVersion,
+    Exercise,
+    ExerciseRollup,
+    PersonalRecord,
+    SetOfExercise,
+    Workout,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a realistic diary of workouts, to benchmark the app. "
+        "Sets are inserted in the database, written to Excel files, or both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years", type=int, default=3)
+        parser.add_argument("--exercises", type=int, default=8)
+        parser.add_argument(
+            "--sets-per-day",
+            type=int,
+            default=synthetic.DEFAULT_SETS_PER_DAY,
+            help="Average number of sets of a workout",
+        )
+        parser.add_argument(
+            "--days-per-week",
+            type=float,
+            default=synthetic.DEFAULT_DAYS_PER_WEEK,
+            help="Average number of workouts per week",
+        )
+        parser.add_argument(
+            "--end-date",
+            type=datetime.date.fromisoformat,
+            default=datetime.date.today(),
+            help="Date of the last workout, today by default",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--excel-dir",
+            type=Path,
+            help="Directory where to write an Excel file per year",
+        )
+        parser.add_argument(
+            "--no-database",
+            action="store_true",
+            help="Only write the Excel files",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **kwargs):
+        if kwargs["no_database"] and kwargs["excel_dir"] is None:
+            raise CommandError("Nothing to do: give --excel-dir or a database.")
+        if kwargs["excel_dir"] is not None:
+            kwargs["excel_dir"].mkdir(parents=True, exist_ok=True)
+        exercises = synthetic.get_exercises(kwargs["exercises"])
+        end_date = kwargs["end_date"]
+        start_year = end_date.year - kwargs["years"] + 1
+        start = time.perf_counter()
+        n_sets = 0
+        # Every batch is committed on its own, to keep transactions shorter than
+        # `WORKOUTS_CHANGES_DELAY`, and the snapshots are refreshed once at the end.
+        with snapshots.deferred_refresh():
+            if not kwargs["no_database"]:
+                exercise_ids = self.create_exercises(exercises)
+            for year in range(start_year, end_date.year + 1):
+                rows = list(
+                    synthetic.iter_rows(
+                        datetime.date(year, 1, 1),
+                        min(datetime.date(year, 12, 31), end_date),
+                        exercises,
+                        sets_per_day=kwargs["sets_per_day"],
+                        days_per_week=kwargs["days_per_week"],
+                        seed=kwargs["seed"] + year,
+                    )
+                )
+                if kwargs["excel_dir"] is not None:
+                    path = kwargs["excel_dir"] / f"workouts-{year}.xlsx"
+                    synthetic.write_excel(path, rows)
+                    self.stdout.write(f"{path}: {len(rows)} sets")
+                if not kwargs["no_database"]:
+                    batch_size = kwargs["batch_size"]
+                    for i in range(0, len(rows), batch_size):
+                        with transaction.atomic():
+                            self.create_sets(rows[i : i + batch_size], exercise_ids)
+                n_sets += len(rows)
+            if not kwargs["no_database"]:
+                # Sets were inserted without signals, so derive data at once.
+                ExerciseRollup.objects.rebuild()
+                PersonalRecord.objects.rebuild()
+                with transaction.atomic():
+                    DataVersion.objects.bump()
+                    snapshots.schedule_refresh(exercise_ids.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {n_sets} sets of {len(exercises)} exercises over "
+                f"{kwargs['years']} years in {time.perf_counter() - start:.1f}s"
+            )
+        )
+
+    def create_exercises(
+        self, exercises: list[synthetic.SyntheticExercise]
+    ) -> dict[str, int]:
+        exercise_ids = {}
+        for exercise in exercises:
+            exercise_ids[exercise.code] = Exercise.objects.get_or_create(
+                code=exercise.code, defaults={"name": exercise.name}
+            )[0].id
+        return exercise_ids
+
+    def create_sets(self, rows, exercise_ids: dict[str, int]) -> None:
+        dates = {row.date for row in rows}
+        workouts = {
+            workout.date: workout for workout in Workout.objects.filter(date__in=dates)
+        }
+        new_workouts = Workout.objects.bulk_create(
+            Workout(date=date) for date in sorted(dates - workouts.keys())
+        )
+        workouts |= {workout.date: workout for workout in new_workouts}
+        SetOfExercise.objects.bulk_create(
+            SetOfExercise(
+                exercise_id=exercise_ids[row.code],
+                workout=workouts[row.date],
+                n_repetitions=row.n_repetitions,
+                weight=row.weight,
+                notes=row.notes,
+            )
+            for row in rows
+        )
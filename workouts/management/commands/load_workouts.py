@@ -1,17 +1,321 @@
+import contextlib
+import dataclasses
+import glob
+import json
+import multiprocessing
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from queue import Empty
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 
-from workouts.models import SetOfExercise
+from workouts import snapshots
+from workouts.imports import (
+    DEFAULT_CHUNK_SIZE,
+    SUPPORTED_SUFFIXES,
+    ParsedChunk,
+    RowError,
+    file_sha256,
+    iter_parsed_chunks,
+    source_of,
+)
+from workouts.models import ImportRun, SetOfExercise
+
+# Chunks parsed but not written yet, per parsing process. Workers wait for the
+# writer when the queue is full, so memory does not grow with the files.
+QUEUED_CHUNKS_PER_JOB = 2
+
+_queue = None
+
+
+def _init_worker(queue: multiprocessing.Queue) -> None:
+    global _queue
+    _queue = queue
+
+
+def _parse(path: Path, chunk_size: int) -> Iterator[tuple[str, Path, object]]:
+    """Parse a file chunk by chunk, then tell whether it was parsed entirely.
+
+    Events are `("chunk", path, ParsedChunk)`, then `("done", path, None)` or
+    `("failed", path, reason)`.
+    """
+    try:
+        for chunk in iter_parsed_chunks(path, chunk_size):
+            yield "chunk", path, chunk
+    except Exception as exc:
+        yield "failed", path, str(exc)
+    else:
+        yield "done", path, None
+
+
+def _parse_to_queue(path: Path, chunk_size: int) -> None:
+    for event in _parse(path, chunk_size):
+        _queue.put(event)
+
+
+def iter_parse_events(
+    files: list[Path], chunk_size: int, n_jobs: int
+) -> Iterator[tuple[str, Path, object]]:
+    """Parse files in `n_jobs` processes, yielding the events of `_parse`.
+
+    With a single job, files are parsed in this process, one after the other.
+    """
+    if n_jobs == 1:
+        for file in files:
+            yield from _parse(file, chunk_size)
+        return
+    queue = multiprocessing.Queue(maxsize=QUEUED_CHUNKS_PER_JOB * n_jobs)
+    with ProcessPoolExecutor(
+        max_workers=n_jobs, initializer=_init_worker, initargs=(queue,)
+    ) as executor:
+        futures = {
+            executor.submit(_parse_to_queue, file, chunk_size): file for file in files
+        }
+        pending = set(files)
+        try:
+            while pending:
+                try:
+                    event = queue.get(timeout=1)
+                except Empty:
+                    # A worker died without telling, e.g. killed by the system.
+                    for future, file in futures.items():
+                        if file in pending and future.done() and future.exception():
+                            pending.discard(file)
+                            yield "failed", file, str(future.exception())
+                    continue
+                if event[0] != "chunk":
+                    pending.discard(event[1])
+                yield event
+        finally:
+            # Unblock the workers waiting for room in the queue, if the writer
+            # stopped early, so that they can exit.
+            for future in futures:
+                future.cancel()
+            while not all(future.done() for future in futures):
+                with contextlib.suppress(Empty):
+                    queue.get(timeout=0.1)
+
+
+@dataclass
+class FileImport:
+    """Progress of the import of a file, whose chunks are written as they come."""
+
+    path: Path
+    n_rows: int = 0
+    n_valid_rows: int = 0
+    n_sets: int = 0
+    n_deleted_sets: int = 0
+    n_errors: int = 0
+    # Fingerprints of the valid rows, to delete the sets of the rows removed.
+    fingerprints: set[str] = field(default_factory=set)
+    # Kept only by dry runs, which report them all.
+    errors: list[RowError] = field(default_factory=list)
+    failure: str | None = None
+    parse_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+
+def expand_paths(paths: list[str]) -> list[Path]:
+    """Expand files, directories and glob patterns to the files to load."""
+    files = []
+    for path in paths:
+        if any(char in path for char in "*?["):
+            matches = [Path(match) for match in sorted(glob.glob(path, recursive=True))]
+        elif Path(path).is_dir():
+            matches = sorted(Path(path).iterdir())
+        else:
+            files.append(Path(path))
+            continue
+        files.extend(
+            match
+            for match in matches
+            if match.is_file() and match.suffix.lower() in SUPPORTED_SUFFIXES
+        )
+    return list(dict.fromkeys(files))
 
 
 class Command(BaseCommand):
-    help = "Load workouts from an Excel file"
+    help = (
+        "Load workouts from Excel or CSV files. "
+        "Files are parsed in parallel and written to the database by a single "
+        "writer, one chunk of rows at a time. Timings are printed for every "
+        "file, and not exposed on /metrics, which only covers the server."
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument("path", type=Path, help="Path to the Excel file")
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            help="Paths to Excel or CSV files, directories containing them, or globs",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Number of rows read and written at a time",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes parsing files in parallel",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help=(
+                "Only validate the files, without touching the database, "
+                "and print a JSON report of the invalid values"
+            ),
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Load files even if their content was already loaded",
+        )
 
     def handle(self, *args, **kwargs):
-        path = kwargs["path"]
-        SetOfExercise.objects.create_from_excel(path)
-        self.stdout.write(self.style.SUCCESS("Successfully loaded workouts"))
+        self.verbosity = kwargs["verbosity"]
+        files = expand_paths(kwargs["paths"])
+        if not files:
+            raise CommandError("No Excel or CSV files found.")
+        dry_run = kwargs["dry_run"]
+        hashes = {}
+        if not dry_run:
+            hashes = {file: file_sha256(file) for file in files}
+            if not kwargs["force"]:
+                imported = set(
+                    ImportRun.objects.filter(sha256__in=hashes.values()).values_list(
+                        "sha256", flat=True
+                    )
+                )
+                for file in files:
+                    if hashes[file] in imported:
+                        self.stdout.write(f"{file}: already loaded, skipped")
+                files = [file for file in files if hashes[file] not in imported]
+        n_jobs = max(1, min(kwargs["jobs"] or 1, len(files) or 1))
+        imports = {file: FileImport(path=file) for file in files}
+        n_failed_files = 0
+        n_sets = 0
+        # Refresh the snapshots once all the files are written, not every chunk.
+        with snapshots.deferred_refresh():
+            for kind, file, payload in iter_parse_events(
+                files, kwargs["chunk_size"], n_jobs
+            ):
+                file_import = imports[file]
+                if kind == "chunk":
+                    file_import.n_rows += payload.n_rows
+                    file_import.n_errors += len(payload.errors)
+                    file_import.parse_seconds += payload.parse_seconds
+                    if dry_run:
+                        file_import.errors.extend(payload.errors)
+                    else:
+                        self.write(file_import, payload)
+                elif kind == "failed":
+                    n_failed_files += 1
+                    file_import.failure = payload
+                    if not dry_run:
+                        self.report_failure(file_import)
+                elif not dry_run:
+                    n_sets += self.finish(file_import, hashes[file])
+        if dry_run:
+            self.stdout.write(
+                json.dumps(
+                    [self.dry_run_report(imports[file]) for file in sorted(files)],
+                    indent=2,
+                    default=str,
+                )
+            )
+            return
+        message = f"Loaded {n_sets} new sets from {len(files) - n_failed_files} files"
+        if n_failed_files:
+            self.stdout.write(
+                self.style.WARNING(f"{message}, {n_failed_files} files failed")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    def write(self, file_import: FileImport, chunk: ParsedChunk) -> None:
+        """Write a chunk of a file, in its own transaction."""
+        start = time.perf_counter()
+        created_objects = SetOfExercise.objects.create_from_rows(
+            chunk.rows, source_of(file_import.path)
+        )
+        file_import.fingerprints.update(row.fingerprint for row in chunk.rows)
+        seconds = time.perf_counter() - start
+        file_import.write_seconds += seconds
+        if seconds > settings.WORKOUTS_CHANGES_DELAY:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"{file_import.path}: a chunk took {seconds:.1f} s to write, "
+                    "longer than WORKOUTS_CHANGES_DELAY, so clients of the feed "
+                    "of changes may miss its sets: lower --chunk-size"
+                )
+            )
+        file_import.n_valid_rows += len(chunk.rows)
+        file_import.n_sets += len(created_objects["set_of_exercise"])
+        if self.verbosity > 1:
+            for error in chunk.errors:
+                self.stderr.write(
+                    f"{file_import.path}: skipped row {error.row} "
+                    f"because of {error.column}: {error.reason}"
+                )
+
+    def report_failure(self, file_import: FileImport) -> None:
+        message = f"{file_import.path}: could not be parsed because of: "
+        message += file_import.failure
+        if file_import.n_sets:
+            # Chunks are committed as they are written.
+            message += (
+                f", after loading {file_import.n_sets} sets, "
+                "which are skipped when loading it again"
+            )
+        self.stderr.write(message)
+
+    @staticmethod
+    def dry_run_report(file_import: FileImport) -> dict:
+        if file_import.failure is not None:
+            return {"path": str(file_import.path), "error": file_import.failure}
+        return {
+            "path": str(file_import.path),
+            "n_rows": file_import.n_rows,
+            "errors": [dataclasses.asdict(error) for error in file_import.errors],
+        }
+
+    def finish(self, file_import: FileImport, sha256: str) -> int:
+        """Record a file whose chunks were all written, and report its throughput.
+
+        Sets imported from the file before, whose rows were since edited or
+        removed, are deleted.
+        """
+        start = time.perf_counter()
+        file_import.n_deleted_sets = SetOfExercise.objects.delete_missing_rows(
+            source_of(file_import.path), file_import.fingerprints
+        )
+        file_import.write_seconds += time.perf_counter() - start
+        ImportRun.objects.update_or_create(
+            sha256=sha256,
+            defaults={
+                "path": str(file_import.path),
+                "n_rows": file_import.n_rows,
+                "n_created_sets": file_import.n_sets,
+            },
+        )
+        n_already_loaded = file_import.n_valid_rows - file_import.n_sets
+        total_seconds = file_import.parse_seconds + file_import.write_seconds
+        rows_per_second = file_import.n_rows / total_seconds if total_seconds else 0
+        self.stdout.write(
+            f"{file_import.path}: {file_import.n_sets} sets "
+            f"from {file_import.n_rows} rows, "
+            f"{n_already_loaded} already loaded, "
+            f"{file_import.n_deleted_sets} deleted, {file_import.n_errors} errors, "
+            f"parsed in {file_import.parse_seconds:.2f}s, "
+            f"written in {file_import.write_seconds:.2f}s "
+            f"({rows_per_second:.0f} rows/s)"
+        )
+        return file_import.n_sets
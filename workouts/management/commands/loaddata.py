@@ -0,0 +1,19 @@
+from django.core.management.commands import loaddata
+
+from workouts.models import ExerciseRollup, PersonalRecord, SetOfExercise, Workout
+
+
+class Command(loaddata.Command):
+    help = (
+        f"{loaddata.Command.help} "
+        "Rollups and personal records are rebuilt if sets or workouts are loaded, "
+        "as fixtures are saved without the signals that maintain them."
+    )
+
+    def loaddata(self, fixture_labels):
+        super().loaddata(fixture_labels)
+        # Loaded objects may replace others, of other exercises and dates, so
+        # rebuild everything, in the transaction of the load.
+        if self.models & {SetOfExercise, Workout}:
+            ExerciseRollup.objects.db_manager(self.using).rebuild()
+            PersonalRecord.objects.db_manager(self.using).rebuild()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from workouts.models import PersonalRecord
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the personal records of all exercises from scratch. "
+        "Needed after changing sets without their signals, e.g. with raw SQL or "
+        "by saving deserialized objects; loaddata rebuilds them itself."
+    )
+
+    def handle(self, *args, **kwargs):
+        PersonalRecord.objects.rebuild()
+        n_records = PersonalRecord.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {n_records} personal records"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from workouts.models import ExerciseRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the rollups of sets of exercises from scratch. "
+        "Needed after changing sets without their signals, e.g. with raw SQL or "
+        "by saving deserialized objects; loaddata rebuilds them itself."
+    )
+
+    def handle(self, *args, **kwargs):
+        ExerciseRollup.objects.rebuild()
+        n_rollups = ExerciseRollup.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {n_rollups} rollups"))
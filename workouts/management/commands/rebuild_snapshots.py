@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the memory-mapped snapshots of sets of exercises from scratch. "
+        "Needed only after changing sets without their signals, e.g. with raw SQL."
+    )
+
+    def handle(self, *args, **kwargs):
+        directory = snapshots.get_directory()
+        if directory is None:
+            raise CommandError("Snapshots are disabled: set WORKOUTS_SNAPSHOT_DIR.")
+        snapshots.write()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the snapshots in {directory}"))
@@ -0,0 +1,259 @@
+"""Metrics of requests, queries, reports and imports, in the Prometheus format.
+
+Metrics are kept in the memory of every process, and exposed by the
+`metrics` view, to staff users and to the `WORKOUTS_METRICS_ALLOWED_IPS`.
+Requests are measured by `workouts.middleware.MetricsMiddleware` and queries by
+a wrapper installed on every new database connection, which also logs a sample
+of the slow queries to the `workouts.slow_queries` logger if
+`WORKOUTS_SLOW_QUERY_SECONDS` is set.
+
+Imports run by management commands, like `load_workouts`, are measured in the
+memory of their own process, which is not the one serving `metrics`, so they
+are not exposed: the command reports its timings on its output instead.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+slow_query_logger = logging.getLogger("workouts.slow_queries")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if labels.keys() != set(self.label_names):
+            raise ValueError(f"{self.name} has labels {self.label_names}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            labels = dict(zip(self.label_names, key))
+            yield f"{self.name}{_format_labels(labels)} {value:g}"
+
+
+@dataclass
+class _HistogramValue:
+    bucket_counts: list[int]
+    sum: float = 0.0
+    count: int = 0
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = _HistogramValue([0] * len(self.buckets))
+            histogram = self._values[key]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram.bucket_counts[i] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            values = {
+                key: _HistogramValue(list(value.bucket_counts), value.sum, value.count)
+                for key, value in self._values.items()
+            }
+        for key, value in sorted(values.items()):
+            labels = dict(zip(self.label_names, key))
+            for bound, bucket_count in zip(self.buckets, value.bucket_counts):
+                bucket_labels = _format_labels(labels | {"le": f"{bound:g}"})
+                yield f"{self.name}_bucket{bucket_labels} {bucket_count}"
+            bucket_labels = _format_labels(labels | {"le": "+Inf"})
+            yield f"{self.name}_bucket{bucket_labels} {value.count}"
+            yield f"{self.name}_sum{_format_labels(labels)} {value.sum:g}"
+            yield f"{self.name}_count{_format_labels(labels)} {value.count}"
+
+
+REGISTRY: list[Metric] = []
+
+REQUEST_SECONDS = Histogram(
+    "workouts_request_duration_seconds",
+    "Time to answer requests, by view.",
+    ["view", "method"],
+)
+REQUEST_QUERIES = Histogram(
+    "workouts_request_queries",
+    "Number of SQL queries of requests, by view.",
+    ["view", "method"],
+    buckets=COUNT_BUCKETS,
+)
+REQUEST_QUERY_SECONDS = Histogram(
+    "workouts_request_query_duration_seconds",
+    "Time spent in SQL queries by requests, by view.",
+    ["view", "method"],
+)
+RESPONSE_BYTES = Histogram(
+    "workouts_response_size_bytes",
+    "Size of the content of responses, by view.",
+    ["view", "method"],
+    buckets=SIZE_BUCKETS,
+)
+RESPONSES = Counter(
+    "workouts_responses_total",
+    "Number of responses, by view and status code.",
+    ["view", "method", "status"],
+)
+REPORT_SECONDS = Histogram(
+    "workouts_report_duration_seconds",
+    "Time to get reports, by periodicity and whether they were cached.",
+    ["periodicity", "per_exercise", "cache"],
+)
+IMPORT_SECONDS = Histogram(
+    "workouts_import_duration_seconds",
+    "Time to import sets, by source and number of rows.",
+    ["source", "rows"],
+    buckets=LATENCY_BUCKETS + (30, 60, 300),
+)
+IMPORTED_ROWS = Counter(
+    "workouts_imported_rows_total", "Number of rows imported, by source.", ["source"]
+)
+SLOW_QUERIES = Counter(
+    "workouts_slow_queries_total",
+    "Number of queries slower than WORKOUTS_SLOW_QUERY_SECONDS.",
+)
+
+
+def render() -> str:
+    """Return all the metrics in the Prometheus text format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+def reset() -> None:
+    for metric in REGISTRY:
+        metric.reset()
+
+
+def rows_class(n_rows: int) -> str:
+    """Order of magnitude of a number of rows, as a label of few values."""
+    for bound in [100, 1000, 10_000, 100_000]:
+        if n_rows < bound:
+            return f"<{bound}"
+    return ">=100000"
+
+
+@dataclass
+class ImportTimer:
+    n_rows: int = 0
+
+
+@contextmanager
+def time_import(source: str) -> Iterator[ImportTimer]:
+    """Time a successful import; set `n_rows` of the yielded timer to label it."""
+    timer = ImportTimer()
+    start = time.perf_counter()
+    yield timer
+    IMPORT_SECONDS.observe(
+        time.perf_counter() - start, source=source, rows=rows_class(timer.n_rows)
+    )
+    IMPORTED_ROWS.inc(timer.n_rows, source=source)
+
+
+@dataclass
+class QueryStats:
+    """Queries run while handling a request, in any thread."""
+
+    n_queries: int = 0
+    seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.n_queries += 1
+            self.seconds += seconds
+
+
+# Context variables are copied to the threads running sync code for async
+# views, so their queries are counted too.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execution wrapper counting and timing queries, logging slow ones."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.add(seconds)
+        threshold = settings.WORKOUTS_SLOW_QUERY_SECONDS
+        if threshold is not None and seconds >= threshold:
+            SLOW_QUERIES.inc()
+            if random.random() < settings.WORKOUTS_SLOW_QUERY_SAMPLE_RATE:
+                slow_query_logger.warning(
+                    "Slow query (%.3fs): %s",
+                    seconds,
+                    sql,
+                    extra={"duration": seconds, "sql": sql},
+                )
@@ -0,0 +1,120 @@
+"""Measure the requests served by the views, see `workouts.metrics`."""
+
+import time
+from collections.abc import AsyncIterator, Iterator
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponseBase
+
+from . import metrics
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class MetricsMiddleware:
+    """Record the latency, SQL queries and response size of every request.
+
+    Requests are labelled with the name of their view, so that the labels are
+    few. Streaming responses are measured when their content is exhausted,
+    including the queries run while it is generated.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        stats = metrics.QueryStats()
+        token = metrics.current_query_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_query_stats.reset(token)
+        return self.measure(request, response, start, stats)
+
+    async def __acall__(self, request: HttpRequest):
+        start = time.perf_counter()
+        stats = metrics.QueryStats()
+        token = metrics.current_query_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_query_stats.reset(token)
+        return self.measure(request, response, start, stats)
+
+    def measure(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+        start: float,
+        stats: metrics.QueryStats,
+    ) -> HttpResponseBase:
+        labels = {
+            "view": (
+                request.resolver_match.view_name
+                if request.resolver_match is not None
+                else "<unresolved>"
+            ),
+            "method": request.method if request.method in METHODS else "other",
+        }
+
+        def observe(size: int) -> None:
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, **labels)
+            metrics.REQUEST_QUERIES.observe(stats.n_queries, **labels)
+            metrics.REQUEST_QUERY_SECONDS.observe(stats.seconds, **labels)
+            metrics.RESPONSE_BYTES.observe(size, **labels)
+            metrics.RESPONSES.inc(status=str(response.status_code), **labels)
+
+        if not response.streaming:
+            observe(len(response.content))
+        elif response.is_async:
+            response.streaming_content = self.ameasure_stream(
+                response.streaming_content, stats, observe
+            )
+        else:
+            response.streaming_content = self.measure_stream(
+                response.streaming_content, stats, observe
+            )
+        return response
+
+    def measure_stream(
+        self, chunks: Iterator[bytes], stats: metrics.QueryStats, observe
+    ) -> Iterator[bytes]:
+        size = 0
+        chunks = iter(chunks)
+        while True:
+            token = metrics.current_query_stats.set(stats)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                metrics.current_query_stats.reset(token)
+            size += len(chunk)
+            yield chunk
+        observe(size)
+
+    async def ameasure_stream(
+        self, chunks: AsyncIterator[bytes], stats: metrics.QueryStats, observe
+    ) -> AsyncIterator[bytes]:
+        size = 0
+        chunks = aiter(chunks)
+        while True:
+            token = metrics.current_query_stats.set(stats)
+            try:
+                chunk = await anext(chunks)
+            except StopAsyncIteration:
+                break
+            finally:
+                metrics.current_query_stats.reset(token)
+            size += len(chunk)
+            yield chunk
+        observe(size)
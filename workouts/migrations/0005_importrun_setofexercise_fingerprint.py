@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_setofexercise_volume_alter_setofexercise_weight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Path of the imported file', max_length=1000)),
+                ('sha256', models.CharField(help_text='Hash of the content of the file', max_length=64, unique=True)),
+                ('n_rows', models.PositiveIntegerField(verbose_name='Number of rows')),
+                ('n_created_sets', models.PositiveIntegerField(verbose_name='Number of created sets')),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='setofexercise',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Fingerprint of the imported row this set was created from', max_length=64, null=True, unique=True),
+        ),
+    ]
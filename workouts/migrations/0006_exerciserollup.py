@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    ExerciseRollup = apps.get_model('workouts', 'ExerciseRollup')
+    SetOfExercise = apps.get_model('workouts', 'SetOfExercise')
+    db_alias = schema_editor.connection.alias
+    for period in ['day', 'week', 'month', 'year']:
+        aggregated_sets = (
+            SetOfExercise.objects.using(db_alias)
+            .values(
+                'exercise',
+                period_start_date=models.functions.Trunc(
+                    'workout__date', period, output_field=models.DateField()
+                ),
+            )
+            .annotate(
+                n_workouts=models.Count('workout', distinct=True),
+                n_sets=models.Count('id'),
+                total_repetitions=models.Sum('n_repetitions'),
+                max_repetitions=models.Max('n_repetitions'),
+                min_repetitions=models.Min('n_repetitions'),
+                total_weight=models.Sum('weight'),
+                max_weight=models.Max('weight'),
+                min_weight=models.Min('weight'),
+                total_volume=models.Sum('volume'),
+                max_volume=models.Max('volume'),
+                min_volume=models.Min('volume'),
+            )
+            .order_by()
+        )
+        ExerciseRollup.objects.using(db_alias).bulk_create(
+            [
+                ExerciseRollup(
+                    period=period,
+                    exercise_id=row.pop('exercise'),
+                    start_date=row.pop('period_start_date'),
+                    **row,
+                )
+                for row in aggregated_sets.iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0005_importrun_setofexercise_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month'), ('year', 'Year')], max_length=5)),
+                ('start_date', models.DateField(help_text='First day of the period')),
+                ('n_workouts', models.PositiveIntegerField(verbose_name='Number of workouts')),
+                ('n_sets', models.PositiveIntegerField(verbose_name='Number of sets')),
+                ('total_repetitions', models.PositiveIntegerField()),
+                ('max_repetitions', models.PositiveSmallIntegerField()),
+                ('min_repetitions', models.PositiveSmallIntegerField()),
+                ('total_weight', models.DecimalField(decimal_places=1, max_digits=15)),
+                ('max_weight', models.DecimalField(decimal_places=1, max_digits=6)),
+                ('min_weight', models.DecimalField(decimal_places=1, max_digits=6)),
+                ('total_volume', models.DecimalField(decimal_places=1, max_digits=15)),
+                ('max_volume', models.DecimalField(decimal_places=1, max_digits=10)),
+                ('min_volume', models.DecimalField(decimal_places=1, max_digits=10)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workouts.exercise')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'start_date', 'exercise'), name='unique_rollup')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:25
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractMonth, ExtractWeek, ExtractYear
+
+BATCH_SIZE = 10000
+
+
+def copy_workout_dates(apps, schema_editor):
+    SetOfExercise = apps.get_model('workouts', 'SetOfExercise')
+    Workout = apps.get_model('workouts', 'Workout')
+    sets = SetOfExercise.objects.using(schema_editor.connection.alias)
+    bounds = sets.aggregate(min_id=models.Min('id'), max_id=models.Max('id'))
+    if bounds['min_id'] is None:
+        return
+    for start in range(bounds['min_id'], bounds['max_id'] + 1, BATCH_SIZE):
+        batch = sets.filter(id__gte=start, id__lt=start + BATCH_SIZE)
+        batch.update(
+            workout_date=models.Subquery(
+                Workout.objects.filter(pk=models.OuterRef('workout')).values('date')[:1]
+            )
+        )
+        batch.update(
+            workout_year=ExtractYear('workout_date'),
+            workout_month=ExtractMonth('workout_date'),
+            workout_week=ExtractWeek('workout_date'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='setofexercise',
+            name='workout_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='setofexercise',
+            name='workout_year',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='setofexercise',
+            name='workout_month',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='setofexercise',
+            name='workout_week',
+            field=models.PositiveSmallIntegerField(editable=False, help_text='ISO week number', null=True),
+        ),
+        migrations.RunPython(copy_workout_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='setofexercise',
+            name='workout_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='setofexercise',
+            name='workout_year',
+            field=models.PositiveSmallIntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='setofexercise',
+            name='workout_month',
+            field=models.PositiveSmallIntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='setofexercise',
+            name='workout_week',
+            field=models.PositiveSmallIntegerField(editable=False, help_text='ISO week number'),
+        ),
+        migrations.AddIndex(
+            model_name='setofexercise',
+            index=models.Index(fields=['workout_date', 'exercise'], name='set_date_exercise_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='setofexercise',
+            index=models.Index(fields=['exercise', 'workout_date'], name='set_exercise_date_idx'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:23
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Kinds of records, with the repetitions of the sets they rank, as of this
+# migration.
+RECORD_KINDS = {
+    'weight': (None, None),
+    'volume': (None, None),
+    'estimated_1rm': (None, None),
+    'weight_low': (1, 5),
+    'weight_medium': (6, 10),
+    'weight_high': (11, 15),
+    'weight_very_high': (16, None),
+}
+
+
+def get_metric(kind):
+    if kind == 'volume':
+        return models.F('volume')
+    if kind == 'estimated_1rm':
+        weight = models.functions.Cast('weight', models.FloatField())
+        repetitions = models.functions.Cast('n_repetitions', models.FloatField())
+        return models.Case(
+            models.When(n_repetitions=1, then=weight),
+            default=weight * (1 + repetitions / 30),
+            output_field=models.FloatField(),
+        )
+    return models.F('weight')
+
+
+def get_value(kind, set_):
+    weight = Decimal(set_.weight)
+    if kind == 'volume':
+        return weight * set_.n_repetitions
+    if kind == 'estimated_1rm' and set_.n_repetitions > 1:
+        return (weight * (1 + Decimal(set_.n_repetitions) / 30)).quantize(
+            Decimal('0.1')
+        )
+    return weight
+
+
+def build_personal_records(apps, schema_editor):
+    PersonalRecord = apps.get_model('workouts', 'PersonalRecord')
+    SetOfExercise = apps.get_model('workouts', 'SetOfExercise')
+    db_alias = schema_editor.connection.alias
+    new_records = []
+    for kind, (low, high) in RECORD_KINDS.items():
+        sets = SetOfExercise.objects.using(db_alias)
+        if low is not None:
+            sets = sets.filter(n_repetitions__gte=low)
+        if high is not None:
+            sets = sets.filter(n_repetitions__lte=high)
+        best_sets = sets.annotate(
+            metric=get_metric(kind),
+            rank=models.Window(
+                models.functions.RowNumber(),
+                partition_by='exercise',
+                order_by=[models.F('metric').desc(), 'workout_date', 'id'],
+            ),
+        ).filter(rank=1)
+        new_records.extend(
+            PersonalRecord(
+                exercise_id=set_.exercise_id,
+                kind=kind,
+                value=get_value(kind, set_),
+                set_of_exercise=set_,
+            )
+            for set_ in best_sets
+        )
+    PersonalRecord.objects.using(db_alias).bulk_create(new_records, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_setofexercise_workout_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('weight', 'Heaviest weight'), ('volume', 'Best volume'), ('estimated_1rm', 'Best estimated one-rep max'), ('weight_low', 'Heaviest weight, low repetitions'), ('weight_medium', 'Heaviest weight, medium repetitions'), ('weight_high', 'Heaviest weight, high repetitions'), ('weight_very_high', 'Heaviest weight, very high repetitions')], max_length=20)),
+                ('value', models.DecimalField(decimal_places=1, help_text='Kilograms, or volume', max_digits=10)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workouts.exercise')),
+                ('set_of_exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workouts.setofexercise')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exercise', 'kind'), name='unique_personal_record')],
+            },
+        ),
+        migrations.RunPython(build_personal_records, migrations.RunPython.noop),
+    ]
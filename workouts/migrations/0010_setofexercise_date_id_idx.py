@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_personalrecord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='setofexercise',
+            index=models.Index(fields=['workout_date', 'id'], name='set_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_setofexercise_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='setofexercise',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('exercise', 'Exercise'), ('workout', 'Workout'), ('set_of_exercise', 'Set Of Exercise')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('modified', models.DateTimeField(auto_now_add=True, help_text='When the object was deleted')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['modified', 'id'], name='tombstone_modified_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['modified', 'id'], name='exercise_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='setofexercise',
+            index=models.Index(fields=['modified', 'id'], name='set_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['modified', 'id'], name='workout_modified_idx'),
+        ),
+    ]
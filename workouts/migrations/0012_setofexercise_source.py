@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_modified_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='setofexercise',
+            name='source',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Path of the file this set was imported from', max_length=1000, null=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def record_imported_rows(apps, schema_editor):
+    ImportedRow = apps.get_model('workouts', 'ImportedRow')
+    SetOfExercise = apps.get_model('workouts', 'SetOfExercise')
+    db_alias = schema_editor.connection.alias
+    imported_sets = (
+        SetOfExercise.objects.using(db_alias)
+        .filter(source__isnull=False)
+        .values_list('pk', 'source')
+    )
+    ImportedRow.objects.using(db_alias).bulk_create(
+        (
+            ImportedRow(source=source, set_of_exercise_id=pk)
+            for pk, source in imported_sets.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0012_setofexercise_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Path of the imported file', max_length=1000)),
+                ('set_of_exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imported_rows', to='workouts.setofexercise')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'set_of_exercise'), name='unique_imported_row')],
+            },
+        ),
+        migrations.RunPython(record_imported_rows, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='setofexercise',
+            name='source',
+        ),
+    ]
@@ -1,28 +1,39 @@
 import calendar
 import datetime
+import logging
 import re
+import threading
+import uuid
 from collections import defaultdict
+from collections.abc import Iterable
+from decimal import Decimal
 from enum import StrEnum
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from django.core.validators import RegexValidator
-from django.db import models
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, models, transaction
+from django.utils import timezone
 
-validator_only_latin_letters = RegexValidator(
-    r"^[a-zA-Z]*$", message="Only latin letters are allowed."
-)
-validator_latin_words_single_spaces = RegexValidator(
-    r"^[a-zA-Z]+(?: [a-zA-Z]+)*$",
-    message="Only latin letters and single spaces are allowed, no trailing spaces.",
+from . import imports, metrics
+from .signals import bulk_updated, sets_bulk_created, sets_bulk_deleted
+from .validators import (
+    validator_latin_words_single_spaces,
+    validator_only_latin_letters,
 )
 
+import_logger = logging.getLogger("workouts.imports")
+
 
 def get_start_end_dates_from_period(
     center: datetime.date, period: str
 ) -> tuple[datetime.date, datetime.date]:
     """Returns start and end dates of a period of time, given a center date."""
     match period:
+        case "day":
+            start_date = end_date = center
         case "week":
             start_date = center - datetime.timedelta(days=center.weekday())
             end_date = start_date + datetime.timedelta(days=6)
@@ -38,6 +49,150 @@ def get_start_end_dates_from_period(
     return (start_date, end_date)
 
 
+class ExerciseCache:
+    """Exercises by lowercased code and name, cached in this process.
+
+    The whole table is loaded in a single query, and reloaded when its version
+    in the `WORKOUTS_EXERCISE_CACHE` cache, shared by the workers, changes.
+    Writes to exercises change the version, which is read on every `get`: use a
+    file cache, which costs a stat and a small read, as a database cache costs
+    a query.
+    As the version may reach this process late, or be lost with the cache,
+    callers reload the exercises before deciding that one does not exist.
+    Exercises written by a transaction that is not committed yet are not
+    cached, as it may be rolled back. Cached exercises are shared: do not modify
+    them.
+    """
+
+    version_key = "workouts:exercises:version"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._exercises = None
+        self._uncommitted = threading.local()
+
+    @staticmethod
+    def _shared_cache():
+        return caches[settings.WORKOUTS_EXERCISE_CACHE]
+
+    def get(
+        self, queryset: models.QuerySet, reload: bool = False
+    ) -> dict[str, "Exercise"]:
+        """Return the cached exercises, loading them if needed or if `reload`."""
+        version = self._shared_cache().get(self.version_key)
+        with self._lock:
+            if not reload and self._exercises is not None and self._version == version:
+                return self._exercises
+        exercises = {}
+        all_exercises = list(queryset)
+        # Codes win over names that spell the same.
+        for exercise in all_exercises:
+            exercises[exercise.name.lower()] = exercise
+        for exercise in all_exercises:
+            exercises[exercise.code.lower()] = exercise
+        if not self._has_uncommitted_writes():
+            with self._lock:
+                self._exercises, self._version = exercises, version
+        return exercises
+
+    def _has_uncommitted_writes(self) -> bool:
+        if getattr(self._uncommitted, "writes", False):
+            if transaction.get_connection().in_atomic_block:
+                return True
+            # The transaction ended without a commit.
+            self._uncommitted.writes = False
+        return False
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._exercises = None
+        self._shared_cache().set(self.version_key, uuid.uuid4().hex, timeout=None)
+        if transaction.get_connection().in_atomic_block:
+            self._uncommitted.writes = True
+            transaction.on_commit(self._invalidate_committed)
+
+    def _invalidate_committed(self) -> None:
+        self._uncommitted.writes = False
+        self.invalidate()
+
+
+class ModifiedQuerySet(models.QuerySet):
+    """Queryset of a model with a `modified` timestamp, updated in bulk too.
+
+    `update` sends `bulk_updated`, as it does not send `post_save`, so that the
+    data derived from the updated rows is kept in sync with them.
+    """
+
+    # Fields of the updated rows, before and after the update, sent to
+    # `bulk_updated`.
+    tracked_fields = ()
+
+    def update(self, **kwargs) -> int:
+        kwargs.setdefault("modified", timezone.now())
+        fields = ("pk", *self.tracked_fields)
+        with transaction.atomic(using=self.db):
+            previous = list(self.values(*fields))
+            n_updated = super().update(**kwargs)
+            if not previous:
+                return n_updated
+            updated = previous
+            if self.tracked_fields:
+                pks = [row["pk"] for row in previous]
+                rows = self.model._base_manager.using(self.db)
+                updated = []
+                # Keep the number of query parameters below the limits of SQLite.
+                for start in range(0, len(pks), 1000):
+                    updated.extend(
+                        rows.filter(pk__in=pks[start : start + 1000]).values(*fields)
+                    )
+            bulk_updated.send(
+                sender=self.model,
+                previous=previous,
+                updated=updated,
+                fields=set(kwargs),
+            )
+        return n_updated
+
+    update.alters_data = True
+
+
+class ExerciseManager(models.Manager):
+    cache = ExerciseCache()
+
+    def resolve(self, code: str) -> "Exercise":
+        """Return the exercise with a code, or name, in any case, from the cache.
+
+        Raise `Exercise.DoesNotExist` if there is none.
+        """
+        exercises = self.cache.get(self.all())
+        if code.lower() not in exercises:
+            # Another process may have created it: check the database.
+            exercises = self.cache.get(self.all(), reload=True)
+        try:
+            return exercises[code.lower()]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                f"No exercise has code or name {code!r}."
+            ) from None
+
+    def resolve_many(self, codes: Iterable[str]) -> dict[str, "Exercise"]:
+        """Return the exercises with some codes, or names, by lowercased code.
+
+        Codes without an exercise are left out.
+        """
+        codes = {code.lower() for code in codes}
+        exercises = self.cache.get(self.all())
+        if not codes <= exercises.keys():
+            # Another process may have created them: check the database.
+            exercises = self.cache.get(self.all(), reload=True)
+        return {code: exercises[code] for code in codes if code in exercises}
+
+    def invalidate_cache(self) -> None:
+        """Reload the exercises in every process, after writing them in bulk."""
+        self.cache.invalidate()
+
+
 class Exercise(models.Model):
     code = models.CharField(
         max_length=5, unique=True, validators=[validator_only_latin_letters]
@@ -46,6 +201,9 @@ class Exercise(models.Model):
         max_length=25, unique=True, validators=[validator_latin_words_single_spaces]
     )
     description = models.TextField(max_length=1000, null=True, blank=True)
+    modified = models.DateTimeField(auto_now=True, editable=False)
+
+    objects = ExerciseManager.from_queryset(ModifiedQuerySet)()
 
     class Meta:
         constraints = [
@@ -53,34 +211,126 @@ class Exercise(models.Model):
             models.UniqueConstraint(models.functions.Lower("name"), name="unique_name"),
             models.UniqueConstraint(fields=["code", "name"], name="unique_exercise"),
         ]
+        indexes = [
+            models.Index(fields=["modified", "id"], name="exercise_modified_idx")
+        ]
 
     def __str__(self) -> str:
         return f"{self.code}: {self.name}"
 
 
+class WorkoutQuerySet(ModifiedQuerySet):
+    tracked_fields = ("date",)
+
+    def with_statistics(self) -> models.QuerySet:
+        """Annotate the statistics of the sets of every workout.
+
+        Statistics are computed in the same grouped query that fetches the
+        workouts, so listing them costs a single query, however many they are.
+        Workouts without sets have no volume and no repetitions.
+        """
+        return self.annotate(
+            n_exercises=models.Count("setofexercise__exercise", distinct=True),
+            n_sets=models.Count("setofexercise"),
+            total_volume=models.Sum("setofexercise__volume"),
+            total_repetitions=models.Sum("setofexercise__n_repetitions"),
+        )
+
+
 class Workout(models.Model):
     date = models.DateField()
+    modified = models.DateTimeField(auto_now=True, editable=False)
+
+    objects = WorkoutQuerySet.as_manager()
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=["date"], name="unique_date")]
+        indexes = [models.Index(fields=["modified", "id"], name="workout_modified_idx")]
 
     def __str__(self) -> str:
         return f"{self.date}"
 
     @property
     def n_different_exercises(self) -> int:
+        """Number of exercises of the workout, annotated by `with_statistics`."""
+        if hasattr(self, "n_exercises"):
+            return self.n_exercises
         return self.setofexercise_set.values("exercise").distinct().count()
 
 
 class SetOfExerciseManager(models.Manager):
-    def create_from_excel(self, path: Path) -> dict[str, list[int]]:
-        """Create a set of exercises from an Excel file."""
-        df = pd.read_excel(path)
+    def create_from_excel(self, path: Path, bulk: bool = True) -> dict[str, list[int]]:
+        """Create a set of exercises from an Excel file.
+
+        With `bulk=True` (the default) exercises and workouts are resolved with
+        set-based queries and all sets are inserted in a single transaction.
+        With `bulk=False` every row is created on its own, one after the other.
+        Invalid rows are skipped, and logged to the `workouts.imports` logger.
+        """
+        with metrics.time_import("excel" if bulk else "excel_per_row") as timer:
+            df = pd.read_excel(path)
+            timer.n_rows = len(df)
+            if bulk:
+                return self._bulk_create_from_dataframe(df)
+            return self._create_from_dataframe_per_row(df)
+
+    def create_from_file(
+        self,
+        path: Path,
+        chunk_size: int = imports.DEFAULT_CHUNK_SIZE,
+        force: bool = False,
+    ) -> dict[str, list[int]]:
+        """Create sets of exercises from an Excel or CSV file, streaming its rows.
+
+        Rows are read `chunk_size` at a time, and every chunk is imported in its
+        own transaction before the next one is read, so memory usage does not
+        grow with the size of the file.
+
+        Imports are idempotent: a file whose content was already imported is
+        skipped, unless `force` is given, and rows whose fingerprint is already
+        in the database are not imported again. Invalid rows are skipped, and
+        logged to the `workouts.imports` logger.
+
+        Once the whole file is imported, the sets imported from it before whose
+        rows were since edited or removed are deleted, see `delete_missing_rows`,
+        and the snapshots of the exercises it touched are refreshed.
+        """
+        from . import snapshots  # Imports the models.
+
+        created_objects = defaultdict(list)
+        chunks = imports.iter_chunks(path, chunk_size)
+        sha256 = imports.file_sha256(path)
+        if not force and ImportRun.objects.filter(sha256=sha256).exists():
+            return created_objects
+        source = imports.source_of(path)
+        fingerprints = imports.RowFingerprints()
+        n_rows = 0
+        with snapshots.deferred_refresh():
+            with metrics.time_import("file") as timer:
+                for chunk in chunks:
+                    n_rows += len(chunk)
+                    for key, pks in self._bulk_create_from_dataframe(
+                        chunk, fingerprints, source
+                    ).items():
+                        created_objects[key].extend(pks)
+                timer.n_rows = n_rows
+            self.delete_missing_rows(source, fingerprints.seen)
+        ImportRun.objects.update_or_create(
+            sha256=sha256,
+            defaults={
+                "path": str(path),
+                "n_rows": n_rows,
+                "n_created_sets": len(created_objects["set_of_exercise"]),
+            },
+        )
+        return created_objects
+
+    def _create_from_dataframe_per_row(self, df: pd.DataFrame) -> dict[str, list[int]]:
         created_objects = defaultdict(list)
         for id_row, row in df.iterrows():
             try:
                 try:
-                    exercise = Exercise.objects.get(code__iexact=row["Exercise"])
+                    exercise = Exercise.objects.resolve(row["Exercise"])
                 except Exercise.DoesNotExist:
                     exercise = Exercise.objects.create(
                         code=row["Exercise"], name=row["Exercise"]
@@ -100,14 +350,288 @@ class SetOfExerciseManager(models.Manager):
                 )
                 created_objects["set_of_exercise"].append(set_exercise.pk)
             except Exception as exc:
-                print(f"Skipping row {id_row} because of: {exc}")
+                import_logger.warning(
+                    "Skipping row %s because of: %s",
+                    imports.spreadsheet_row(id_row),
+                    exc,
+                )
         return created_objects
 
+    def _bulk_create_from_dataframe(
+        self,
+        df: pd.DataFrame,
+        fingerprints: imports.RowFingerprints | None = None,
+        source: str | None = None,
+    ) -> dict[str, list[int]]:
+        rows, errors = imports.parse_dataframe(df, fingerprints)
+        for error in errors:
+            import_logger.warning(
+                "Skipping row %s because of %s: %s",
+                error.row,
+                error.column,
+                error.reason,
+            )
+        return self._create_from_rows_atomic(rows, source)
+
+    def create_from_rows(
+        self, rows: list[imports.Row], source: str | None = None
+    ) -> dict[str, list[int]]:
+        """Create sets of exercises from parsed rows, in a single transaction.
+
+        Exercises and workouts are resolved with set-based queries, missing ones
+        are created in bulk, and all sets are inserted with `bulk_create`.
+        Rows with a fingerprint that is already in the database are skipped.
+        Rows with a fingerprint are recorded as imported from `source`, the file
+        they were read from, including those skipped, see `ImportedRow`.
+        """
+        with metrics.time_import("rows") as timer:
+            timer.n_rows = len(rows)
+            return self._create_from_rows_atomic(rows, source)
+
+    def _create_from_rows_atomic(
+        self, rows: list[imports.Row], source: str | None
+    ) -> dict[str, list[int]]:
+        created_objects = defaultdict(list)
+        with transaction.atomic(using=self.db):
+            imported_sets = self._get_imported_sets(rows)
+            new_rows = [row for row in rows if row.fingerprint not in imported_sets]
+            if new_rows:
+                for set_ in self._create_from_rows(new_rows, created_objects):
+                    if set_.fingerprint is not None:
+                        imported_sets[set_.fingerprint] = set_.pk
+            if source is not None:
+                ImportedRow.objects.using(self.db).bulk_create(
+                    [
+                        ImportedRow(source=source, set_of_exercise_id=pk)
+                        for pk in imported_sets.values()
+                    ],
+                    ignore_conflicts=True,
+                )
+        return created_objects
+
+    def delete_missing_rows(self, source: str, fingerprints: set[str]) -> int:
+        """Delete the sets imported from a file whose rows are no longer in it.
+
+        `fingerprints` are those of all the rows of the file, as it is now: a
+        row that was edited has a new fingerprint, so the set of its previous
+        version is deleted. Sets whose row is still in another imported file
+        are kept. Sets are deleted in bulk, in a transaction per batch to keep
+        transactions shorter than `WORKOUTS_CHANGES_DELAY`, and the data derived
+        from them is updated once per batch, see `sets_bulk_deleted`.
+        Return the number of deleted sets.
+        """
+        stale = [
+            (pk, set_pk)
+            for pk, set_pk, fingerprint in ImportedRow.objects.using(self.db)
+            .filter(source=source)
+            .values_list("pk", "set_of_exercise", "set_of_exercise__fingerprint")
+            .iterator()
+            if fingerprint not in fingerprints
+        ]
+        n_deleted = 0
+        # Keep the number of query parameters below the limits of SQLite.
+        for start in range(0, len(stale), 1000):
+            pks, set_pks = zip(*stale[start : start + 1000])
+            with transaction.atomic(using=self.db):
+                ImportedRow.objects.using(self.db).filter(pk__in=pks).delete()
+                deleted = list(
+                    self.filter(pk__in=set_pks, imported_rows__isnull=True).values(
+                        "pk", "exercise", "workout_date"
+                    )
+                )
+                if not deleted:
+                    continue
+                deleted_pks = [row["pk"] for row in deleted]
+                PersonalRecord.objects.using(self.db).filter(
+                    set_of_exercise__in=deleted_pks
+                ).delete()
+                # `QuerySet.delete` would send `post_delete` for every set.
+                placeholders = ", ".join(["%s"] * len(deleted_pks))
+                with connections[self.db].cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {self.model._meta.db_table} "
+                        f"WHERE id IN ({placeholders})",
+                        deleted_pks,
+                    )
+                sets_bulk_deleted.send(sender=self.model, deleted=deleted)
+            n_deleted += len(deleted)
+        return n_deleted
+
+    def log_workout(
+        self, date: datetime.date, sets: list[dict]
+    ) -> tuple["Workout", list["SetOfExercise"]]:
+        """Get or create the workout of a date and add sets to it, atomically.
+
+        `sets` are the field values of the new sets, with their exercise
+        already resolved. All sets are inserted with a single `bulk_create`.
+        """
+        with metrics.time_import("log_workout") as timer:
+            timer.n_rows = len(sets)
+            with transaction.atomic(using=self.db):
+                workout, _ = Workout.objects.get_or_create(date=date)
+                created_sets = self.bulk_create(
+                    [self.model(workout=workout, **values) for values in sets]
+                )
+                sets_bulk_created.send(sender=self.model, sets=created_sets)
+        return workout, created_sets
+
+    def _get_imported_sets(self, rows: list[imports.Row]) -> dict[str, int]:
+        """Return the primary keys of the sets of rows already imported."""
+        fingerprints = [row.fingerprint for row in rows if row.fingerprint]
+        imported_sets = {}
+        # Keep the number of query parameters below the limits of SQLite.
+        for start in range(0, len(fingerprints), 1000):
+            imported_sets.update(
+                self.filter(
+                    fingerprint__in=fingerprints[start : start + 1000]
+                ).values_list("fingerprint", "pk")
+            )
+        return imported_sets
+
+    def _create_from_rows(
+        self,
+        rows: list[imports.Row],
+        created_objects: dict[str, list[int]],
+    ) -> list["SetOfExercise"]:
+        # The first spelling of a code wins, like in the row by row import.
+        codes = {}
+        for row in rows:
+            codes.setdefault(row.code.lower(), row.code)
+        dates = {row.date for row in rows}
+
+        def get_workouts() -> dict[datetime.date, Workout]:
+            return {
+                workout.date: workout
+                for workout in Workout.objects.filter(date__in=dates)
+            }
+
+        exercises = Exercise.objects.resolve_many(codes)
+        new_exercises = [
+            Exercise(code=code, name=code)
+            for code_lower, code in codes.items()
+            if code_lower not in exercises
+        ]
+        if new_exercises:
+            Exercise.objects.bulk_create(new_exercises)
+            Exercise.objects.invalidate_cache()
+            # Re-fetch, not every backend sets primary keys on bulk inserts.
+            created_exercises = Exercise.objects.annotate(
+                code_lower=models.functions.Lower("code")
+            ).filter(
+                code_lower__in=[exercise.code.lower() for exercise in new_exercises]
+            )
+            for exercise in created_exercises:
+                exercises[exercise.code_lower] = exercise
+                created_objects["exercise"].append(exercise.pk)
+        workouts = get_workouts()
+        new_workouts = [Workout(date=date) for date in dates - workouts.keys()]
+        if new_workouts:
+            Workout.objects.bulk_create(new_workouts)
+            workouts_before, workouts = workouts, get_workouts()
+            created_objects["workout"].extend(
+                workout.pk
+                for date, workout in workouts.items()
+                if date not in workouts_before
+            )
+        sets = self.bulk_create(
+            [
+                self.model(
+                    exercise=exercises[row.code.lower()],
+                    workout=workouts[row.date],
+                    n_repetitions=row.n_repetitions,
+                    weight=row.weight,
+                    notes=row.notes,
+                    fingerprint=row.fingerprint,
+                )
+                for row in rows
+            ]
+        )
+        created_objects["set_of_exercise"].extend(set_.pk for set_ in sets)
+        sets_bulk_created.send(sender=self.model, sets=sets)
+        return sets
+
 
-class SetOfExerciseQuerySet(models.QuerySet):
+class SetOfExerciseQuerySet(ModifiedQuerySet):
+    tracked_fields = ("exercise", "workout_date")
     _pattern_repetitions_range_between = re.compile(r"^(?P<low>\d+)-(?P<high>\d+)$")
     _pattern_repetitions_range_greater = re.compile(r"^>(?P<low>\d+)$")
 
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert sets in bulk, copying the dates of their workouts to them."""
+        objs = list(objs)
+        for obj in objs:
+            obj.set_workout_date()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Update sets in bulk, copying the dates of their workouts if they move."""
+        objs = list(objs)
+        if {"workout", "workout_id"} & set(fields):
+            for obj in objs:
+                obj.set_workout_date()
+            fields = [*fields, *self.model.WORKOUT_DATE_FIELDS]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs) -> int:
+        """Update sets, copying the date of their new workout if they move."""
+        workout = kwargs.get("workout", kwargs.get("workout_id"))
+        date_fields = self.model.WORKOUT_DATE_FIELDS
+        if workout is not None and not all(field in kwargs for field in date_fields):
+            if hasattr(workout, "resolve_expression"):
+                raise ValueError(
+                    "Sets moved to the workouts of an expression need their "
+                    f"{date_fields} updated too."
+                )
+            if not isinstance(workout, Workout):
+                workout = Workout.objects.using(self.db).get(pk=workout)
+            set_ = self.model(workout=workout)
+            set_.set_workout_date()
+            kwargs |= {field: getattr(set_, field) for field in date_fields}
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+    def to_dataframe(
+        self,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+    ) -> pd.DataFrame:
+        """Fetch the sets performed between two dates in a columnar DataFrame.
+
+        Columns are fetched with a single `values_list` query, sorted by date.
+        See `workouts.analytics` for vectorized analytics on the result.
+        """
+        sets = self
+        if start_date is not None:
+            sets = sets.filter(workout_date__gte=start_date)
+        if end_date is not None:
+            sets = sets.filter(workout_date__lte=end_date)
+        rows = list(
+            sets.order_by("workout_date", "id").values_list(
+                "workout_date",
+                "exercise",
+                "n_repetitions",
+                models.functions.Cast("weight", models.FloatField()),
+                models.functions.Cast("volume", models.FloatField()),
+            )
+        )
+        dates, exercise_ids, repetitions, weights, volumes = (
+            list(zip(*rows)) if rows else [()] * 5
+        )
+        exercise_codes = dict(Exercise.objects.values_list("pk", "code"))
+        return pd.DataFrame(
+            {
+                "date": pd.to_datetime(np.array(dates, dtype="datetime64[D]")),
+                "exercise": pd.Categorical(
+                    [exercise_codes[exercise_id] for exercise_id in exercise_ids],
+                    categories=sorted(set(exercise_codes.values())),
+                ),
+                "n_repetitions": np.array(repetitions, dtype=np.int32),
+                "weight": np.array(weights, dtype=np.float64),
+                "volume": np.array(volumes, dtype=np.float64),
+            }
+        )
+
     def named_repetitions_range(self, range: str) -> models.QuerySet:
         """Filter by named repetitions range."""
         try:
@@ -146,7 +670,25 @@ class SetOfExerciseQuerySet(models.QuerySet):
         end_date: datetime.date,
         periodicity: str,
         per_exercise: bool = True,
+        use_rollups: bool = True,
+        with_totals: bool = False,
     ) -> models.QuerySet:
+        """Compute statistics of the sets performed between two dates.
+
+        If the queryset is not filtered, the statistics are computed from the
+        pre-aggregated `ExerciseRollup`s, unless `use_rollups` is False.
+        The result is the same either way.
+
+        With `with_totals`, only valid for the total report per exercise,
+        return both the statistics of every exercise and the statistics of
+        all of them, as with `per_exercise=False`, from a single scan.
+        """
+        if with_totals:
+            if periodicity != "total" or not per_exercise:
+                raise ValueError(
+                    "Totals are only computed with the total report per exercise."
+                )
+            return self._compute_report_with_totals(start_date, end_date, use_rollups)
         timerange_periods = ["yearly", "monthly", "weekly"]
         total_period = "total"
         daily_period = "daily"
@@ -158,47 +700,64 @@ class SetOfExerciseQuerySet(models.QuerySet):
                 f"Invalid periodicity {periodicity}. "
                 f"Acceptable values are: {acceptable_period_groupings}"
             )
+        if use_rollups and not self.query.has_filters():
+            rollup_period = ExerciseRollup.objects.get_report_period(
+                start_date, end_date, periodicity, per_exercise
+            )
+            source = ExerciseRollup.objects.using(self.db).filter(period=rollup_period)
+            date_field = "start_date"
+            date_parts = {
+                part: models.F(f"start_date__{part}")
+                for part in ["year", "month", "week"]
+            }
+            stats_dict = ExerciseRollup.objects.get_report_statistics(per_exercise)
+        else:
+            source = self
+            date_field = "workout_date"
+            date_parts = {
+                part: models.F(f"workout_{part}") for part in ["year", "month", "week"]
+            }
+            stats_dict = {
+                "n_workouts": models.Count("workout", distinct=True),
+                "n_sets": models.Count("id", distinct=True),
+                "total_repetitions": models.Sum("n_repetitions"),
+                "max_repetitions": models.Max("n_repetitions"),
+                "min_repetitions": models.Min("n_repetitions"),
+                "avg_repetitions": models.Avg("n_repetitions"),
+                "total_weight": models.Sum("weight"),
+                "max_weight": models.Max("weight"),
+                "min_weight": models.Min("weight"),
+                "avg_weight": models.Avg("weight"),
+                "total_volume": models.Sum("volume"),
+                "max_volume": models.Max("volume"),
+                "min_volume": models.Min("volume"),
+                "avg_volume": models.Avg("volume"),
+            }
+            if not per_exercise:
+                stats_dict |= {
+                    "n_unique_exercises": models.Count("exercise", distinct=True),
+                }
         if periodicity in timerange_periods:
             periodicity = periodicity.removesuffix("ly")
             periodicity_groupings = {
-                "year": models.F("workout__date__year"),
-                periodicity: models.F(f"workout__date__{periodicity}"),
+                "year": date_parts["year"],
+                periodicity: date_parts[periodicity],
             }
             grouping |= periodicity_groupings
             sorting.extend([f"-{g}" for g in periodicity_groupings])
         elif periodicity == daily_period:
-            grouping |= {"date": models.F("workout__date")}
+            grouping |= {"date": models.F(date_field)}
             sorting.append("-date")
-        stats_dict = {
-            "n_workouts": models.Count("workout", distinct=True),
-            "n_sets": models.Count("id", distinct=True),
-            "total_repetitions": models.Sum("n_repetitions"),
-            "max_repetitions": models.Max("n_repetitions"),
-            "min_repetitions": models.Min("n_repetitions"),
-            "avg_repetitions": models.Avg("n_repetitions"),
-            "total_weight": models.Sum("weight"),
-            "max_weight": models.Max("weight"),
-            "min_weight": models.Min("weight"),
-            "avg_weight": models.Avg("weight"),
-            "total_volume": models.Sum("volume"),
-            "max_volume": models.Max("volume"),
-            "min_volume": models.Min("volume"),
-            "avg_volume": models.Avg("volume"),
-        }
         sorting.append("-total_volume")
         if per_exercise:
             grouping |= {
                 field: models.F(f"exercise__{field}") for field in ["code", "name"]
             }
             sorting.append("code")
-        else:
-            stats_dict |= {
-                "n_unique_exercises": models.Count("exercise", distinct=True),
-            }
         filter_dict = {
-            "workout__date__range": (start_date, end_date),
+            f"{date_field}__range": (start_date, end_date),
         }
-        result = self.filter(**filter_dict).values(**grouping)
+        result = source.filter(**filter_dict).values(**grouping)
         if periodicity == total_period and not per_exercise:
             action = "aggregate"
         else:
@@ -210,6 +769,149 @@ class SetOfExerciseQuerySet(models.QuerySet):
             pass
         return result
 
+    def _compute_report_with_totals(
+        self, start_date: datetime.date, end_date: datetime.date, use_rollups: bool
+    ) -> tuple[list[dict], dict]:
+        if connections[self.db].vendor == "postgresql" and not self.query.has_filters():
+            return self._compute_report_with_grouping_sets(start_date, end_date)
+        # Workouts shared by exercises cannot be counted once from wider groups,
+        # so fetch a row per exercise and day, and merge them here.
+        if use_rollups and not self.query.has_filters():
+            rows = (
+                ExerciseRollup.objects.using(self.db)
+                .filter(
+                    period=ExerciseRollup.PERIODS.DAY,
+                    start_date__range=(start_date, end_date),
+                )
+                .values(
+                    "n_sets",
+                    *REPORT_TOTALS,
+                    code=models.F("exercise__code"),
+                    name=models.F("exercise__name"),
+                    date=models.F("start_date"),
+                )
+            )
+        else:
+            rows = (
+                self.filter(workout_date__range=(start_date, end_date))
+                .values(
+                    code=models.F("exercise__code"),
+                    name=models.F("exercise__name"),
+                    date=models.F("workout_date"),
+                )
+                .annotate(
+                    n_sets=models.Count("id"),
+                    **{
+                        f"{statistic}_{field}": aggregate(field_name)
+                        for field, field_name in [
+                            ("repetitions", "n_repetitions"),
+                            ("weight", "weight"),
+                            ("volume", "volume"),
+                        ]
+                        for statistic, aggregate in [
+                            ("total", models.Sum),
+                            ("max", models.Max),
+                            ("min", models.Min),
+                        ]
+                    },
+                )
+                .order_by()
+            )
+        return merge_daily_statistics(rows)
+
+    def _compute_report_with_grouping_sets(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> tuple[list[dict], dict]:
+        """Compute the groups and their total with GROUPING SETS, on PostgreSQL."""
+        set_table = self.model._meta.db_table
+        exercise_table = Exercise._meta.db_table
+        statistics = ", ".join(
+            f"{aggregate}(s.{column}) AS {statistic}_{field}"
+            for field, column in [
+                ("repetitions", "n_repetitions"),
+                ("weight", "weight"),
+                ("volume", "volume"),
+            ]
+            for statistic, aggregate in [
+                ("total", "SUM"),
+                ("max", "MAX"),
+                ("min", "MIN"),
+                ("avg", "AVG"),
+            ]
+        )
+        sql = f"""
+            SELECT
+                e.code, e.name, GROUPING(e.code) = 1 AS is_total,
+                COUNT(DISTINCT s.workout_id) AS n_workouts,
+                COUNT(*) AS n_sets,
+                COUNT(DISTINCT s.exercise_id) AS n_unique_exercises,
+                {statistics}
+            FROM {set_table} s JOIN {exercise_table} e ON e.id = s.exercise_id
+            WHERE s.workout_date BETWEEN %s AND %s
+            GROUP BY GROUPING SETS ((e.code, e.name), ())
+            ORDER BY is_total, total_volume DESC, e.code
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, [start_date, end_date])
+            columns = [column.name for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        *groups, totals = rows
+        for group in groups:
+            del group["is_total"], group["n_unique_exercises"]
+            group["avg_repetitions"] = float(group["avg_repetitions"])
+        del totals["is_total"], totals["code"], totals["name"]
+        if totals["avg_repetitions"] is not None:
+            totals["avg_repetitions"] = float(totals["avg_repetitions"])
+        return groups, totals
+
+
+REPORT_TOTALS = [
+    f"{statistic}_{field}"
+    for field in ["repetitions", "weight", "volume"]
+    for statistic in ["total", "max", "min"]
+]
+
+
+def merge_daily_statistics(rows: Iterable[dict]) -> tuple[list[dict], dict]:
+    """Merge daily statistics of exercises into statistics per exercise and overall.
+
+    Every row has the `code`, `name` and `date` it is about, `n_sets` and the
+    `REPORT_TOTALS`. Statistics are named as in `compute_report`.
+    """
+
+    def merge(rows: list[dict]) -> dict:
+        statistics = {
+            "n_workouts": len({row["date"] for row in rows}),
+            "n_sets": sum(row["n_sets"] for row in rows),
+        }
+        for field in ["repetitions", "weight", "volume"]:
+            total = sum(row[f"total_{field}"] for row in rows) if rows else None
+            statistics |= {
+                f"total_{field}": total,
+                f"max_{field}": max(
+                    (row[f"max_{field}"] for row in rows), default=None
+                ),
+                f"min_{field}": min(
+                    (row[f"min_{field}"] for row in rows), default=None
+                ),
+                f"avg_{field}": total / statistics["n_sets"] if rows else None,
+            }
+        return statistics
+
+    rows = list(rows)
+    rows_per_exercise = defaultdict(list)
+    for row in rows:
+        rows_per_exercise[row["code"], row["name"]].append(row)
+    groups = sorted(
+        (
+            {"code": code, "name": name} | merge(exercise_rows)
+            for (code, name), exercise_rows in rows_per_exercise.items()
+        ),
+        key=lambda group: (-group["total_volume"], group["code"]),
+    )
+    totals = merge(rows) | {"n_unique_exercises": len(rows_per_exercise)}
+    return groups, totals
+
 
 class SetOfExercise(models.Model):
     objects = SetOfExerciseManager.from_queryset(SetOfExerciseQuerySet)()
@@ -229,6 +931,44 @@ class SetOfExercise(models.Model):
         db_persist=True,
     )
     notes = models.TextField(max_length=1000, null=True, blank=True)
+    fingerprint = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Fingerprint of the imported row this set was created from",
+    )
+    # Copies of the date of the workout and of its parts, kept in sync with it,
+    # so that reports can scan and group sets without joining workouts.
+    workout_date = models.DateField(editable=False)
+    workout_year = models.PositiveSmallIntegerField(editable=False)
+    workout_month = models.PositiveSmallIntegerField(editable=False)
+    workout_week = models.PositiveSmallIntegerField(
+        editable=False, help_text="ISO week number"
+    )
+    modified = models.DateTimeField(auto_now=True, editable=False)
+
+    WORKOUT_DATE_FIELDS = [
+        "workout_date",
+        "workout_year",
+        "workout_month",
+        "workout_week",
+    ]
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["workout_date", "exercise"], name="set_date_exercise_idx"
+            ),
+            models.Index(
+                fields=["exercise", "workout_date"], name="set_exercise_date_idx"
+            ),
+            # Keys of the pages of sets, see `workouts.pagination`.
+            models.Index(fields=["workout_date", "id"], name="set_date_id_idx"),
+            # Keys of the feed of changes, see `workouts.changes`.
+            models.Index(fields=["modified", "id"], name="set_modified_idx"),
+        ]
 
     class REPETITIONS_RANGES(StrEnum):
         LOW = "1-5"
@@ -239,5 +979,496 @@ class SetOfExercise(models.Model):
         def display_name(self) -> str:
             return self.name.replace("_", " ").title()
 
+        def contains(self, n_repetitions: int) -> bool:
+            if self.value.startswith(">"):
+                return n_repetitions > int(self.value.removeprefix(">"))
+            low, high = self.value.split("-")
+            return int(low) <= n_repetitions <= int(high)
+
     def __str__(self) -> str:
         return f"{self.exercise.code}: {self.n_repetitions} reps at {self.weight} kg"
+
+    def save(self, *args, **kwargs):
+        self.set_workout_date()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "workout" in update_fields:
+            kwargs["update_fields"] = {*update_fields, *self.WORKOUT_DATE_FIELDS}
+        super().save(*args, **kwargs)
+
+    def set_workout_date(self) -> None:
+        """Copy the date of the workout, and its parts, to the set."""
+        date = Workout._meta.get_field("date").to_python(self.workout.date)
+        self.workout_date = date
+        self.workout_year = date.year
+        self.workout_month = date.month
+        self.workout_week = date.isocalendar().week
+
+
+class ExerciseRollupManager(models.Manager):
+    def refresh(self, exercise_dates: Iterable[tuple[int, datetime.date]]) -> None:
+        """Recompute the rollups of the periods containing the given dates.
+
+        `exercise_dates` are pairs of exercise primary keys and workout dates
+        of sets that were created, updated or deleted.
+        """
+        to_date = Workout._meta.get_field("date").to_python
+        exercise_dates = {
+            (exercise_id, to_date(date)) for exercise_id, date in exercise_dates
+        }
+        if not exercise_dates:
+            return
+        exercise_ids = {exercise_id for exercise_id, _ in exercise_dates}
+        dates = [date for _, date in exercise_dates]
+        with transaction.atomic(using=self.db):
+            for period in self.model.PERIODS:
+                start_date, _ = get_start_end_dates_from_period(min(dates), period)
+                _, end_date = get_start_end_dates_from_period(max(dates), period)
+                self._rebuild_period(period, exercise_ids, (start_date, end_date))
+
+    def rebuild(self) -> None:
+        """Recompute all the rollups from scratch."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            for period in self.model.PERIODS:
+                self._rebuild_period(period)
+
+    def _rebuild_period(
+        self,
+        period: str,
+        exercise_ids: set[int] | None = None,
+        date_range: tuple[datetime.date, datetime.date] | None = None,
+    ) -> None:
+        rollups = self.filter(period=period)
+        sets = SetOfExercise.objects.using(self.db)
+        if exercise_ids is not None:
+            rollups = rollups.filter(exercise__in=exercise_ids)
+            sets = sets.filter(exercise__in=exercise_ids)
+        if date_range is not None:
+            rollups = rollups.filter(start_date__range=date_range)
+            sets = sets.filter(workout_date__range=date_range)
+        rollups.delete()
+        aggregated_sets = (
+            sets.values(
+                "exercise",
+                period_start_date=models.functions.Trunc(
+                    "workout_date", period, output_field=models.DateField()
+                ),
+            )
+            .annotate(
+                n_workouts=models.Count("workout", distinct=True),
+                n_sets=models.Count("id"),
+                total_repetitions=models.Sum("n_repetitions"),
+                max_repetitions=models.Max("n_repetitions"),
+                min_repetitions=models.Min("n_repetitions"),
+                total_weight=models.Sum("weight"),
+                max_weight=models.Max("weight"),
+                min_weight=models.Min("weight"),
+                total_volume=models.Sum("volume"),
+                max_volume=models.Max("volume"),
+                min_volume=models.Min("volume"),
+            )
+            .order_by()
+        )
+        self.bulk_create(
+            [
+                self.model(
+                    period=period,
+                    exercise_id=row.pop("exercise"),
+                    start_date=row.pop("period_start_date"),
+                    **row,
+                )
+                for row in aggregated_sets
+            ]
+        )
+
+    def get_report_period(
+        self,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        periodicity: str,
+        per_exercise: bool,
+    ) -> str:
+        """Return the coarsest period of rollups that can compute a report.
+
+        Rollups must be aligned with the start and end dates, and nest within
+        the periods of the report. Weeks do not nest within years, and distinct
+        counts across exercises can only be computed from daily rollups.
+        """
+        PERIODS = self.model.PERIODS
+        candidates = {
+            "total": [PERIODS.YEAR, PERIODS.MONTH, PERIODS.WEEK, PERIODS.DAY],
+            "yearly": [PERIODS.YEAR, PERIODS.MONTH, PERIODS.DAY],
+            "monthly": [PERIODS.MONTH, PERIODS.DAY],
+            "weekly": [PERIODS.DAY],
+            "daily": [PERIODS.DAY],
+        }[periodicity]
+        if not per_exercise:
+            candidates = [PERIODS.DAY]
+        for period in candidates:
+            if (
+                get_start_end_dates_from_period(start_date, period)[0] == start_date
+                and get_start_end_dates_from_period(end_date, period)[1] == end_date
+            ):
+                return period
+        return PERIODS.DAY
+
+    @staticmethod
+    def get_report_statistics(per_exercise: bool) -> dict[str, models.Aggregate]:
+        """Statistics of `SetOfExerciseQuerySet.compute_report`, from rollups."""
+
+        def average(total: str) -> models.Expression:
+            # Refer to the totals computed below, not to the fields of rollups.
+            return models.functions.Cast(
+                models.F(total), models.FloatField()
+            ) / models.functions.NullIf(models.F("n_sets"), 0)
+
+        stats_dict = {
+            "n_workouts": models.Sum("n_workouts"),
+            "n_sets": models.functions.Coalesce(models.Sum("n_sets"), 0),
+            "total_repetitions": models.Sum("total_repetitions"),
+            "max_repetitions": models.Max("max_repetitions"),
+            "min_repetitions": models.Min("min_repetitions"),
+            "avg_repetitions": models.ExpressionWrapper(
+                average("total_repetitions"), output_field=models.FloatField()
+            ),
+        }
+        for field in ["weight", "volume"]:
+            stats_dict |= {
+                f"total_{field}": models.Sum(f"total_{field}"),
+                f"max_{field}": models.Max(f"max_{field}"),
+                f"min_{field}": models.Min(f"min_{field}"),
+                f"avg_{field}": models.ExpressionWrapper(
+                    average(f"total_{field}"), output_field=models.DecimalField()
+                ),
+            }
+        if not per_exercise:
+            # Only valid for daily rollups, see `get_report_period`.
+            stats_dict |= {
+                "n_workouts": models.Count("start_date", distinct=True),
+                "n_unique_exercises": models.Count("exercise", distinct=True),
+            }
+        return stats_dict
+
+
+class ExerciseRollup(models.Model):
+    """Statistics of the sets of an exercise, pre-aggregated by period of time.
+
+    Rollups are kept up to date when sets or workouts are saved or deleted,
+    and when sets are imported; see `workouts.receivers`.
+    """
+
+    class PERIODS(models.TextChoices):
+        DAY = "day"
+        WEEK = "week"
+        MONTH = "month"
+        YEAR = "year"
+
+    objects = ExerciseRollupManager()
+    period = models.CharField(max_length=5, choices=PERIODS)
+    start_date = models.DateField(help_text="First day of the period")
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    n_workouts = models.PositiveIntegerField(verbose_name="Number of workouts")
+    n_sets = models.PositiveIntegerField(verbose_name="Number of sets")
+    total_repetitions = models.PositiveIntegerField()
+    max_repetitions = models.PositiveSmallIntegerField()
+    min_repetitions = models.PositiveSmallIntegerField()
+    total_weight = models.DecimalField(max_digits=15, decimal_places=1)
+    max_weight = models.DecimalField(max_digits=6, decimal_places=1)
+    min_weight = models.DecimalField(max_digits=6, decimal_places=1)
+    total_volume = models.DecimalField(max_digits=15, decimal_places=1)
+    max_volume = models.DecimalField(max_digits=10, decimal_places=1)
+    min_volume = models.DecimalField(max_digits=10, decimal_places=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "start_date", "exercise"], name="unique_rollup"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.exercise.code}: {self.period} of {self.start_date}"
+
+
+class PersonalRecordQuerySet(models.QuerySet):
+    def by_exercise(self) -> dict[Exercise, dict[str, "PersonalRecord"]]:
+        """Return the records of every exercise, by kind, with a single query."""
+        records = defaultdict(dict)
+        for record in self.select_related("exercise", "set_of_exercise").order_by(
+            "exercise__code", "kind"
+        ):
+            records[record.exercise][record.kind] = record
+        return dict(records)
+
+
+class PersonalRecordManager(models.Manager):
+    def update_with(self, sets: Iterable[SetOfExercise]) -> None:
+        """Update the records of exercises with new sets, if they beat them."""
+        candidates = {}
+        for set_ in sets:
+            for kind in self.model.KINDS:
+                value = self.model.get_value(kind, set_)
+                key = (set_.exercise_id, kind)
+                if value is not None and (
+                    key not in candidates or value > candidates[key][0]
+                ):
+                    candidates[key] = (value, set_)
+        if not candidates:
+            return
+        exercise_ids = {exercise_id for exercise_id, _ in candidates}
+        with transaction.atomic(using=self.db):
+            records = {
+                (record.exercise_id, record.kind): record
+                for record in self.filter(exercise__in=exercise_ids)
+            }
+            new_records = []
+            for (exercise_id, kind), (value, set_) in candidates.items():
+                record = records.get((exercise_id, kind))
+                if record is None:
+                    new_records.append(
+                        self.model(
+                            exercise_id=exercise_id,
+                            kind=kind,
+                            value=value,
+                            set_of_exercise=set_,
+                        )
+                    )
+                elif value > record.value:
+                    record.value = value
+                    record.set_of_exercise = set_
+                    record.save(update_fields=["value", "set_of_exercise"])
+            self.bulk_create(new_records)
+
+    def rebuild(self, exercise_ids: Iterable[int] | None = None) -> None:
+        """Recompute the records of some exercises, or of all, from their sets.
+
+        Every kind of record is computed with a single query, ranking the sets
+        of every exercise with a window function.
+        """
+        records = self.all()
+        sets = SetOfExercise.objects.using(self.db)
+        if exercise_ids is not None:
+            exercise_ids = set(exercise_ids)
+            records = records.filter(exercise__in=exercise_ids)
+            sets = sets.filter(exercise__in=exercise_ids)
+        with transaction.atomic(using=self.db):
+            records.delete()
+            new_records = []
+            for kind in self.model.KINDS:
+                repetitions_range = self.model.get_repetitions_range(kind)
+                kind_sets = sets
+                if repetitions_range is not None:
+                    kind_sets = sets.repetitions_range(repetitions_range.value)
+                best_sets = kind_sets.annotate(
+                    metric=self.model.get_metric(kind),
+                    rank=models.Window(
+                        models.functions.RowNumber(),
+                        partition_by="exercise",
+                        order_by=[
+                            models.F("metric").desc(),
+                            "workout_date",
+                            "id",
+                        ],
+                    ),
+                ).filter(rank=1)
+                new_records.extend(
+                    self.model(
+                        exercise_id=set_.exercise_id,
+                        kind=kind,
+                        value=self.model.get_value(kind, set_),
+                        set_of_exercise=set_,
+                    )
+                    for set_ in best_sets
+                )
+            self.bulk_create(new_records)
+
+
+class PersonalRecord(models.Model):
+    """Best set of an exercise, for every kind of record.
+
+    Records are updated when sets are created, and recomputed for an exercise
+    when one of its sets holding a record changes; see `workouts.receivers`.
+    """
+
+    KINDS = {
+        "weight": "Heaviest weight",
+        "volume": "Best volume",
+        "estimated_1rm": "Best estimated one-rep max",
+    } | {
+        f"weight_{range.name.lower()}": (
+            f"Heaviest weight, {range.display_name().lower()} repetitions"
+        )
+        for range in SetOfExercise.REPETITIONS_RANGES
+    }
+
+    objects = PersonalRecordManager.from_queryset(PersonalRecordQuerySet)()
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    value = models.DecimalField(
+        max_digits=10, decimal_places=1, help_text="Kilograms, or volume"
+    )
+    set_of_exercise = models.ForeignKey(SetOfExercise, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["exercise", "kind"], name="unique_personal_record"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.exercise.code}: {self.get_kind_display()} {self.value}"
+
+    @staticmethod
+    def estimate_one_rep_max(weight: Decimal, n_repetitions: int) -> Decimal:
+        """Estimate the one-rep max of a set with the Epley formula."""
+        if n_repetitions == 1:
+            return weight
+        return (weight * (1 + Decimal(n_repetitions) / 30)).quantize(Decimal("0.1"))
+
+    @staticmethod
+    def get_repetitions_range(kind: str) -> SetOfExercise.REPETITIONS_RANGES | None:
+        if kind.startswith("weight_"):
+            return SetOfExercise.REPETITIONS_RANGES[
+                kind.removeprefix("weight_").upper()
+            ]
+        return None
+
+    @classmethod
+    def get_value(cls, kind: str, set_: SetOfExercise) -> Decimal | None:
+        """Return the value of a set for a kind of record, if it applies to it."""
+        weight = Decimal(set_.weight)
+        match kind:
+            case "volume":
+                return weight * set_.n_repetitions
+            case "estimated_1rm":
+                return cls.estimate_one_rep_max(weight, set_.n_repetitions)
+            case "weight":
+                return weight
+        if cls.get_repetitions_range(kind).contains(set_.n_repetitions):
+            return weight
+        return None
+
+    @staticmethod
+    def get_metric(kind: str) -> models.Expression:
+        """Return an expression ranking sets like `get_value`."""
+        match kind:
+            case "volume":
+                return models.F("volume")
+            case "estimated_1rm":
+                weight = models.functions.Cast("weight", models.FloatField())
+                repetitions = models.functions.Cast(
+                    "n_repetitions", models.FloatField()
+                )
+                return models.Case(
+                    models.When(n_repetitions=1, then=weight),
+                    default=weight * (1 + repetitions / 30),
+                    output_field=models.FloatField(),
+                )
+        return models.F("weight")
+
+
+class ImportRun(models.Model):
+    path = models.CharField(max_length=1000, help_text="Path of the imported file")
+    sha256 = models.CharField(
+        max_length=64, unique=True, help_text="Hash of the content of the file"
+    )
+    n_rows = models.PositiveIntegerField(verbose_name="Number of rows")
+    n_created_sets = models.PositiveIntegerField(verbose_name="Number of created sets")
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.path} ({self.imported_at})"
+
+
+class ImportedRow(models.Model):
+    """Row of an imported file, and the set of exercise created from it.
+
+    Identical rows of different files share the set created by the first file
+    imported, which is deleted only once no file has the row anymore.
+    """
+
+    source = models.CharField(max_length=1000, help_text="Path of the imported file")
+    set_of_exercise = models.ForeignKey(
+        SetOfExercise, on_delete=models.CASCADE, related_name="imported_rows"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "set_of_exercise"], name="unique_imported_row"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.source}: {self.set_of_exercise_id}"
+
+
+class Tombstone(models.Model):
+    """Trace of a deleted exercise, workout or set, for the feed of changes."""
+
+    class Model(models.TextChoices):
+        EXERCISE = "exercise"
+        WORKOUT = "workout"
+        SET_OF_EXERCISE = "set_of_exercise"
+
+    model = models.CharField(max_length=20, choices=Model)
+    object_id = models.PositiveBigIntegerField()
+    modified = models.DateTimeField(
+        auto_now_add=True, help_text="When the object was deleted"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["modified", "id"], name="tombstone_modified_idx")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model} {self.object_id} deleted on {self.modified}"
+
+
+class DataVersionManager(models.Manager):
+    def current(self) -> "DataVersion":
+        """Return the current version of the data, without creating it."""
+        return self.filter(pk=DataVersion.SINGLETON_PK).first() or self._initial()
+
+    async def acurrent(self) -> "DataVersion":
+        version = await self.filter(pk=DataVersion.SINGLETON_PK).afirst()
+        return version or self._initial()
+
+    def _initial(self) -> "DataVersion":
+        """Version of the data before it was ever written."""
+        return DataVersion(
+            pk=DataVersion.SINGLETON_PK,
+            modified=datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC),
+        )
+
+    def bump(self) -> None:
+        """Record that exercises, workouts or sets of exercises were written."""
+        updated = self.filter(pk=DataVersion.SINGLETON_PK).update(
+            version=models.F("version") + 1, modified=timezone.now()
+        )
+        if not updated:
+            self.get_or_create(pk=DataVersion.SINGLETON_PK, defaults={"version": 1})
+
+
+class DataVersion(models.Model):
+    """Counter bumped on any write to exercises, workouts or sets of exercises.
+
+    Results derived from the data, like cached reports, are keyed on it, so
+    they are never served after the data changed.
+    """
+
+    SINGLETON_PK = 1
+
+    objects = DataVersionManager()
+    version = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"Version {self.version} of {self.modified}"
+
+    @property
+    def key(self) -> str:
+        """Identify the version, even if the database is restored from a backup."""
+        return f"{self.version}-{self.modified.timestamp()}"
@@ -0,0 +1,93 @@
+"""Keyset pagination, whose pages cost the same however deep they are.
+
+Instead of skipping an offset of rows, a page starts after the keys of the
+last row of the previous page, given by an opaque cursor, so that it is read
+from an index like the first page.
+"""
+
+import base64
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence) -> str:
+    data = json.dumps(list(values), cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Return the keys of a cursor, raising `ValueError` if it is invalid."""
+    data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    values = json.loads(data)
+    if not isinstance(values, list) or any(
+        isinstance(value, list | dict) for value in values
+    ):
+        raise ValueError("A cursor must encode a list of keys.")
+    return values
+
+
+@dataclass
+class KeysetPage:
+    objects: list
+    next_cursor: str | None
+
+
+def _get_field(model: type[models.Model], key: str) -> models.Field:
+    return model._meta.pk if key == "pk" else model._meta.get_field(key)
+
+
+def keyset_page(
+    queryset: models.QuerySet,
+    keys: Sequence[str],
+    cursor: list | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = True,
+) -> KeysetPage:
+    """Return a page of a queryset ordered by unique `keys`, after `cursor`.
+
+    The page is a single query, filtering on the keys and limited to one more
+    row than `limit`, to know whether there is a next page.
+    Raise `ValueError` if the cursor does not match the keys.
+    """
+    if cursor is not None:
+        if len(cursor) != len(keys):
+            raise ValueError(f"A cursor must have {len(keys)} keys.")
+        try:
+            values = [
+                _get_field(queryset.model, key).to_python(value)
+                for key, value in zip(keys, cursor)
+            ]
+        # Fields raise `TypeError` on keys of other types, like numbers for dates.
+        except (TypeError, ValidationError) as exc:
+            raise ValueError(str(exc)) from exc
+        lookup = "lt" if descending else "gt"
+        # Rows after (a, b): a after the cursor, or a equal and b after it.
+        after = models.Q()
+        for i, key in enumerate(keys):
+            after |= models.Q(
+                *[models.Q(**{k: v}) for k, v in zip(keys[:i], values[:i])],
+                **{f"{key}__{lookup}": values[i]},
+            )
+        # The bound on the first key alone lets databases seek the index to
+        # the cursor, instead of scanning it from the start.
+        queryset = queryset.filter(after, **{f"{keys[0]}__{lookup}e": values[0]})
+    ordering = [f"-{key}" if descending else key for key in keys]
+    objects = list(queryset.order_by(*ordering)[: limit + 1])
+    next_cursor = None
+    if len(objects) > limit:
+        objects = objects[:limit]
+        next_cursor = encode_cursor(
+            [
+                _get_field(queryset.model, key).value_to_string(objects[-1])
+                for key in keys
+            ]
+        )
+    return KeysetPage(objects, next_cursor)
@@ -0,0 +1,227 @@
+"""Keep data derived from sets of exercises in sync with them."""
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import metrics, snapshots
+from .models import (
+    DataVersion,
+    Exercise,
+    ExerciseRollup,
+    PersonalRecord,
+    SetOfExercise,
+    Tombstone,
+    Workout,
+)
+from .signals import bulk_updated, sets_bulk_created, sets_bulk_deleted
+
+
+@receiver(pre_save, sender=SetOfExercise)
+def remember_previous_set(sender, instance, raw, **kwargs):
+    instance._previous_exercise_date = None
+    if instance.pk is not None and not raw:
+        instance._previous_exercise_date = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("exercise", "workout_date")
+            .first()
+        )
+
+
+@receiver(post_save, sender=SetOfExercise)
+def refresh_rollups_saved_set(sender, instance, raw, **kwargs):
+    # Fixtures are saved raw, and `loaddata` rebuilds the rollups once loaded.
+    if raw:
+        return
+    exercise_dates = {(instance.exercise_id, instance.workout_date)}
+    if instance._previous_exercise_date is not None:
+        exercise_dates.add(instance._previous_exercise_date)
+    ExerciseRollup.objects.refresh(exercise_dates)
+
+
+@receiver(post_delete, sender=SetOfExercise)
+def refresh_rollups_deleted_set(sender, instance, **kwargs):
+    ExerciseRollup.objects.refresh({(instance.exercise_id, instance.workout_date)})
+
+
+@receiver(sets_bulk_created, sender=SetOfExercise)
+def refresh_rollups_created_sets(sender, sets, **kwargs):
+    ExerciseRollup.objects.refresh(
+        {(set_.exercise_id, set_.workout_date) for set_ in sets}
+    )
+
+
+@receiver(bulk_updated, sender=SetOfExercise)
+def refresh_rollups_updated_sets(sender, previous, updated, **kwargs):
+    ExerciseRollup.objects.refresh(
+        (row["exercise"], row["workout_date"]) for row in [*previous, *updated]
+    )
+
+
+@receiver(sets_bulk_deleted, sender=SetOfExercise)
+def refresh_rollups_deleted_sets(sender, deleted, **kwargs):
+    ExerciseRollup.objects.refresh(
+        {(row["exercise"], row["workout_date"]) for row in deleted}
+    )
+
+
+@receiver(post_save, sender=SetOfExercise)
+def update_personal_records_saved_set(sender, instance, raw, created, **kwargs):
+    # Fixtures are saved raw, and `loaddata` rebuilds the records once loaded.
+    if raw:
+        return
+    if created:
+        PersonalRecord.objects.update_with([instance])
+        return
+    # An edited set may have lost a record, so recompute them.
+    exercise_ids = {instance.exercise_id}
+    if instance._previous_exercise_date is not None:
+        exercise_ids.add(instance._previous_exercise_date[0])
+    PersonalRecord.objects.rebuild(exercise_ids)
+
+
+@receiver(pre_delete, sender=SetOfExercise)
+def remember_personal_records_deleted_set(sender, instance, **kwargs):
+    instance._holds_personal_record = PersonalRecord.objects.filter(
+        set_of_exercise=instance
+    ).exists()
+
+
+@receiver(post_delete, sender=SetOfExercise)
+def update_personal_records_deleted_set(sender, instance, **kwargs):
+    if getattr(instance, "_holds_personal_record", False):
+        PersonalRecord.objects.rebuild({instance.exercise_id})
+
+
+@receiver(sets_bulk_created, sender=SetOfExercise)
+def update_personal_records_created_sets(sender, sets, **kwargs):
+    PersonalRecord.objects.update_with(sets)
+
+
+@receiver(bulk_updated, sender=SetOfExercise)
+def update_personal_records_updated_sets(sender, previous, updated, **kwargs):
+    # Updated sets may have lost a record, so recompute them.
+    PersonalRecord.objects.rebuild({row["exercise"] for row in [*previous, *updated]})
+
+
+@receiver(sets_bulk_deleted, sender=SetOfExercise)
+def update_personal_records_deleted_sets(sender, deleted, **kwargs):
+    # The records of the deleted sets were deleted with them.
+    PersonalRecord.objects.rebuild({row["exercise"] for row in deleted})
+
+
+@receiver(pre_save, sender=Workout)
+def remember_previous_workout_date(sender, instance, raw, **kwargs):
+    instance._previous_date = None
+    if instance.pk is not None and not raw:
+        instance._previous_date = (
+            sender.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+        )
+
+
+def _move_sets(workout: Workout) -> None:
+    set_ = SetOfExercise(workout=workout)
+    set_.set_workout_date()
+    # The update refreshes the data derived from the sets.
+    workout.setofexercise_set.update(
+        **{field: getattr(set_, field) for field in set_.WORKOUT_DATE_FIELDS}
+    )
+
+
+@receiver(post_save, sender=Workout)
+def move_sets_of_moved_workout(sender, instance, raw, created, **kwargs):
+    if raw or created or instance._previous_date in (None, instance.date):
+        return
+    _move_sets(instance)
+
+
+@receiver(bulk_updated, sender=Workout)
+def move_sets_of_moved_workouts(sender, previous, updated, fields, **kwargs):
+    if "date" not in fields:
+        return
+    previous_dates = {row["pk"]: row["date"] for row in previous}
+    for row in updated:
+        if row["date"] != previous_dates[row["pk"]]:
+            _move_sets(Workout(pk=row["pk"], date=row["date"]))
+
+
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=Workout)
+@receiver(post_delete, sender=SetOfExercise)
+def leave_tombstone(sender, instance, **kwargs):
+    model = {
+        Exercise: Tombstone.Model.EXERCISE,
+        Workout: Tombstone.Model.WORKOUT,
+        SetOfExercise: Tombstone.Model.SET_OF_EXERCISE,
+    }[sender]
+    Tombstone.objects.create(model=model, object_id=instance.pk)
+
+
+@receiver(sets_bulk_deleted, sender=SetOfExercise)
+def leave_tombstones(sender, deleted, **kwargs):
+    Tombstone.objects.bulk_create(
+        Tombstone(model=Tombstone.Model.SET_OF_EXERCISE, object_id=row["pk"])
+        for row in deleted
+    )
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+@receiver(bulk_updated, sender=Exercise)
+def invalidate_exercise_cache(sender, **kwargs):
+    Exercise.objects.invalidate_cache()
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_save, sender=Workout)
+@receiver(post_save, sender=SetOfExercise)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=Workout)
+@receiver(post_delete, sender=SetOfExercise)
+@receiver(sets_bulk_created, sender=SetOfExercise)
+@receiver(sets_bulk_deleted, sender=SetOfExercise)
+@receiver(bulk_updated, sender=Exercise)
+@receiver(bulk_updated, sender=Workout)
+@receiver(bulk_updated, sender=SetOfExercise)
+def bump_data_version(sender, **kwargs):
+    DataVersion.objects.bump()
+
+
+# Connected after `bump_data_version`, as writes outside of transactions refresh
+# the snapshots right away, and they must see the version bumped.
+@receiver(post_save, sender=Exercise)
+@receiver(post_save, sender=Workout)
+@receiver(post_save, sender=SetOfExercise)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=Workout)
+@receiver(post_delete, sender=SetOfExercise)
+@receiver(sets_bulk_created, sender=SetOfExercise)
+@receiver(sets_bulk_deleted, sender=SetOfExercise)
+@receiver(bulk_updated, sender=Exercise)
+@receiver(bulk_updated, sender=Workout)
+@receiver(bulk_updated, sender=SetOfExercise)
+def refresh_snapshots(
+    sender, instance=None, sets=(), previous=(), updated=(), deleted=(), **kwargs
+):
+    if snapshots.get_directory() is None:
+        return
+    exercise_ids = {set_.exercise_id for set_ in sets}
+    rows = [*previous, *updated, *deleted]
+    if sender is Exercise:
+        exercise_ids.update(row["pk"] for row in rows)
+        if instance is not None:
+            exercise_ids.add(instance.pk)
+    elif sender is SetOfExercise:
+        exercise_ids.update(row["exercise"] for row in rows)
+        if instance is not None:
+            exercise_ids.add(instance.exercise_id)
+            previous_exercise_date = getattr(instance, "_previous_exercise_date", None)
+            if previous_exercise_date is not None:
+                exercise_ids.add(previous_exercise_date[0])
+    # The sets of a moved workout are updated, which refreshes their snapshots.
+    snapshots.schedule_refresh(exercise_ids)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    connection.execute_wrappers.append(metrics.record_query)
@@ -0,0 +1,80 @@
+"""Cache the results of `SetOfExerciseQuerySet.compute_report`.
+
+Cached results are keyed on the arguments of the report and on the current
+`DataVersion`, which is bumped by any write, so stale results are never
+served. The cache backend is chosen with the `WORKOUTS_REPORT_CACHE` setting.
+Reports are read from the read-only database, if one is configured.
+"""
+
+import datetime
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+from .concurrency import in_worker_thread
+from .models import DataVersion, SetOfExercise
+from .routers import read_only_database
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    periodicity: str,
+    per_exercise: bool = True,
+    with_totals: bool = False,
+) -> list[dict] | dict | tuple[list[dict], dict]:
+    """Return the evaluated report, from the cache if it is up to date."""
+    start = time.perf_counter()
+    cache = caches[settings.WORKOUTS_REPORT_CACHE]
+    # Reports only read, so they are not blocked by imports writing meanwhile.
+    with read_only_database():
+        version = DataVersion.objects.current().key
+        key = (
+            f"workouts:report:{version}:{start_date.isoformat()}:{end_date.isoformat()}"
+            f":{periodicity}:{int(per_exercise)}:{int(with_totals)}"
+        )
+        report = cache.get(key)
+        computed = report is None
+        with _stats_lock:
+            _stats["misses" if computed else "hits"] += 1
+        if computed:
+            report = SetOfExercise.objects.compute_report(
+                start_date,
+                end_date,
+                periodicity=periodicity,
+                per_exercise=per_exercise,
+                with_totals=with_totals,
+            )
+            if not isinstance(report, dict | tuple):
+                report = list(report)
+            cache.set(key, report)
+    metrics.REPORT_SECONDS.observe(
+        time.perf_counter() - start,
+        periodicity=periodicity,
+        per_exercise=per_exercise,
+        cache="miss" if computed else "hit",
+    )
+    return report
+
+
+# Reports are independent of each other, so async views can await several of
+# them at once.
+aget_report = in_worker_thread(get_report)
+
+
+def get_cache_stats() -> dict[str, int]:
+    """Return the number of hits and misses of the cache of this process."""
+    with _stats_lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"]}
+
+
+def reset_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
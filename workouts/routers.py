@@ -0,0 +1,49 @@
+"""Send the reads of reports and charts to a read-only database connection.
+
+With SQLite in WAL mode, readers on their own connection are never blocked by
+a writer, so dashboards keep working while a bulk import runs. The alias of the
+read-only connection is the `WORKOUTS_READ_ONLY_DATABASE` setting; when it is
+not set, everything goes to the default database.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_only = ContextVar("read_only", default=False)
+
+
+@contextmanager
+def read_only_database() -> Iterator[None]:
+    """Route the reads made within this context to the read-only database."""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def get_read_only_database() -> str | None:
+    return getattr(settings, "WORKOUTS_READ_ONLY_DATABASE", None)
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints):
+        alias = get_read_only_database()
+        if alias is None or not _read_only.get():
+            return None
+        # Reads within a transaction must see its uncommitted writes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == get_read_only_database():
+            return False
+        return None
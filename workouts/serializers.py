@@ -0,0 +1,39 @@
+"""Exercises, workouts and sets as JSON objects, for the API."""
+
+from .models import Exercise, SetOfExercise, Workout
+
+
+def serialize_exercise(exercise: Exercise) -> dict:
+    return {
+        "id": exercise.pk,
+        "code": exercise.code,
+        "name": exercise.name,
+        "description": exercise.description,
+    }
+
+
+def serialize_workout(workout: Workout) -> dict:
+    """Serialize a workout, with its statistics if they are annotated."""
+    data = {"id": workout.pk, "date": workout.date}
+    if hasattr(workout, "n_exercises"):
+        data |= {
+            "n_exercises": workout.n_exercises,
+            "n_sets": workout.n_sets,
+            "total_repetitions": workout.total_repetitions,
+            "total_volume": workout.total_volume,
+        }
+    return data
+
+
+def serialize_set(set_: SetOfExercise) -> dict:
+    """Serialize a set, whose exercise should be fetched with it."""
+    return {
+        "id": set_.pk,
+        "date": set_.workout_date,
+        "workout": set_.workout_id,
+        "exercise": set_.exercise.code,
+        "n_repetitions": set_.n_repetitions,
+        "weight": set_.weight,
+        "volume": set_.volume,
+        "notes": set_.notes,
+    }
@@ -0,0 +1,18 @@
+from django.dispatch import Signal
+
+# Sent by `SetOfExerciseManager` after creating sets with `bulk_create`, which
+# does not send `post_save`. Receivers get the created sets as `sets`.
+sets_bulk_created = Signal()
+
+# Sent by `SetOfExerciseManager.delete_missing_rows`, which deletes sets in bulk
+# without sending `post_delete`, inside the transaction of the deletion.
+# Receivers get the deleted sets as `deleted`, dicts of their `pk`, `exercise`
+# and `workout_date`.
+sets_bulk_deleted = Signal()
+
+# Sent by `ModifiedQuerySet.update`, which does not send `post_save`, inside the
+# transaction of the update. Receivers get the updated rows before and after the
+# update as `previous` and `updated`, dicts of their `pk` and of the
+# `tracked_fields` of the queryset, and the names of the updated fields as
+# `fields`.
+bulk_updated = Signal()
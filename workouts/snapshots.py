@@ -0,0 +1,458 @@
+"""Memory-mapped columnar snapshots of the sets of every exercise.
+
+The sets of every exercise are written to NumPy `.npy` files, one per column,
+sorted by date: `days` since 1970-01-01 as int32, `n_repetitions` as uint16,
+and `weight` and `volume` as float32, which are exact for the weights and
+volumes of real sets, with one decimal. Readers map the files in memory, so
+processes share them through the page cache, and long periods are read
+without querying the database.
+
+Snapshots live in the `WORKOUTS_SNAPSHOT_DIR` directory, and are disabled if
+it is not set. A manifest records the `DataVersion` they were written at, and
+they are used only while it is current. Writes refresh the snapshots of the
+exercises they touched once their transaction commits, or once at the end
+of a `deferred_refresh()` block for imports committing many chunks; a full
+rebuild is needed only if some refresh was missed, which is detected by counting the
+writes, or after changing sets without their signals, e.g. with raw SQL.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import models, transaction
+
+from .models import DataVersion, Exercise, SetOfExercise
+from .routers import read_only_database
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+COLUMNS = {
+    "days": np.int32,
+    "n_repetitions": np.uint16,
+    "weight": np.float32,
+    "volume": np.float32,
+}
+MANIFEST = "manifest.json"
+EPOCH = datetime.date(1970, 1, 1)
+
+_loaded = None
+_pending = threading.local()
+
+
+def get_directory() -> Path | None:
+    directory = settings.WORKOUTS_SNAPSHOT_DIR
+    return Path(directory) if directory else None
+
+
+def to_days(date: datetime.date) -> int:
+    return (date - EPOCH).days
+
+
+def from_days(days: int) -> datetime.date:
+    return EPOCH + datetime.timedelta(days=int(days))
+
+
+@dataclass(frozen=True)
+class ExerciseSnapshot:
+    """Columns of the sets of an exercise, sorted by date."""
+
+    code: str
+    name: str
+    days: np.ndarray
+    n_repetitions: np.ndarray
+    weight: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def between(
+        self,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+    ) -> "ExerciseSnapshot":
+        """Return the sets performed between two dates, as views of the columns."""
+        start = 0
+        stop = len(self.days)
+        if start_date is not None:
+            start = np.searchsorted(self.days, to_days(start_date), side="left")
+        if end_date is not None:
+            stop = np.searchsorted(self.days, to_days(end_date), side="right")
+        return ExerciseSnapshot(
+            self.code,
+            self.name,
+            **{column: getattr(self, column)[start:stop] for column in COLUMNS},
+        )
+
+
+@dataclass(frozen=True)
+class DailyStatistics:
+    """Statistics of the days with sets, as arrays aligned with `days`."""
+
+    name: str | None
+    days: np.ndarray
+    values: dict[str, np.ndarray]
+
+
+def _daily_statistics(name: str | None, sets: ExerciseSnapshot) -> DailyStatistics:
+    days, starts, counts = np.unique(sets.days, return_index=True, return_counts=True)
+    return DailyStatistics(
+        name,
+        days,
+        {
+            "n_sets": counts,
+            "total_volume": np.add.reduceat(
+                sets.volume, starts, dtype=np.float64
+            ).round(1),
+            "total_repetitions": np.add.reduceat(
+                sets.n_repetitions, starts, dtype=np.int64
+            ),
+            "max_weight": np.maximum.reduceat(sets.weight, starts)
+            .astype(np.float64)
+            .round(1),
+        },
+    )
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Snapshots of all the exercises, by code, at a version of the data."""
+
+    version: str
+    exercises: dict[str, ExerciseSnapshot]
+
+    def between(
+        self,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+        exercises: Iterable[str] | None = None,
+    ) -> list[ExerciseSnapshot]:
+        """Return the non-empty snapshots of some exercises between two dates."""
+        codes = sorted(self.exercises) if exercises is None else exercises
+        sets = (
+            self.exercises[code].between(start_date, end_date)
+            for code in codes
+            if code in self.exercises
+        )
+        return [exercise_sets for exercise_sets in sets if len(exercise_sets)]
+
+    def daily_statistics(
+        self,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        exercises: Iterable[str] | None = None,
+    ) -> dict[str | None, DailyStatistics]:
+        """Statistics of the days between two dates with sets.
+
+        Statistics are of each exercise whose code is in `exercises`, if given,
+        or of all the exercises together, keyed by None.
+        """
+        if exercises is not None:
+            return {
+                sets.code: _daily_statistics(sets.name, sets)
+                for sets in self.between(start_date, end_date, exercises)
+            }
+        all_sets = self.between(start_date, end_date)
+        if not all_sets:
+            return {}
+        columns = {
+            column: np.concatenate([getattr(sets, column) for sets in all_sets])
+            for column in COLUMNS
+        }
+        order = np.argsort(columns["days"], kind="stable")
+        sets = ExerciseSnapshot(
+            None, None, **{name: values[order] for name, values in columns.items()}
+        )
+        return {None: _daily_statistics(None, sets)}
+
+    def to_dataframe(
+        self,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+    ) -> pd.DataFrame:
+        """Sets between two dates, like `SetOfExerciseQuerySet.to_dataframe`.
+
+        Sets of the same day are ordered by the code of their exercise, instead
+        of by id.
+        """
+        all_sets = self.between(start_date, end_date)
+
+        def concatenate(column: str, dtype) -> np.ndarray:
+            if not all_sets:
+                return np.array([], dtype=dtype)
+            return np.concatenate(
+                [getattr(sets, column) for sets in all_sets], dtype=dtype
+            )
+
+        days = concatenate("days", np.int64)
+        order = np.argsort(days, kind="stable")
+        codes = np.repeat(
+            np.array([sets.code for sets in all_sets], dtype=object),
+            [len(sets) for sets in all_sets],
+        )
+        return pd.DataFrame(
+            {
+                "date": pd.to_datetime(days[order].astype("datetime64[D]")),
+                "exercise": pd.Categorical(
+                    codes[order], categories=sorted(self.exercises)
+                ),
+                "n_repetitions": concatenate("n_repetitions", np.int32)[order],
+                "weight": concatenate("weight", np.float64)[order].round(1),
+                "volume": concatenate("volume", np.float64)[order].round(1),
+            }
+        )
+
+
+def _read_manifest(directory: Path) -> dict | None:
+    try:
+        return json.loads((directory / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _column_path(directory: Path, entry: dict, column: str) -> Path:
+    return directory / str(entry["id"]) / f"{column}-{entry['generation']}.npy"
+
+
+def load() -> Snapshot | None:
+    """Return the snapshots, memory-mapped, if they are of the current data.
+
+    Return None if snapshots are disabled, missing or out of date. Snapshots
+    are loaded once per version of the data by every process.
+    """
+    global _loaded
+    directory = get_directory()
+    if directory is None:
+        return None
+    with read_only_database():
+        version = DataVersion.objects.current().key
+    snapshot = _loaded
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    manifest = _read_manifest(directory)
+    if manifest is None or manifest["key"] != version:
+        return None
+    try:
+        exercises = {
+            code: ExerciseSnapshot(
+                code,
+                entry["name"],
+                **{
+                    column: np.load(
+                        _column_path(directory, entry, column), mmap_mode="r"
+                    )
+                    for column in COLUMNS
+                },
+            )
+            for code, entry in manifest["exercises"].items()
+        }
+    except (OSError, ValueError):
+        # Files replaced by a refresh meanwhile.
+        return None
+    _loaded = Snapshot(version, exercises)
+    return _loaded
+
+
+def sets_dataframe(
+    start_date: datetime.date | None = None, end_date: datetime.date | None = None
+) -> pd.DataFrame:
+    """Sets between two dates, from the snapshots if they are up to date.
+
+    See `workouts.analytics` for vectorized analytics on the result.
+    """
+    snapshot = load()
+    if snapshot is not None:
+        return snapshot.to_dataframe(start_date, end_date)
+    return SetOfExercise.objects.to_dataframe(start_date, end_date)
+
+
+@contextlib.contextmanager
+def _lock(directory: Path) -> Iterator[None]:
+    """Let a single process write the snapshots at a time."""
+    with open(directory / ".lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _save_atomically(path: Path, write) -> None:
+    """Write a file, replacing it at once, so readers never see it half written.
+
+    Readers keep the memory maps of replaced files.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+        write(file)
+    os.replace(file.name, path)
+
+
+def _write_exercise(directory: Path, entry: dict, rows: list[tuple]) -> None:
+    columns = list(zip(*rows)) if rows else [()] * 4
+    days, n_repetitions, weight, volume = columns
+    values = {
+        "days": [to_days(date) for date in days],
+        "n_repetitions": n_repetitions,
+        "weight": weight,
+        "volume": volume,
+    }
+    for column, dtype in COLUMNS.items():
+        array = np.array(values[column], dtype=dtype)
+        _save_atomically(
+            _column_path(directory, entry, column),
+            lambda file, array=array: np.save(file, array),
+        )
+
+
+def _remove_old_files(directory: Path, entries: dict[int, dict]) -> None:
+    for path in directory.iterdir():
+        if not path.is_dir() or not path.name.isdigit():
+            continue
+        entry = entries.get(int(path.name))
+        for file in path.iterdir():
+            if entry is None or not file.name.endswith(f"-{entry['generation']}.npy"):
+                file.unlink(missing_ok=True)
+        if entry is None:
+            path.rmdir()
+
+
+def write(exercise_ids: Iterable[int] | None = None, n_writes: int = 0) -> None:
+    """Write the snapshots of some exercises, or of all of them.
+
+    Writing only some exercises is enough when the snapshots were written
+    exactly `n_writes` versions of the data ago, and only those exercises were
+    written since. Otherwise, all snapshots are written from scratch.
+    """
+    directory = get_directory()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    with _lock(directory):
+        # The version is read before the sets: sets written in between are
+        # refreshed by their own writes, once they commit.
+        version = DataVersion.objects.current()
+        manifest = _read_manifest(directory)
+        entries = {}
+        if (
+            exercise_ids is not None
+            and manifest is not None
+            and manifest["version"] + n_writes == version.version
+        ):
+            entries = {entry["id"]: entry for entry in manifest["exercises"].values()}
+            exercise_ids = set(exercise_ids)
+        else:
+            exercise_ids = None
+        exercises = {exercise.pk: exercise for exercise in Exercise.objects.all()}
+        if exercise_ids is not None:
+            # Exercises not written yet, e.g. just created, are written too.
+            exercise_ids |= exercises.keys() - entries.keys()
+        else:
+            exercise_ids = set(exercises)
+        rows = {exercise_id: [] for exercise_id in exercise_ids}
+        sets = SetOfExercise.objects.all()
+        if exercise_ids != exercises.keys():
+            sets = sets.filter(exercise__in=exercise_ids)
+        for exercise_id, *row in sets.order_by(
+            "exercise", "workout_date", "id"
+        ).values_list(
+            "exercise",
+            "workout_date",
+            "n_repetitions",
+            models.functions.Cast("weight", models.FloatField()),
+            models.functions.Cast("volume", models.FloatField()),
+        ):
+            rows[exercise_id].append(row)
+        entries = {pk: entry for pk, entry in entries.items() if pk in exercises}
+        for exercise_id in exercise_ids & exercises.keys():
+            entries[exercise_id] = {
+                "id": exercise_id,
+                "generation": version.version,
+                "n_sets": len(rows[exercise_id]),
+            }
+            _write_exercise(directory, entries[exercise_id], rows[exercise_id])
+        for exercise_id, entry in entries.items():
+            entry["code"] = exercises[exercise_id].code
+            entry["name"] = exercises[exercise_id].name
+        manifest = {
+            "version": version.version,
+            "key": version.key,
+            "exercises": {entry.pop("code"): entry for entry in entries.values()},
+        }
+        _save_atomically(
+            directory / MANIFEST,
+            lambda file: file.write(json.dumps(manifest, indent=2).encode()),
+        )
+        _remove_old_files(directory, entries)
+
+
+class _PendingRefresh:
+    """Exercises written by a transaction, and its number of writes."""
+
+    def __init__(self):
+        self.exercise_ids = set()
+        self.n_writes = 0
+        self.done = False
+
+    def add(self, exercise_ids: Iterable[int], n_writes: int) -> None:
+        self.exercise_ids.update(exercise_ids)
+        self.n_writes += n_writes
+
+    def __call__(self):
+        if self.done:
+            return
+        self.done = True
+        deferred = getattr(_pending, "deferred", None)
+        if deferred is not None:
+            deferred.add(self.exercise_ids, self.n_writes)
+        else:
+            write(self.exercise_ids, self.n_writes)
+
+
+def schedule_refresh(exercise_ids: Iterable[int] = ()) -> None:
+    """Refresh the snapshots of some exercises once the transaction commits.
+
+    Must be called once for every bump of the `DataVersion`, after it.
+    """
+    if get_directory() is None:
+        return
+    pending = getattr(_pending, "refresh", None)
+    if pending is None or pending.done:
+        pending = _pending.refresh = _PendingRefresh()
+    pending.add(exercise_ids, 1)
+    # Every write registers the refresh, as the callbacks of a transaction rolled
+    # back are dropped: the first callback run refreshes all the writes. Writes
+    # rolled back are counted too, so the next refresh rewrites everything.
+    transaction.on_commit(pending)
+
+
+@contextlib.contextmanager
+def deferred_refresh() -> Iterator[None]:
+    """Refresh the snapshots once, at the end of the block, not after each commit.
+
+    For blocks committing many transactions, like imports committing every
+    chunk of rows, which would otherwise rewrite the whole history of the
+    exercises they touch after every chunk. Snapshots are out of date, and
+    not used, until the end of the block.
+    """
+    if get_directory() is None or getattr(_pending, "deferred", None) is not None:
+        yield
+        return
+    deferred = _pending.deferred = _PendingRefresh()
+    try:
+        yield
+    finally:
+        _pending.deferred = None
+        if deferred.n_writes:
+            deferred()
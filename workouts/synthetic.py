@@ -0,0 +1,123 @@
+"""Generate realistic, reproducible diaries of workouts, for benchmarks.
+
+Like `imports`, nothing in this module touches the database: rows are
+generated as `imports.Row`s, to be written to the database or to files.
+"""
+
+import datetime
+import string
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+
+from .imports import REQUIRED_COLUMNS, Row
+
+# Popular exercises, with the typical weight of a set of 5 repetitions.
+COMMON_EXERCISES = [
+    ("SQ", "Squat", 80.0),
+    ("BP", "Bench Press", 60.0),
+    ("DL", "Deadlift", 100.0),
+    ("OHP", "Overhead Press", 40.0),
+    ("ROW", "Barbell Row", 50.0),
+    ("PU", "Weighted Pull Up", 10.0),
+    ("DIP", "Weighted Dip", 15.0),
+    ("CU", "Biceps Curl", 15.0),
+    ("LP", "Leg Press", 120.0),
+    ("LR", "Lateral Raise", 8.0),
+]
+NOTES = ["easy", "hard", "new shoes", "felt tired", "pause reps"]
+DEFAULT_SETS_PER_DAY = 20
+DEFAULT_DAYS_PER_WEEK = 4
+
+
+@dataclass(frozen=True)
+class SyntheticExercise:
+    code: str
+    name: str
+    weight: float
+
+
+def get_exercises(n_exercises: int) -> list[SyntheticExercise]:
+    """Return `n_exercises` exercises, the common ones first."""
+    max_exercises = len(COMMON_EXERCISES) + 26 * 27
+    if n_exercises > max_exercises:
+        raise ValueError(f"At most {max_exercises} exercises can be generated.")
+    exercises = [
+        SyntheticExercise(code, name, weight)
+        for code, name, weight in COMMON_EXERCISES[:n_exercises]
+    ]
+    letters = string.ascii_uppercase
+    for i in range(n_exercises - len(exercises)):
+        # Codes of other exercises start with X, which no common one does.
+        suffix = letters[i // 26 % 26] + letters[i % 26] if i >= 26 else letters[i]
+        code = f"X{suffix}"
+        exercises.append(SyntheticExercise(code, f"Exercise {code.title()}", 30.0))
+    return exercises
+
+
+def iter_rows(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    exercises: list[SyntheticExercise],
+    sets_per_day: int = DEFAULT_SETS_PER_DAY,
+    days_per_week: float = DEFAULT_DAYS_PER_WEEK,
+    seed: int = 0,
+) -> Iterator[Row]:
+    """Yield the sets of a diary between two dates, day by day.
+
+    On average, there is a workout on `days_per_week` days of a week, with
+    `sets_per_day` sets of 3 to 6 exercises. Weights grow slowly over time,
+    and are lower for sets with more repetitions.
+    """
+    rng = np.random.default_rng(seed)
+    n_days = (end_date - start_date).days + 1
+    for i_day in range(n_days):
+        if rng.random() >= days_per_week / 7:
+            continue
+        date = start_date + datetime.timedelta(days=i_day)
+        n_sets = max(1, rng.poisson(sets_per_day))
+        n_workout_exercises = min(len(exercises), int(rng.integers(3, 7)))
+        workout_exercises = rng.choice(
+            len(exercises), size=n_workout_exercises, replace=False
+        )
+        i_exercises = np.sort(rng.choice(workout_exercises, size=n_sets))
+        repetitions = np.clip(rng.gamma(2.5, 3.0, size=n_sets).round(), 1, 30)
+        # Up to 50% stronger after 5 years, about 3% lighter per extra repetition.
+        progress = 1 + 0.5 * min(i_day / (5 * 365), 1)
+        jitter = rng.normal(1, 0.05, size=n_sets)
+        has_notes = rng.random(n_sets) < 0.05
+        i_notes = rng.integers(len(NOTES), size=n_sets)
+        for i_set in range(n_sets):
+            exercise = exercises[i_exercises[i_set]]
+            weight = (
+                exercise.weight
+                * progress
+                * jitter[i_set]
+                * (1 - 0.03 * (repetitions[i_set] - 5))
+            )
+            # Plates come in steps of half a kilogram.
+            weight = max(0.5, round(weight * 2) / 2)
+            yield Row(
+                code=exercise.code,
+                date=date,
+                n_repetitions=int(repetitions[i_set]),
+                weight=Decimal(f"{weight:.1f}"),
+                notes=NOTES[i_notes[i_set]] if has_notes[i_set] else None,
+            )
+
+
+def write_excel(path: Path, rows: Iterable[Row]) -> int:
+    """Write rows to an Excel file that can be loaded, returning how many."""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(REQUIRED_COLUMNS + ["Notes"])
+    n_rows = 0
+    for row in rows:
+        sheet.append([row.date, row.code, row.weight, row.n_repetitions, row.notes])
+        n_rows += 1
+    workbook.save(path)
+    return n_rows
@@ -0,0 +1,9 @@
+import pytest
+
+from workouts.models import Exercise
+
+
+@pytest.fixture(autouse=True)
+def invalidate_exercise_cache():
+    """Tests roll back or flush exercises without signals, so forget them."""
+    Exercise.objects.invalidate_cache()
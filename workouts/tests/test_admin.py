@@ -0,0 +1,123 @@
+import datetime
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from workouts.admin import EstimatedCountPaginator
+from workouts.models import Exercise, SetOfExercise, Workout
+
+
+@pytest.fixture
+def sets(db):
+    exercises = [
+        Exercise.objects.create(code="BP", name="Bench Press"),
+        Exercise.objects.create(code="SQ", name="Squat"),
+    ]
+    workouts = [
+        Workout.objects.create(date=datetime.date(2023, 1, day)) for day in [1, 2]
+    ]
+    return SetOfExercise.objects.bulk_create(
+        SetOfExercise(
+            exercise=exercises[i % 2],
+            workout=workouts[i % 2],
+            n_repetitions=n_repetitions,
+            weight=50,
+        )
+        for i, n_repetitions in enumerate([3, 5, 8, 12, 20, 20])
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    caches["reports"].clear()
+
+
+def test_set_of_exercise_changelist_facets(admin_client, sets):
+    url = reverse("admin:workouts_setofexercise_changelist")
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert "BP: Bench Press (3)" in content
+    assert "Low (2)" in content
+    assert "Medium (1)" in content
+    assert "High (1)" in content
+    assert "Very High (2)" in content
+    # Facets of a filter ignore its own choice, but not the others.
+    content = admin_client.get(url, {"n_repetitions": ">15"}).content.decode()
+    assert "BP: Bench Press (1)" in content
+    assert "Low (2)" in content
+
+
+def test_set_of_exercise_changelist_queries_do_not_grow(admin_client, sets):
+    url = reverse("admin:workouts_setofexercise_changelist")
+    with CaptureQueriesContext(connection) as queries:
+        admin_client.get(url)
+    n_queries = len(queries)
+    SetOfExercise.objects.bulk_create(
+        SetOfExercise(
+            exercise=set_.exercise, workout=set_.workout, n_repetitions=1, weight=1
+        )
+        for set_ in sets
+    )
+    caches["reports"].clear()
+    with CaptureQueriesContext(connection) as queries:
+        admin_client.get(url)
+    assert len(queries) == n_queries
+
+
+def test_set_of_exercise_changelist_caches_facets(admin_client, sets):
+    url = reverse("admin:workouts_setofexercise_changelist")
+    admin_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        admin_client.get(url)
+    assert not any("GROUP BY" in query["sql"] for query in queries)
+
+
+def test_set_of_exercise_changelist_date_hierarchy(admin_client, sets):
+    response = admin_client.get(
+        reverse("admin:workouts_setofexercise_changelist"),
+        {"workout_date__year": 2023, "workout_date__month": 1, "workout_date__day": 2},
+    )
+    assert response.status_code == 200
+    assert response.context["cl"].result_count == 3
+
+
+def test_set_of_exercise_changelist_ordered_by_index(admin_client, sets):
+    response = admin_client.get(reverse("admin:workouts_setofexercise_changelist"))
+    result_list = response.context["cl"].result_list
+    assert [set_.pk for set_ in result_list] == [
+        set_.pk for set_ in sorted(sets, key=lambda set_: (set_.workout_date, set_.pk))
+    ][::-1]
+    assert "TEMP B-TREE" not in result_list.explain()
+
+
+def test_estimated_count_paginator(sets):
+    paginator = EstimatedCountPaginator(SetOfExercise.objects.order_by("pk"), 2)
+    assert paginator.count == 6
+    paginator = EstimatedCountPaginator(SetOfExercise.objects.order_by("pk"), 2)
+    paginator.max_count = 3
+    assert paginator.count == max(set_.pk for set_ in sets)
+    paginator = EstimatedCountPaginator(
+        SetOfExercise.objects.filter(n_repetitions__gt=1).order_by("pk"), 2
+    )
+    paginator.max_count = 3
+    assert paginator.count == 4
+
+
+def test_workout_changelist_statistics(admin_client, sets):
+    url = reverse("admin:workouts_workout_changelist")
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(url, {"o": "2"})
+    assert response.status_code == 200
+    workouts = list(response.context["cl"].result_list)
+    assert [(workout.n_exercises, workout.n_sets) for workout in workouts] == [
+        (1, 3),
+        (1, 3),
+    ]
+    Workout.objects.create(date=datetime.date(2023, 1, 3))
+    with CaptureQueriesContext(connection) as more_queries:
+        admin_client.get(url)
+    assert len(more_queries) == len(queries)
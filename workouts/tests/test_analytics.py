@@ -0,0 +1,68 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from workouts import analytics
+from workouts.models import Exercise, SetOfExercise, Workout
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "date": pd.to_datetime(
+                ["2000-01-03", "2000-01-03", "2000-01-05", "2000-01-10", "2000-01-12"]
+            ),
+            "exercise": pd.Categorical(["BP", "DL", "BP", "BP", "DL"]),
+            "n_repetitions": np.array([10, 5, 8, 10, 3], dtype=np.int32),
+            "weight": [50.0, 100.0, 55.0, 52.5, 110.0],
+            "volume": [500.0, 500.0, 440.0, 525.0, 330.0],
+        }
+    )
+
+
+def test_to_dataframe(db):
+    exercise = Exercise.objects.create(code="BP", name="Bench Press")
+    for day, weight in [(3, "50.5"), (1, "40.0"), (20, "60.0")]:
+        SetOfExercise.objects.create(
+            exercise=exercise,
+            workout=Workout.objects.create(date=datetime.date(2000, 1, day)),
+            n_repetitions=10,
+            weight=weight,
+        )
+    df = SetOfExercise.objects.to_dataframe(
+        start_date=datetime.date(2000, 1, 1), end_date=datetime.date(2000, 1, 10)
+    )
+    assert df["date"].tolist() == [pd.Timestamp(2000, 1, 1), pd.Timestamp(2000, 1, 3)]
+    assert df["exercise"].tolist() == ["BP", "BP"]
+    assert df["weight"].tolist() == [40.0, 50.5]
+    assert df["volume"].tolist() == [400.0, 505.0]
+    assert SetOfExercise.objects.none().to_dataframe().empty
+
+
+def test_rolling_volume(df):
+    volume = analytics.rolling_volume(df, window=3)
+    assert len(volume) == 10
+    assert volume.loc["2000-01-05", "volume"] == pytest.approx((1000 + 0 + 440) / 3)
+    per_exercise = analytics.rolling_volume(df, window=1, per_exercise=True)
+    assert per_exercise.loc["2000-01-03"].to_dict() == {"BP": 500.0, "DL": 500.0}
+
+
+def test_weekly_progression(df):
+    progression = analytics.weekly_progression(df)
+    bench_press = progression.loc["BP"]
+    assert bench_press.index.tolist() == [
+        pd.Timestamp(2000, 1, 3),
+        pd.Timestamp(2000, 1, 10),
+    ]
+    assert bench_press["max_weight"].tolist() == [55.0, 52.5]
+    assert bench_press["max_weight_change"].tolist()[1] == -2.5
+    assert bench_press["total_volume_change"].tolist()[1] == 525.0 - 940.0
+
+
+def test_percentiles(df):
+    result = analytics.percentiles(df, q=[0.5])
+    assert result.loc["BP", ("weight", 0.5)] == 52.5
+    assert result.loc["DL", ("n_repetitions", 0.5)] == 4
@@ -0,0 +1,240 @@
+import datetime
+import json
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from workouts import pagination
+from workouts.forms import LogSetForm
+from workouts.models import Exercise, PersonalRecord, SetOfExercise, Workout
+
+START_DATE = datetime.date(2023, 1, 1)
+
+
+@pytest.fixture
+def sets(db):
+    exercises = [
+        Exercise.objects.create(code="BP", name="Bench Press"),
+        Exercise.objects.create(code="SQ", name="Squat"),
+    ]
+    workouts = Workout.objects.bulk_create(
+        Workout(date=START_DATE + datetime.timedelta(days=day)) for day in range(10)
+    )
+    return SetOfExercise.objects.bulk_create(
+        SetOfExercise(
+            exercise=exercises[i % 2],
+            workout=workout,
+            n_repetitions=n_repetitions,
+            weight=50,
+        )
+        for workout in workouts
+        for i, n_repetitions in enumerate([5, 8, 20])
+    )
+
+
+def _get_all(client, url, params) -> tuple[list[dict], int]:
+    """Follow the pages of an endpoint, returning its results and pages."""
+    results = []
+    n_pages = 0
+    while url is not None:
+        response = client.get(url, params)
+        assert response.status_code == 200
+        data = response.json()
+        results.extend(data["results"])
+        n_pages += 1
+        url, params = data["next"], {}
+    return results, n_pages
+
+
+def test_api_sets_pages(client, sets):
+    results, n_pages = _get_all(client, reverse("api_sets"), {"limit": 7})
+    assert n_pages == 5
+    expected = sorted(sets, key=lambda set_: (set_.workout_date, set_.pk))[::-1]
+    assert [result["id"] for result in results] == [set_.pk for set_ in expected]
+    assert results[0] == {
+        "id": expected[0].pk,
+        "date": "2023-01-10",
+        "workout": expected[0].workout_id,
+        "exercise": "BP",
+        "n_repetitions": 20,
+        "weight": "50.0",
+        "volume": "1000.0",
+        "notes": None,
+    }
+
+
+def test_api_sets_filters(client, sets):
+    results, _ = _get_all(
+        client,
+        reverse("api_sets"),
+        {
+            "exercise": "bench press",
+            "start_date": "2023-01-03",
+            "end_date": "2023-01-04",
+            "repetitions_range": "1-5",
+            "limit": 1,
+        },
+    )
+    assert [(result["date"], result["exercise"]) for result in results] == [
+        ("2023-01-04", "BP"),
+        ("2023-01-03", "BP"),
+    ]
+
+
+def test_api_sets_page_is_one_query(client, sets):
+    response = client.get(reverse("api_sets"), {"limit": 2})
+    with CaptureQueriesContext(connection) as queries:
+        client.get(reverse("api_sets"), {"cursor": response.json()["next_cursor"]})
+    assert len(queries) == 1
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"cursor": "not a cursor"},
+        {"cursor": pagination.encode_cursor(["2023-01-01"])},
+        {"cursor": pagination.encode_cursor(["yesterday", 1])},
+        {"cursor": pagination.encode_cursor([123, 1])},
+        {"cursor": pagination.encode_cursor([{"a": 1}, 1])},
+        {"cursor": pagination.encode_cursor(["2023-01-01", [1]])},
+        {"exercise": "DL"},
+        {"repetitions_range": "2-3"},
+        {"limit": 0},
+    ],
+)
+def test_api_sets_invalid(client, sets, params):
+    response = client.get(reverse("api_sets"), params)
+    assert response.status_code == 400
+    assert response.json()["errors"]
+
+
+def test_api_workouts(client, sets):
+    results, n_pages = _get_all(
+        client, reverse("api_workouts"), {"start_date": "2023-01-06", "limit": 2}
+    )
+    assert n_pages == 3
+    assert [result["date"] for result in results] == [
+        f"2023-01-{day:02}" for day in range(10, 5, -1)
+    ]
+    assert results[0]["n_exercises"] == 2
+    assert results[0]["n_sets"] == 3
+    assert results[0]["total_repetitions"] == 33
+
+
+def test_api_exercises(client, sets):
+    results, n_pages = _get_all(client, reverse("api_exercises"), {"limit": 1})
+    assert n_pages == 2
+    assert [result["code"] for result in results] == ["BP", "SQ"]
+
+
+def _log_workout(client, data):
+    return client.post(
+        reverse("api_log_workout"), json.dumps(data), content_type="application/json"
+    )
+
+
+def _session(n_sets: int, date: str = "2023-01-10") -> dict:
+    return {
+        "date": date,
+        "sets": [
+            {"exercise": "BP", "n_repetitions": 5, "weight": "60"},
+            {"exercise": "squat", "n_repetitions": 5, "weight": 80.5, "notes": "Easy"},
+        ]
+        * (n_sets // 2),
+    }
+
+
+def test_api_log_workout(client, sets):
+    response = _log_workout(client, _session(30))
+    assert response.status_code == 201
+    result = response.json()
+    workout = Workout.objects.get(date=datetime.date(2023, 1, 10))
+    assert result["workout"] == workout.pk
+    created = SetOfExercise.objects.filter(pk__in=result["sets"])
+    assert created.count() == 30
+    assert workout.setofexercise_set.count() == 33
+    assert created.filter(exercise__code="SQ", weight=80.5, notes="Easy").count() == 15
+    assert PersonalRecord.objects.get(exercise__code="SQ", kind="weight").value == 80.5
+
+
+def test_api_log_workout_queries_do_not_grow_with_sets(client, sets):
+    with CaptureQueriesContext(connection) as queries_few:
+        _log_workout(client, _session(2, "2023-02-01"))
+    with CaptureQueriesContext(connection) as queries_many:
+        _log_workout(client, _session(30, "2023-02-02"))
+    assert len(queries_many) <= len(queries_few)
+
+
+def test_api_log_workout_new_date(client, sets):
+    response = _log_workout(
+        client,
+        {
+            "date": "2023-02-01",
+            "sets": [{"exercise": "BP", "n_repetitions": 5, "weight": 50}],
+        },
+    )
+    assert response.status_code == 201
+    assert Workout.objects.get(pk=response.json()["workout"]).date == datetime.date(
+        2023, 2, 1
+    )
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        [],
+        {"date": "2023-02-01"},
+        {"date": "2023-02-01", "sets": []},
+        {
+            "date": "yesterday",
+            "sets": [{"exercise": "BP", "n_repetitions": 5, "weight": 50}],
+        },
+        {
+            "date": "2023-02-01",
+            "sets": [{"exercise": "DL", "n_repetitions": 5, "weight": 50}],
+        },
+        {
+            "date": "2023-02-01",
+            "sets": [
+                {"exercise": "BP", "n_repetitions": 5, "weight": 50},
+                {"exercise": "BP", "n_repetitions": 0, "weight": 50.25},
+            ],
+        },
+    ],
+)
+def test_api_log_workout_invalid(client, sets, data):
+    n_sets = SetOfExercise.objects.count()
+    response = _log_workout(client, data)
+    assert response.status_code == 400
+    assert response.json()["errors"]
+    assert SetOfExercise.objects.count() == n_sets
+    assert not Workout.objects.filter(date=datetime.date(2023, 2, 1)).exists()
+
+
+@pytest.mark.parametrize(
+    "weight, valid",
+    [("-20", True), ("-99999.9", True), ("99999.9", True), ("100000", False)],
+)
+def test_log_set_form_weight(weight, valid):
+    form = LogSetForm({"exercise": "BP", "n_repetitions": 5, "weight": weight})
+    assert form.is_valid() == valid
+
+
+def test_api_log_workout_requires_csrf_token(sets):
+    client = Client(enforce_csrf_checks=True)
+    data = {
+        "date": "2023-02-01",
+        "sets": [{"exercise": "BP", "n_repetitions": 5, "weight": 50}],
+    }
+    assert _log_workout(client, data).status_code == 403
+    client.cookies["csrftoken"] = token = "a" * 32
+    response = client.post(
+        reverse("api_log_workout"),
+        json.dumps(data),
+        content_type="application/json",
+        headers={"X-CSRFToken": token},
+    )
+    assert response.status_code == 201
@@ -0,0 +1,104 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+
+from workouts import pagination
+from workouts.models import Exercise, SetOfExercise, Tombstone, Workout
+
+
+@pytest.fixture(autouse=True)
+def no_changes_delay(settings):
+    settings.WORKOUTS_CHANGES_DELAY = 0
+
+
+@pytest.fixture
+def sets(db):
+    exercise = Exercise.objects.create(code="BP", name="Bench Press")
+    workouts = Workout.objects.bulk_create(
+        Workout(date=datetime.date(2023, 1, day)) for day in [1, 2]
+    )
+    return SetOfExercise.objects.bulk_create(
+        SetOfExercise(exercise=exercise, workout=workout, n_repetitions=5, weight=50)
+        for workout in workouts
+        for _ in range(2)
+    )
+
+
+def _sync(client, cursor=None, limit=2) -> tuple[list[dict], str | None]:
+    """Get the changes after a cursor, batch by batch, and the last cursor."""
+    changes = []
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        response = client.get(reverse("api_changes"), params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["changes"]) <= limit
+        changes.extend(data["changes"])
+        cursor = data["cursor"]
+        if not data["has_more"]:
+            return changes, cursor
+
+
+def test_bulk_updates_set_modified(sets):
+    workout = sets[0].workout
+    modified = sets[0].modified
+    workout.date = datetime.date(2023, 1, 3)
+    workout.save()
+    sets[0].refresh_from_db()
+    assert sets[0].modified > modified
+    assert sets[0].workout_date == workout.date
+
+
+def test_deletes_leave_tombstones(sets):
+    workout = sets[0].workout
+    expected = [
+        ("set_of_exercise", sets[0].pk),
+        ("set_of_exercise", sets[1].pk),
+        ("workout", workout.pk),
+    ]
+    workout.delete()
+    assert sorted(Tombstone.objects.values_list("model", "object_id")) == expected
+
+
+def test_changes_since_cursor(client, sets):
+    changes, cursor = _sync(client)
+    assert [(change["model"], change["id"]) for change in changes] == [
+        ("exercise", sets[0].exercise_id),
+        ("workout", sets[0].workout_id),
+        ("workout", sets[2].workout_id),
+    ] + [("set_of_exercise", set_.pk) for set_ in sets]
+    assert changes[-1]["data"]["exercise"] == "BP"
+    assert _sync(client, cursor) == ([], cursor)
+
+    sets[1].n_repetitions = 6
+    sets[1].save()
+    deleted_pk = sets[2].pk
+    sets[2].delete()
+    changes, cursor = _sync(client, cursor)
+    assert [
+        (change["model"], change["id"], change["deleted"]) for change in changes
+    ] == [
+        ("set_of_exercise", sets[1].pk, False),
+        ("set_of_exercise", deleted_pk, True),
+    ]
+    assert changes[0]["data"]["n_repetitions"] == 6
+
+
+def test_changes_are_delayed(client, settings, sets):
+    settings.WORKOUTS_CHANGES_DELAY = 60
+    assert _sync(client) == ([], None)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        pagination.encode_cursor(["2023-01-01T00:00:00+00:00", 1]),
+        pagination.encode_cursor(["yesterday", 0, 1]),
+        pagination.encode_cursor(["2023-01-01T00:00:00+00:00", 9, 1]),
+    ],
+)
+def test_changes_invalid_cursor(client, db, cursor):
+    response = client.get(reverse("api_changes"), {"cursor": cursor})
+    assert response.status_code == 400
@@ -0,0 +1,132 @@
+import datetime
+
+import numpy as np
+import pytest
+from django.urls import reverse
+
+from workouts import charts
+from workouts.models import Exercise, ExerciseRollup, SetOfExercise, Workout
+
+
+def test_lttb_keeps_everything_within_budget():
+    x = np.arange(10)
+    assert charts.lttb(x, x**2, 10).tolist() == list(range(10))
+
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[500] = 100.0
+    y[700] = -100.0
+    kept = charts.lttb(x, y, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0
+    assert kept[-1] == 999
+    assert {500, 700} <= set(kept.tolist())
+    assert (np.diff(kept) > 0).all()
+
+
+@pytest.fixture
+def sets_over_years(db):
+    exercises = [
+        Exercise.objects.create(code="BP", name="Bench Press"),
+        Exercise.objects.create(code="DL", name="Deadlift"),
+    ]
+    start_date = datetime.date(2020, 1, 1)
+    workouts = Workout.objects.bulk_create(
+        Workout(date=start_date + datetime.timedelta(days=day)) for day in range(1000)
+    )
+    SetOfExercise.objects.bulk_create(
+        SetOfExercise(
+            workout=workout,
+            exercise=exercises[i % 2],
+            n_repetitions=1 + i % 12,
+            weight=20 + i % 50,
+        )
+        for i, workout in enumerate(workouts)
+    )
+    ExerciseRollup.objects.rebuild()
+    return start_date, workouts[-1].date
+
+
+def test_chart_series_downsampled(sets_over_years):
+    start_date, end_date = sets_over_years
+    series = charts.get_chart_series(
+        start_date,
+        end_date,
+        metrics=["total_volume", "max_weight"],
+        exercises=["BP"],
+        n_points=50,
+    )
+    assert [(s["exercise"], s["metric"]) for s in series] == [
+        ("BP", "total_volume"),
+        ("BP", "max_weight"),
+    ]
+    for s in series:
+        assert len(s["data"]) == 50
+        assert s["data"][0]["x"] == start_date.isoformat()
+    assert series[0]["label"] == "Bench Press: Volume"
+
+
+def test_chart_series_invalid_metric(db):
+    with pytest.raises(ValueError):
+        charts.get_chart_series(
+            datetime.date(2020, 1, 1), datetime.date(2020, 2, 1), metrics=["hello"]
+        )
+
+
+def test_chart_data_view(client, sets_over_years):
+    start_date, end_date = sets_over_years
+    response = client.get(
+        reverse("chart_data"),
+        {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "metrics": ["n_sets", "total_repetitions"],
+            "n_points": 100,
+        },
+    )
+    assert response.status_code == 200
+    series = response.json()["series"]
+    assert [s["exercise"] for s in series] == [None, None]
+    assert [len(s["data"]) for s in series] == [100, 100]
+
+    response = client.get(reverse("chart_data"), {"start_date": "hello"})
+    assert response.status_code == 400
+    assert not response.has_header("ETag")
+    assert not response.has_header("Last-Modified")
+
+
+def test_chart_data_conditional_requests(
+    client, sets_over_years, django_assert_num_queries
+):
+    start_date, end_date = sets_over_years
+    url = reverse("chart_data")
+    params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    response = client.get(url, params)
+    assert response.status_code == 200
+    etag = response["ETag"]
+    assert not etag.startswith("W/")
+    assert "no-cache" in response["Cache-Control"]
+
+    with django_assert_num_queries(1):
+        response = client.get(url, params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    response = client.get(
+        url, params, headers={"If-Modified-Since": response["Last-Modified"]}
+    )
+    assert response.status_code == 304
+
+    Exercise.objects.create(code="SQ", name="Squat")
+    response = client.get(url, params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    response = client.get(
+        url, {"start_date": "hello"}, headers={"If-None-Match": response["ETag"]}
+    )
+    assert response.status_code == 400
+
+
+def test_chart_data_only_get(client, db):
+    assert client.post(reverse("chart_data")).status_code == 405
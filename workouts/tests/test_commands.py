@@ -0,0 +1,245 @@
+import datetime
+import json
+import shutil
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Max, Min
+
+from workouts.models import (
+    Exercise,
+    ExerciseRollup,
+    ImportRun,
+    PersonalRecord,
+    SetOfExercise,
+)
+
+DIR_TEST_DATA = Path(__file__).parent.resolve() / "data"
+DIR_EXCEL = DIR_TEST_DATA / "excel"
+
+
+@pytest.fixture
+def monthly_files(tmp_path):
+    df = pd.read_excel(DIR_EXCEL / "correct_1workout_2exercises.xlsx")
+    for month in range(1, 4):
+        df.assign(Date=df["Date"] + pd.DateOffset(months=month)).to_excel(
+            tmp_path / f"2000-{month:02}.xlsx", index=False
+        )
+    df.to_csv(tmp_path / "2000-04.csv", index=False)
+    (tmp_path / "README.txt").write_text("Not a workout file")
+    return tmp_path
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_load_workouts_directory(db, monthly_files, jobs):
+    stdout = StringIO()
+    call_command(
+        "load_workouts", str(monthly_files), jobs=jobs, chunk_size=2, stdout=stdout
+    )
+    assert SetOfExercise.objects.count() == 4 * 6
+    assert SetOfExercise.objects.values("workout").distinct().count() == 4
+    output = stdout.getvalue()
+    assert (
+        "2000-04.csv: 6 sets from 6 rows, 0 already loaded, 0 deleted, 0 errors"
+        in output
+    )
+    assert "Loaded 24 new sets from 4 files" in output
+
+
+def test_load_workouts_glob(db, monthly_files):
+    call_command(
+        "load_workouts", str(monthly_files / "*.xlsx"), jobs=1, stdout=StringIO()
+    )
+    assert SetOfExercise.objects.count() == 3 * 6
+
+
+def test_load_workouts_single_file(db, tmp_path):
+    file = tmp_path / "workouts.xlsx"
+    shutil.copy(DIR_EXCEL / "correct_with_notes.xlsx", file)
+    call_command("load_workouts", str(file), stdout=StringIO())
+    assert SetOfExercise.objects.count() == pd.read_excel(file).shape[0]
+
+
+def test_load_workouts_again_is_idempotent(db, monthly_files):
+    call_command("load_workouts", str(monthly_files), jobs=1, stdout=StringIO())
+    stdout = StringIO()
+    call_command("load_workouts", str(monthly_files), jobs=1, stdout=stdout)
+    assert SetOfExercise.objects.count() == 4 * 6
+    assert stdout.getvalue().count("already loaded, skipped") == 4
+    assert "Loaded 0 new sets from 0 files" in stdout.getvalue()
+    call_command(
+        "load_workouts", str(monthly_files), jobs=1, force=True, stdout=StringIO()
+    )
+    assert SetOfExercise.objects.count() == 4 * 6
+    assert ImportRun.objects.count() == 4
+
+
+def test_load_workouts_appended_rows(db, tmp_path):
+    file = tmp_path / "workouts.csv"
+    df = pd.read_excel(DIR_EXCEL / "correct_1workout_2exercises.xlsx")
+    df.iloc[:4].to_csv(file, index=False)
+    call_command("load_workouts", str(file), stdout=StringIO())
+    assert SetOfExercise.objects.count() == 4
+    pd.concat([df, df.iloc[:1]]).to_csv(file, index=False)
+    stdout = StringIO()
+    call_command("load_workouts", str(file), stdout=stdout)
+    assert SetOfExercise.objects.count() == 7
+    assert "3 sets from 7 rows, 4 already loaded" in stdout.getvalue()
+
+
+def test_load_workouts_edited_rows(db, tmp_path):
+    file = tmp_path / "workouts.csv"
+    df = pd.read_excel(DIR_EXCEL / "correct_1workout_2exercises.xlsx")
+    df.to_csv(file, index=False)
+    call_command("load_workouts", str(file), stdout=StringIO())
+    df.loc[0, "Weight"] = 55.0
+    df.drop(index=5).to_csv(file, index=False)
+    stdout = StringIO()
+    call_command("load_workouts", str(file), stdout=stdout)
+    assert "1 sets from 5 rows, 4 already loaded, 2 deleted" in stdout.getvalue()
+    assert sorted(SetOfExercise.objects.values_list("weight", flat=True)) == sorted(
+        Decimal(str(weight)) for weight in df["Weight"].iloc[:5]
+    )
+
+
+def test_load_workouts_commits_every_chunk(db, tmp_path):
+    file = tmp_path / "workouts.csv"
+    pd.read_excel(DIR_EXCEL / "correct_1workout_2exercises.xlsx").to_csv(
+        file, index=False
+    )
+    with open(file, "a") as csv_file:
+        csv_file.write('2000-01-01,"BP,50,10\n')
+    stdout, stderr = StringIO(), StringIO()
+    call_command("load_workouts", str(file), chunk_size=2, stdout=stdout, stderr=stderr)
+    assert SetOfExercise.objects.count() == 6
+    assert "after loading 6 sets" in stderr.getvalue()
+    assert "1 files failed" in stdout.getvalue()
+    assert not ImportRun.objects.exists()
+
+
+def test_load_workouts_warns_about_slow_chunks(db, tmp_path, settings):
+    file = tmp_path / "workouts.csv"
+    pd.read_excel(DIR_EXCEL / "correct_1workout_2exercises.xlsx").to_csv(
+        file, index=False
+    )
+    settings.WORKOUTS_CHANGES_DELAY = 0
+    stderr = StringIO()
+    call_command("load_workouts", str(file), stdout=StringIO(), stderr=stderr)
+    assert "longer than WORKOUTS_CHANGES_DELAY" in stderr.getvalue()
+
+
+def test_load_workouts_no_files(db, tmp_path):
+    with pytest.raises(CommandError):
+        call_command("load_workouts", str(tmp_path / "*.xlsx"))
+
+
+def test_load_workouts_dry_run(db, tmp_path):
+    pd.DataFrame(
+        {
+            "Date": ["2000-01-01", "2000-01-01"],
+            "Exercise": ["BP", "B1"],
+            "Weight": [50.0, 50.0],
+            "Reps": [10, -1],
+        }
+    ).to_csv(tmp_path / "workouts.csv", index=False)
+    stdout = StringIO()
+    call_command("load_workouts", str(tmp_path), dry_run=True, stdout=stdout)
+    report = json.loads(stdout.getvalue())
+    assert report == [
+        {
+            "path": str(tmp_path / "workouts.csv"),
+            "n_rows": 2,
+            "errors": [
+                {
+                    "row": 3,
+                    "column": "Exercise",
+                    "reason": "Only latin letters are allowed.",
+                },
+                {"row": 3, "column": "Reps", "reason": "Not a positive number."},
+            ],
+        }
+    ]
+    assert SetOfExercise.objects.count() == 0
+
+
+def test_loaddata_rebuilds_rollups_and_records(db, tmp_path):
+    SetOfExercise.objects.create_from_excel(DIR_EXCEL / "correct_with_notes.xlsx")
+    fixture = tmp_path / "workouts.json"
+    call_command(
+        "dumpdata",
+        "workouts.exercise",
+        "workouts.workout",
+        "workouts.setofexercise",
+        output=str(fixture),
+    )
+    rollups = set(ExerciseRollup.objects.values_list("period", "start_date", "n_sets"))
+    n_records = PersonalRecord.objects.count()
+    ExerciseRollup.objects.all().delete()
+    PersonalRecord.objects.all().delete()
+    call_command("loaddata", str(fixture), stdout=StringIO())
+    assert (
+        set(ExerciseRollup.objects.values_list("period", "start_date", "n_sets"))
+        == rollups
+    )
+    assert PersonalRecord.objects.count() == n_records > 0
+
+
+def test_compare_wsgi_asgi(transactional_db):
+    stdout = StringIO()
+    call_command("compare_wsgi_asgi", requests=4, concurrency=2, stdout=stdout)
+    lines = stdout.getvalue().splitlines()
+    assert lines[0] == "4 requests to index, 2 at a time"
+    assert [line.split()[0] for line in lines[2:]] == ["WSGI", "ASGI"]
+
+
+def test_generate_workouts(db, tmp_path):
+    call_command(
+        "generate_workouts",
+        years=2,
+        exercises=12,
+        sets_per_day=5,
+        end_date=datetime.date(2001, 6, 30),
+        excel_dir=tmp_path,
+        stdout=StringIO(),
+    )
+    n_sets = SetOfExercise.objects.count()
+    assert n_sets > 0
+    assert Exercise.objects.filter(code__startswith="X").count() == 2
+    dates = SetOfExercise.objects.aggregate(
+        first=Min("workout_date"), last=Max("workout_date")
+    )
+    assert dates["first"] >= datetime.date(2000, 1, 1)
+    assert dates["last"] <= datetime.date(2001, 6, 30)
+    report = SetOfExercise.objects.compute_report(
+        datetime.date(2000, 1, 1), datetime.date(2001, 12, 31), "total", False
+    )
+    assert report["n_sets"] == n_sets
+    excel_files = sorted(path.name for path in tmp_path.iterdir())
+    assert excel_files == ["workouts-2000.xlsx", "workouts-2001.xlsx"]
+    assert sum(len(pd.read_excel(tmp_path / name)) for name in excel_files) == n_sets
+
+
+def test_benchmark(transactional_db, tmp_path):
+    call_command("generate_workouts", years=1, sets_per_day=5, stdout=StringIO())
+    output = tmp_path / "benchmark.json"
+    stdout = StringIO()
+    call_command(
+        "benchmark",
+        repeat=1,
+        excel_rows=10,
+        output=output,
+        baseline=None,
+        stdout=stdout,
+        stderr=StringIO(),
+    )
+    results = json.loads(output.read_text())["results"]
+    names = {result["name"] for result in results}
+    assert {"create_from_excel", "view index", "admin workout changelist"} <= names
+    assert all(result["n_queries"] >= 0 for result in results)
+    stdout = StringIO()
+    call_command("benchmark", repeat=1, filter="total", baseline=output, stdout=stdout)
+    assert "vs base" in stdout.getvalue()
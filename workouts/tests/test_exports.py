@@ -0,0 +1,105 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from workouts import exports
+from workouts.models import Exercise, SetOfExercise, Workout
+
+
+@pytest.fixture
+def sets(db):
+    bench_press = Exercise.objects.create(code="BP", name="Bench Press")
+    deadlift = Exercise.objects.create(code="DL", name="Deadlift")
+    for day, exercise, n_repetitions, weight, notes in [
+        (1, bench_press, 10, "50.5", "easy"),
+        (1, bench_press, 10, "50.5", "easy"),
+        (1, deadlift, 5, "100", None),
+        (3, bench_press, 8, "55", None),
+    ]:
+        workout, _ = Workout.objects.get_or_create(date=datetime.date(2000, 1, day))
+        SetOfExercise.objects.create(
+            workout=workout,
+            exercise=exercise,
+            n_repetitions=n_repetitions,
+            weight=Decimal(weight),
+            notes=notes,
+        )
+
+
+def _sets_as_tuples():
+    return sorted(
+        SetOfExercise.objects.values_list(
+            "workout_date", "exercise__code", "n_repetitions", "weight", "notes"
+        )
+    )
+
+
+@pytest.mark.parametrize("format", ["csv", "xlsx"])
+def test_export_sets_round_trip(sets, tmp_path, format):
+    expected_sets = _sets_as_tuples()
+    path = tmp_path / f"sets.{format}"
+    call_command("export_workouts", "sets", format=format, output=str(path))
+    SetOfExercise.objects.all().delete()
+    SetOfExercise.objects.create_from_file(path)
+    assert _sets_as_tuples() == expected_sets
+
+
+def test_export_sets_ndjson(sets):
+    columns, rows = exports.iter_sets(SetOfExercise.objects.all())
+    lines = list(exports.stream("ndjson", columns, rows))
+    assert len(lines) == 4
+    assert json.loads(lines[0]) == {
+        "Date": "2000-01-01",
+        "Exercise": "BP",
+        "Weight": "50.5",
+        "Reps": 10,
+        "Notes": "easy",
+    }
+
+
+def test_export_invalid_format():
+    with pytest.raises(ValueError):
+        exports.stream("hello", [], [])
+
+
+def test_export_sets_view_streams(client, sets):
+    response = client.get(
+        reverse("export_sets"), {"format": "csv", "start_date": "2000-01-02"}
+    )
+    assert response.streaming
+    assert response["Content-Disposition"] == 'attachment; filename="sets.csv"'
+    content = b"".join(response.streaming_content).decode()
+    assert content.splitlines() == [
+        "Date,Exercise,Weight,Reps,Notes",
+        "2000-01-03,BP,55.0,8,",
+    ]
+
+
+def test_export_report_view(client, sets):
+    response = client.get(
+        reverse("export_report"),
+        {
+            "format": "ndjson",
+            "start_date": "2000-01-01",
+            "end_date": "2000-01-31",
+            "periodicity": "total",
+            "per_exercise": "on",
+        },
+    )
+    rows = [json.loads(line) for line in response.streaming_content]
+    assert [(row["code"], row["n_sets"]) for row in rows] == [("BP", 3), ("DL", 1)]
+
+
+def test_export_report_command_totals(sets, capsys):
+    call_command(
+        "export_workouts",
+        "report",
+        start_date=datetime.date(2000, 1, 1),
+        end_date=datetime.date(2000, 1, 31),
+    )
+    header, row = capsys.readouterr().out.splitlines()
+    assert dict(zip(header.split(","), row.split(",")))["n_sets"] == "4"
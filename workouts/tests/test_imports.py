@@ -0,0 +1,105 @@
+import datetime
+from decimal import Decimal
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from workouts import imports
+from workouts.imports import (
+    Row,
+    RowError,
+    RowFingerprints,
+    parse_dataframe,
+    validate_dataframe,
+)
+from workouts.models import Exercise, SetOfExercise
+
+
+def test_limits_mirror_model_fields():
+    assert imports.MAX_LENGTH_CODE == Exercise._meta.get_field("code").max_length
+    weight = SetOfExercise._meta.get_field("weight")
+    assert imports.WEIGHT_DECIMAL_PLACES == weight.decimal_places
+    assert len(f"{imports.MAX_WEIGHT:.1f}".replace(".", "")) == weight.max_digits
+
+
+def test_validate_dataframe_reports_every_invalid_value():
+    df = pd.DataFrame(
+        {
+            "Date": ["2000-01-01", "2000-01-02", "not a date", "2000-01-03 10:30"],
+            "Exercise": ["BP", "B P", "DL", "toolong"],
+            "Weight": [50.1, 50.15, 100000.0, "heavy"],
+            "Reps": [10, 0, 2.5, 5],
+        }
+    )
+    valid_df, errors = validate_dataframe(df)
+    assert valid_df.index.tolist() == [0]
+    assert {(error.row, error.column) for error in errors} == {
+        (3, "Exercise"),
+        (3, "Weight"),
+        (3, "Reps"),
+        (4, "Date"),
+        (4, "Weight"),
+        (4, "Reps"),
+        (5, "Date"),
+        (5, "Exercise"),
+        (5, "Weight"),
+    }
+    assert RowError(row=3, column="Reps", reason="Not a positive number.") in errors
+
+
+def test_validate_dataframe_missing_column():
+    df = pd.DataFrame({"Date": ["2000-01-01"], "Exercise": ["BP"], "Reps": [1]})
+    with pytest.raises(ValueError):
+        validate_dataframe(df)
+
+
+def test_parse_dataframe_normalizes_values():
+    df = pd.DataFrame(
+        {
+            "Date": [pd.Timestamp("2000-01-01")],
+            "Exercise": [" BP "],
+            "Weight": [50.1],
+            "Reps": [10.0],
+            "Notes": [float("nan")],
+        }
+    )
+    rows, errors = parse_dataframe(df)
+    assert errors == []
+    assert rows == [Row("BP", datetime.date(2000, 1, 1), 10, Decimal("50.1"), None)]
+
+
+def test_fingerprints_tell_identical_rows_apart():
+    df = pd.DataFrame(
+        {
+            "Date": ["2000-01-01"] * 3 + ["2000-01-02"],
+            "Exercise": ["BP", "bp", "BP", "BP"],
+            "Weight": [50.0] * 4,
+            "Reps": [10] * 4,
+        }
+    )
+    rows, _ = parse_dataframe(df, RowFingerprints())
+    fingerprints = [row.fingerprint for row in rows]
+    assert len(set(fingerprints)) == 4
+    # Appending rows does not change the fingerprints of the previous ones.
+    fingerprints_first_rows = RowFingerprints()
+    rows_first, _ = parse_dataframe(df.iloc[:2], fingerprints_first_rows)
+    rows_last, _ = parse_dataframe(df.iloc[2:], fingerprints_first_rows)
+    assert [row.fingerprint for row in rows_first + rows_last] == fingerprints
+
+
+def test_excel_chunks_without_trailing_cells(tmp_path):
+    path = tmp_path / "workouts.xlsx"
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Date", "Exercise", "Weight", "Reps", "Notes"])
+    for day in [1, 2, 3]:
+        sheet.append([datetime.datetime(2000, 1, day), "BP", 50.0, 10])
+    workbook.save(path)
+    chunks = list(imports.iter_excel_chunks(path, chunk_size=2))
+    assert [list(chunk.columns) for chunk in chunks] == [
+        ["Date", "Exercise", "Weight", "Reps", "Notes"]
+    ] * 2
+    rows, errors = parse_dataframe(pd.concat(chunks))
+    assert errors == []
+    assert [row.notes for row in rows] == [None] * 3
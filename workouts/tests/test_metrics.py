@@ -0,0 +1,150 @@
+import datetime
+import logging
+from pathlib import Path
+
+import pytest
+from django.urls import reverse
+
+from workouts import metrics
+from workouts.models import Exercise, SetOfExercise
+from workouts.reports import get_report
+
+DATA_PATH = Path(__file__).parent / "data" / "excel"
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test.", ["name"], buckets=[1, 2])
+    try:
+        histogram.observe(0.5, name='a "b"')
+        histogram.observe(1.5, name='a "b"')
+        histogram.observe(3, name='a "b"')
+        assert list(histogram.render()) == [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{name="a \\"b\\"",le="1"} 1',
+            'test_seconds_bucket{name="a \\"b\\"",le="2"} 2',
+            'test_seconds_bucket{name="a \\"b\\"",le="+Inf"} 3',
+            'test_seconds_sum{name="a \\"b\\""} 5',
+            'test_seconds_count{name="a \\"b\\""} 3',
+        ]
+        with pytest.raises(ValueError):
+            histogram.observe(1, other="a")
+    finally:
+        metrics.REGISTRY.remove(histogram)
+
+
+def test_rows_class():
+    assert metrics.rows_class(0) == "<100"
+    assert metrics.rows_class(100) == "<1000"
+    assert metrics.rows_class(10**6) == ">=100000"
+
+
+@pytest.mark.django_db
+def test_requests_are_measured_by_view(client, settings):
+    settings.WORKOUTS_METRICS_ALLOWED_IPS = ["127.0.0.1"]
+    client.get(reverse("index"))
+    client.get(reverse("index"))
+    client.get("/nowhere")
+    response = client.get(reverse("metrics"))
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    content = response.content.decode()
+    labels = 'view="index",method="GET"'
+    assert f"workouts_request_duration_seconds_count{{{labels}}} 2" in content
+    assert f"workouts_request_queries_count{{{labels}}} 2" in content
+    assert f'workouts_responses_total{{{labels},status="200"}} 2' in content
+    assert 'view="<unresolved>",method="GET",status="404"' in content
+    assert 'workouts_report_duration_seconds_count{periodicity="total"' in content
+    (queries_sum,) = (
+        line
+        for line in content.splitlines()
+        if line.startswith(f"workouts_request_queries_sum{{{labels}}}")
+    )
+    assert float(queries_sum.split()[-1]) > 0
+
+
+@pytest.mark.django_db
+def test_metrics_restricted(client, admin_client, settings):
+    settings.WORKOUTS_METRICS_ALLOWED_IPS = []
+    assert client.get(reverse("metrics")).status_code == 403
+    assert admin_client.get(reverse("metrics")).status_code == 200
+    settings.WORKOUTS_METRICS_ALLOWED_IPS = ["127.0.0.1"]
+    assert client.get(reverse("metrics")).status_code == 200
+
+
+@pytest.mark.django_db
+def test_streamed_responses_are_measured_when_exhausted(client):
+    response = client.get(reverse("export_sets"), {"format": "csv"})
+    labels = {"view": "export_sets", "method": "GET"}
+    assert "export_sets" not in metrics.render()
+    size = len(b"".join(response.streaming_content))
+    rendered = metrics.render()
+    assert 'workouts_response_size_bytes_count{view="export_sets"' in rendered
+    sum_labels = metrics._format_labels(labels)
+    assert f"workouts_response_size_bytes_sum{sum_labels} {size}" in rendered
+
+
+@pytest.mark.django_db
+def test_reports_are_timed_by_periodicity_and_cache():
+    date = datetime.date(2023, 1, 1)
+    get_report(date, date, "weekly")
+    get_report(date, date, "weekly")
+    rendered = metrics.render()
+    for cache in ["hit", "miss"]:
+        assert (
+            "workouts_report_duration_seconds_count{"
+            f'periodicity="weekly",per_exercise="True",cache="{cache}"}} 1'
+        ) in rendered
+
+
+@pytest.mark.django_db
+def test_imports_are_timed_by_source_and_rows():
+    SetOfExercise.objects.create_from_file(DATA_PATH / "correct_with_notes.xlsx")
+    rendered = metrics.render()
+    labels = 'source="file",rows="<100"'
+    assert f"workouts_import_duration_seconds_count{{{labels}}} 1" in rendered
+    assert 'workouts_imported_rows_total{source="file"}' in rendered
+    # The rows of files are not counted again by the source of rows.
+    assert 'source="rows"' not in rendered
+
+
+@pytest.mark.django_db
+def test_logged_workouts_are_timed():
+    exercise = Exercise.objects.create(code="BP", name="Bench Press")
+    SetOfExercise.objects.log_workout(
+        datetime.date(2023, 1, 1),
+        [{"exercise": exercise, "n_repetitions": 5, "weight": 50}] * 3,
+    )
+    rendered = metrics.render()
+    labels = 'source="log_workout",rows="<100"'
+    assert f"workouts_import_duration_seconds_count{{{labels}}} 1" in rendered
+    assert 'workouts_imported_rows_total{source="log_workout"} 3' in rendered
+
+
+@pytest.mark.django_db
+def test_slow_queries_are_logged(settings, caplog):
+    settings.WORKOUTS_SLOW_QUERY_SECONDS = 0
+    settings.WORKOUTS_SLOW_QUERY_SAMPLE_RATE = 1
+    with caplog.at_level(logging.WARNING, logger="workouts.slow_queries"):
+        SetOfExercise.objects.count()
+    (record,) = caplog.records
+    assert "workouts_setofexercise" in record.sql
+    assert record.duration >= 0
+    assert "workouts_slow_queries_total 1" in metrics.render()
+
+
+@pytest.mark.django_db
+def test_slow_queries_are_sampled(settings, caplog):
+    settings.WORKOUTS_SLOW_QUERY_SECONDS = 0
+    settings.WORKOUTS_SLOW_QUERY_SAMPLE_RATE = 0
+    with caplog.at_level(logging.WARNING, logger="workouts.slow_queries"):
+        SetOfExercise.objects.count()
+    assert not caplog.records
+    assert "workouts_slow_queries_total 1" in metrics.render()
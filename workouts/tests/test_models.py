@@ -1,13 +1,26 @@
 import datetime
+from decimal import Decimal
 from pathlib import Path
 
 import pandas as pd
 import pytest
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.utils import IntegrityError
-
-from workouts.models import Exercise, SetOfExercise, Workout
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from workouts.checks import check_exercise_cache
+from workouts.imports import Row
+from workouts.models import (
+    Exercise,
+    ExerciseRollup,
+    PersonalRecord,
+    SetOfExercise,
+    Tombstone,
+    Workout,
+)
 
 DIR_TEST_DATA = Path(__file__).parent.resolve() / "data"
 DIR_EXCEL = DIR_TEST_DATA / "excel"
@@ -150,6 +163,122 @@ def test_duplicate_workout_date_invalid(db, workout_empty):
         workout_duplicate.save()
 
 
+def test_workouts_with_statistics(db, django_assert_num_queries):
+    bench, squat = Exercise.objects.bulk_create(
+        [Exercise(code="BP", name="Bench Press"), Exercise(code="SQ", name="Squat")]
+    )
+    workout = Workout.objects.create(date=datetime.date(2000, 1, 1))
+    Workout.objects.create(date=datetime.date(2000, 1, 2))
+    SetOfExercise.objects.bulk_create(
+        SetOfExercise(
+            exercise=exercise, workout=workout, n_repetitions=5, weight=weight
+        )
+        for exercise, weight in [(bench, 50), (bench, 60), (squat, 100)]
+    )
+    with django_assert_num_queries(1):
+        workouts = list(Workout.objects.with_statistics().order_by("date"))
+        assert [
+            (
+                workout.n_different_exercises,
+                workout.n_sets,
+                workout.total_repetitions,
+                workout.total_volume,
+            )
+            for workout in workouts
+        ] == [(2, 3, 15, Decimal("1050.0")), (0, 0, None, None)]
+    assert Workout.objects.get(pk=workout.pk).n_different_exercises == 2
+
+
+@pytest.mark.parametrize("n_workouts", [10, 1000])
+def test_workouts_view_constant_queries(client, db, n_workouts):
+    exercise = Exercise.objects.create(code="BP", name="Bench Press")
+    start_date = datetime.date(2000, 1, 1)
+    workouts = Workout.objects.bulk_create(
+        Workout(date=start_date + datetime.timedelta(days=day))
+        for day in range(n_workouts)
+    )
+    SetOfExercise.objects.bulk_create(
+        SetOfExercise(exercise=exercise, workout=workout, n_repetitions=5, weight=50)
+        for workout in workouts
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("workouts"))
+    assert response.status_code == 200
+    # A count for the paginator, and the workouts with their statistics.
+    assert len(queries) == 2
+    assert len(response.context["page"].object_list) == min(n_workouts, 100)
+
+
+def test_resolve_exercise(transactional_db, django_assert_num_queries):
+    squat = Exercise.objects.create(code="SQ", name="Squat")
+    with django_assert_num_queries(1):
+        assert Exercise.objects.resolve("sq") == squat
+        assert Exercise.objects.resolve("SQUAT") == squat
+        assert Exercise.objects.resolve_many(["Sq"]) == {"sq": squat}
+    # Codes missing from the cache are looked up in the database.
+    with django_assert_num_queries(1):
+        assert Exercise.objects.resolve_many(["Sq", "BP"]) == {"sq": squat}
+    with pytest.raises(Exercise.DoesNotExist):
+        Exercise.objects.resolve("BP")
+    bench = Exercise.objects.create(code="BP", name="Bench Press")
+    assert Exercise.objects.resolve("bench press") == bench
+    bench.delete()
+    with pytest.raises(Exercise.DoesNotExist):
+        Exercise.objects.resolve("BP")
+
+
+def test_resolve_exercise_reloads_on_new_version(transactional_db, settings):
+    Exercise.objects.create(code="SQ", name="Squat")
+    Exercise.objects.resolve("SQ")
+    # Another process renames the exercise without signals.
+    with connection.cursor() as cursor:
+        cursor.execute("UPDATE workouts_exercise SET name = 'Back Squat'")
+    assert Exercise.objects.resolve("squat").code == "SQ"
+    caches[settings.WORKOUTS_EXERCISE_CACHE].set(
+        Exercise.objects.cache.version_key, "another"
+    )
+    with pytest.raises(Exercise.DoesNotExist):
+        Exercise.objects.resolve("squat")
+
+
+def test_resolve_exercise_created_by_another_process(transactional_db):
+    Exercise.objects.resolve_many(["SQ"])
+    # Another process creates the exercise, and its new version is not seen.
+    Exercise.objects.bulk_create([Exercise(code="SQ", name="Squat")])
+    assert Exercise.objects.resolve("sq").code == "SQ"
+    SetOfExercise.objects.create_from_rows(
+        [Row("SQ", datetime.date(2000, 1, 1), 5, Decimal("100"), None)]
+    )
+    assert Exercise.objects.count() == 1
+    assert SetOfExercise.objects.get().exercise.code == "SQ"
+
+
+def test_exercise_cache_check(settings, tmp_path):
+    settings.CACHES = settings.CACHES | {
+        "exercises": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": tmp_path,
+        }
+    }
+    assert check_exercise_cache(None) == []
+    settings.CACHES = settings.CACHES | {
+        "exercises": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    settings.DEBUG = False
+    assert [error.id for error in check_exercise_cache(None)] == ["workouts.E001"]
+    settings.DEBUG = True
+    assert check_exercise_cache(None) == []
+
+
+def test_resolve_exercise_does_not_cache_uncommitted(transactional_db):
+    with transaction.atomic():
+        Exercise.objects.create(code="SQ", name="Squat")
+        assert Exercise.objects.resolve("SQ").code == "SQ"
+        transaction.set_rollback(True)
+    with pytest.raises(Exercise.DoesNotExist):
+        Exercise.objects.resolve("SQ")
+
+
 _CORRECT_EXCEL_FILES = [
     DIR_EXCEL / file_name
     for file_name in [
@@ -335,3 +464,416 @@ def test_compute_report_yearly_per_exercise(db, file):
         check_like=True,
         check_exact=False,
     )
+
+
+@pytest.mark.parametrize("file", _CORRECT_EXCEL_FILES)
+def test_load_excel_bulk_same_as_per_row(db, file):
+    SetOfExercise.objects.create_from_excel(file, bulk=False)
+    expected_sets = list(
+        SetOfExercise.objects.values_list(
+            "workout__date", "exercise__code", "n_repetitions", "weight"
+        ).order_by("id")
+    )
+    SetOfExercise.objects.all().delete()
+    Workout.objects.all().delete()
+    Exercise.objects.all().delete()
+    SetOfExercise.objects.create_from_excel(file, bulk=True)
+    sets = list(
+        SetOfExercise.objects.values_list(
+            "workout__date", "exercise__code", "n_repetitions", "weight"
+        ).order_by("id")
+    )
+    assert sets == expected_sets
+
+
+def test_load_excel_bulk_reuses_existing_objects(db):
+    file = DIR_EXCEL / "correct_1workout_2exercises.xlsx"
+    Exercise.objects.create(code="bp", name="Bench Press")
+    Workout.objects.create(date=datetime.date(2000, 1, 1))
+    created_objects = SetOfExercise.objects.create_from_excel(file)
+    assert Exercise.objects.count() == 2
+    assert Workout.objects.count() == 1
+    assert len(created_objects["exercise"]) == 1
+    assert len(created_objects["workout"]) == 0
+    assert len(created_objects["set_of_exercise"]) == 6
+
+
+def test_load_excel_bulk_constant_queries(db, django_assert_max_num_queries):
+    file = DIR_EXCEL / "correct_1workout_2exercises.xlsx"
+    # Resolving objects, inserting sets, refreshing the rollups and the records.
+    with django_assert_max_num_queries(35):
+        SetOfExercise.objects.create_from_excel(file)
+
+
+def _sets_as_tuples():
+    return list(
+        SetOfExercise.objects.values_list(
+            "workout__date", "exercise__code", "n_repetitions", "weight", "notes"
+        ).order_by("id")
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1000])
+def test_load_file_in_chunks_same_as_excel(db, chunk_size):
+    file = DIR_EXCEL / "correct_1workout_2exercises.xlsx"
+    SetOfExercise.objects.create_from_excel(file)
+    expected_sets = _sets_as_tuples()
+    SetOfExercise.objects.all().delete()
+    Workout.objects.all().delete()
+    Exercise.objects.all().delete()
+    created_objects = SetOfExercise.objects.create_from_file(
+        file, chunk_size=chunk_size
+    )
+    assert _sets_as_tuples() == expected_sets
+    assert len(created_objects["set_of_exercise"]) == len(expected_sets)
+    assert len(created_objects["exercise"]) == 2
+    assert len(created_objects["workout"]) == 1
+
+
+def test_load_csv_file_in_chunks(db, tmp_path):
+    file = DIR_EXCEL / "correct_1workout_2exercises.xlsx"
+    file_csv = tmp_path / "workouts.csv"
+    pd.read_excel(file).to_csv(file_csv, index=False)
+    SetOfExercise.objects.create_from_excel(file)
+    expected_sets = _sets_as_tuples()
+    SetOfExercise.objects.all().delete()
+    SetOfExercise.objects.create_from_file(file_csv, chunk_size=4)
+    assert _sets_as_tuples() == expected_sets
+
+
+def test_reload_file_deletes_edited_rows(db, tmp_path):
+    file = tmp_path / "workouts.csv"
+    df = pd.read_excel(DIR_EXCEL / "correct_1workout_2exercises.xlsx")
+    df.to_csv(file, index=False)
+    SetOfExercise.objects.create_from_file(file, chunk_size=2)
+    df.loc[1, "Reps"] = 1
+    df.to_csv(file, index=False)
+    SetOfExercise.objects.create_from_file(file, chunk_size=2)
+    assert SetOfExercise.objects.count() == len(df)
+    assert SetOfExercise.objects.filter(n_repetitions=1).count() == 1
+
+
+def test_reload_file_keeps_rows_of_other_files(db, tmp_path):
+    shared_row = {"Date": "2023-01-02", "Exercise": "BP", "Weight": 50.0, "Reps": 5}
+    file_a, file_b = tmp_path / "a.csv", tmp_path / "b.csv"
+    pd.DataFrame([shared_row, {**shared_row, "Date": "2023-01-01"}]).to_csv(
+        file_a, index=False
+    )
+    pd.DataFrame([shared_row]).to_csv(file_b, index=False)
+    SetOfExercise.objects.create_from_file(file_a)
+    SetOfExercise.objects.create_from_file(file_b)
+    assert SetOfExercise.objects.count() == 2
+    pd.DataFrame([{**shared_row, "Date": "2023-01-01"}]).to_csv(file_a, index=False)
+    SetOfExercise.objects.create_from_file(file_a)
+    assert SetOfExercise.objects.filter(workout_date="2023-01-02").exists()
+    pd.DataFrame([{**shared_row, "Reps": 6}]).to_csv(file_b, index=False)
+    SetOfExercise.objects.create_from_file(file_b)
+    assert sorted(
+        SetOfExercise.objects.values_list("workout_date", "n_repetitions")
+    ) == [(datetime.date(2023, 1, 1), 5), (datetime.date(2023, 1, 2), 6)]
+
+
+def test_reload_file_deletes_rows_in_bulk(db, tmp_path):
+    file = tmp_path / "workouts.csv"
+    df = pd.DataFrame(
+        {
+            "Date": ["2023-01-01", "2023-01-01", "2023-01-02", "2023-01-03"],
+            "Exercise": ["BP", "SQ", "BP", "BP"],
+            "Weight": [50.0, 80.0, 60.0, 55.0],
+            "Reps": [5, 5, 3, 8],
+        }
+    )
+    df.to_csv(file, index=False)
+    SetOfExercise.objects.create_from_file(file)
+    deleted_pks = set(
+        SetOfExercise.objects.filter(weight__in=[80, 60]).values_list("pk", flat=True)
+    )
+    deleted_sets = []
+
+    def record_deleted_set(sender, instance, **kwargs):
+        deleted_sets.append(instance)
+
+    df.drop([1, 2]).to_csv(file, index=False)
+    models.signals.post_delete.connect(record_deleted_set, sender=SetOfExercise)
+    try:
+        SetOfExercise.objects.create_from_file(file)
+    finally:
+        models.signals.post_delete.disconnect(record_deleted_set, sender=SetOfExercise)
+    assert deleted_sets == []
+    assert SetOfExercise.objects.count() == 2
+    assert (
+        set(
+            Tombstone.objects.filter(model=Tombstone.Model.SET_OF_EXERCISE).values_list(
+                "object_id", flat=True
+            )
+        )
+        == deleted_pks
+    )
+    rollups, records = _rollups_as_tuples(), _records_as_tuples()
+    ExerciseRollup.objects.rebuild()
+    PersonalRecord.objects.rebuild()
+    assert rollups == _rollups_as_tuples()
+    assert records == _records_as_tuples()
+
+
+def _records_as_tuples():
+    return sorted(
+        PersonalRecord.objects.values_list(
+            "exercise", "kind", "value", "set_of_exercise"
+        )
+    )
+
+
+def test_load_file_logs_invalid_rows(db, tmp_path, caplog):
+    file = tmp_path / "workouts.csv"
+    pd.DataFrame(
+        {
+            "Date": ["2000-01-01", "2000-01-01"],
+            "Exercise": ["BP", "BP"],
+            "Weight": [50.0, 50.0],
+            "Reps": [10, -1],
+        }
+    ).to_csv(file, index=False)
+    with caplog.at_level("WARNING", logger="workouts.imports"):
+        created_objects = SetOfExercise.objects.create_from_file(file)
+    assert len(created_objects["set_of_exercise"]) == 1
+    assert [record.getMessage() for record in caplog.records] == [
+        "Skipping row 3 because of Reps: Not a positive number."
+    ]
+
+
+def test_load_file_unsupported_type(db, tmp_path):
+    with pytest.raises(ValueError):
+        SetOfExercise.objects.create_from_file(tmp_path / "workouts.txt")
+
+
+@pytest.fixture
+def sets_across_years(db):
+    exercises = [
+        Exercise.objects.create(code=code, name=name)
+        for code, name in [("BP", "Bench Press"), ("DL", "Deadlift"), ("SQ", "Squat")]
+    ]
+    start = datetime.date(2019, 12, 20)
+    sets = []
+    for day in range(0, 80, 3):
+        workout = Workout.objects.create(date=start + datetime.timedelta(days=day))
+        for n_set in range(day % 4 + 1):
+            sets.append(
+                SetOfExercise(
+                    workout=workout,
+                    exercise=exercises[(day + n_set) % len(exercises)],
+                    n_repetitions=n_set + day % 7 + 1,
+                    weight=Decimal(f"{20 + day + n_set * 2.5:.1f}"),
+                )
+            )
+    SetOfExercise.objects.bulk_create(sets)
+    ExerciseRollup.objects.rebuild()
+    return exercises
+
+
+def _report_as_records(report):
+    if isinstance(report, dict):
+        report = [report]
+    return [
+        {
+            key: float(value) if isinstance(value, (float, Decimal)) else value
+            for key, value in row.items()
+        }
+        for row in report
+    ]
+
+
+_PERIODICITIES = ["total", "yearly", "monthly", "weekly", "daily"]
+_DATE_RANGES = [
+    (datetime.date(2019, 1, 1), datetime.date(2020, 12, 31)),
+    (datetime.date(2019, 12, 1), datetime.date(2020, 2, 29)),
+    (datetime.date(2019, 12, 30), datetime.date(2020, 1, 12)),
+    (datetime.date(2019, 12, 25), datetime.date(2020, 1, 20)),
+]
+
+
+@pytest.mark.parametrize("start_date, end_date", _DATE_RANGES)
+@pytest.mark.parametrize("periodicity", _PERIODICITIES)
+@pytest.mark.parametrize("per_exercise", [True, False])
+def test_compute_report_from_rollups_same_as_from_sets(
+    sets_across_years, start_date, end_date, periodicity, per_exercise
+):
+    kwargs = dict(
+        start_date=start_date,
+        end_date=end_date,
+        periodicity=periodicity,
+        per_exercise=per_exercise,
+    )
+    expected_report = SetOfExercise.objects.compute_report(**kwargs, use_rollups=False)
+    report = SetOfExercise.objects.compute_report(**kwargs)
+    assert _report_as_records(report) == pytest.approx(
+        _report_as_records(expected_report)
+    )
+
+
+@pytest.mark.parametrize("start_date, end_date", _DATE_RANGES)
+@pytest.mark.parametrize("use_rollups", [True, False])
+def test_compute_report_with_totals_same_as_two_reports(
+    sets_across_years, start_date, end_date, use_rollups, django_assert_num_queries
+):
+    kwargs = dict(
+        start_date=start_date,
+        end_date=end_date,
+        periodicity="total",
+        use_rollups=use_rollups,
+    )
+    expected_groups = SetOfExercise.objects.compute_report(**kwargs, per_exercise=True)
+    expected_totals = SetOfExercise.objects.compute_report(**kwargs, per_exercise=False)
+    with django_assert_num_queries(1):
+        groups, totals = SetOfExercise.objects.compute_report(
+            **kwargs, with_totals=True
+        )
+    groups = _report_as_records(groups)
+    expected_groups = _report_as_records(expected_groups)
+    assert len(groups) == len(expected_groups)
+    for group, expected_group in zip(groups, expected_groups):
+        assert group == pytest.approx(expected_group)
+    assert _report_as_records(totals)[0] == pytest.approx(
+        _report_as_records(expected_totals)[0]
+    )
+
+
+def test_compute_report_with_totals_empty(db):
+    groups, totals = SetOfExercise.objects.compute_report(
+        datetime.date(2000, 1, 1), datetime.date(2000, 1, 31), "total", with_totals=True
+    )
+    assert groups == []
+    assert totals["n_workouts"] == totals["n_sets"] == totals["n_unique_exercises"] == 0
+    assert totals["total_volume"] is None
+
+
+def test_compute_report_with_totals_only_total_per_exercise(db):
+    with pytest.raises(ValueError):
+        SetOfExercise.objects.compute_report(
+            datetime.date(2000, 1, 1),
+            datetime.date(2000, 1, 31),
+            "monthly",
+            with_totals=True,
+        )
+
+
+def _rollups_as_tuples():
+    return sorted(
+        ExerciseRollup.objects.values_list(
+            "period",
+            "start_date",
+            "exercise",
+            "n_workouts",
+            "n_sets",
+            "total_repetitions",
+            "min_repetitions",
+            "max_repetitions",
+            "total_weight",
+            "min_weight",
+            "max_weight",
+            "total_volume",
+            "min_volume",
+            "max_volume",
+        )
+    )
+
+
+def test_rollups_maintained_on_write(sets_across_years):
+    set_ = SetOfExercise.objects.order_by("id").first()
+    set_.weight = Decimal("300.0")
+    set_.exercise = sets_across_years[-1]
+    set_.save()
+    SetOfExercise.objects.order_by("id").last().delete()
+    workout = Workout.objects.order_by("date")[3]
+    workout.date = datetime.date(2021, 6, 1)
+    workout.save()
+    Workout.objects.order_by("date").first().delete()
+    SetOfExercise.objects.create_from_excel(DIR_EXCEL / "correct_with_notes.xlsx")
+    rollups = _rollups_as_tuples()
+    ExerciseRollup.objects.rebuild()
+    assert rollups == _rollups_as_tuples()
+
+
+def test_rollups_maintained_on_bulk_update(sets_across_years):
+    sets = SetOfExercise.objects.filter(workout_year=2020)
+    sets.update(weight=Decimal("1.0"), exercise=sets_across_years[-1])
+    rollups = _rollups_as_tuples()
+    ExerciseRollup.objects.rebuild()
+    assert rollups == _rollups_as_tuples()
+
+
+def test_set_copies_workout_date(db, exercise):
+    workout = Workout.objects.create(date=datetime.date(2019, 12, 30))
+    set_ = SetOfExercise.objects.create(
+        workout=workout, exercise=exercise, n_repetitions=5, weight=50
+    )
+    assert (set_.workout_date, set_.workout_year, set_.workout_week) == (
+        datetime.date(2019, 12, 30),
+        2019,
+        1,
+    )
+    workout.date = datetime.date(2020, 3, 5)
+    workout.save()
+    set_.refresh_from_db()
+    assert (
+        set_.workout_date,
+        set_.workout_year,
+        set_.workout_month,
+        set_.workout_week,
+    ) == (datetime.date(2020, 3, 5), 2020, 3, 10)
+    (bulk_set,) = SetOfExercise.objects.bulk_create(
+        [SetOfExercise(workout=workout, exercise=exercise, n_repetitions=1, weight=1)]
+    )
+    assert bulk_set.workout_date == workout.date
+
+
+def test_sets_moved_with_bulk_updated_workouts(sets_across_years):
+    Workout.objects.filter(date=datetime.date(2020, 1, 1)).update(
+        date=datetime.date(2020, 5, 4)
+    )
+    assert (
+        SetOfExercise.objects.filter(workout_date=datetime.date(2020, 1, 1)).count()
+        == 0
+    )
+    assert set(
+        SetOfExercise.objects.filter(
+            workout__date=datetime.date(2020, 5, 4)
+        ).values_list("workout_date", "workout_year", "workout_month", "workout_week")
+    ) == {(datetime.date(2020, 5, 4), 2020, 5, 19)}
+    rollups = _rollups_as_tuples()
+    ExerciseRollup.objects.rebuild()
+    assert rollups == _rollups_as_tuples()
+
+
+def test_sets_moved_to_another_workout_in_bulk(sets_across_years):
+    workout = Workout.objects.create(date=datetime.date(2024, 6, 3))
+    set_, other_set = SetOfExercise.objects.order_by("id")[:2]
+    SetOfExercise.objects.filter(pk=set_.pk).update(workout=workout)
+    other_set.workout = workout
+    SetOfExercise.objects.bulk_update([other_set], ["workout"])
+    assert set(
+        SetOfExercise.objects.filter(workout=workout).values_list(
+            "workout_date", "workout_year", "workout_month", "workout_week"
+        )
+    ) == {(datetime.date(2024, 6, 3), 2024, 6, 23)}
+    report = SetOfExercise.objects.compute_report(
+        start_date=datetime.date(2024, 1, 1),
+        end_date=datetime.date(2024, 12, 31),
+        periodicity="total",
+        per_exercise=False,
+    )
+    assert report["n_sets"] == 2
+    rollups = _rollups_as_tuples()
+    ExerciseRollup.objects.rebuild()
+    assert rollups == _rollups_as_tuples()
+
+
+def test_compute_report_does_not_join_workouts(db):
+    report = SetOfExercise.objects.compute_report(
+        datetime.date(2000, 1, 1),
+        datetime.date(2000, 12, 31),
+        periodicity="monthly",
+        per_exercise=False,
+        use_rollups=False,
+    )
+    assert Workout._meta.db_table not in str(report.query)
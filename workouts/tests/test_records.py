@@ -0,0 +1,110 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from workouts.imports import Row
+from workouts.models import Exercise, PersonalRecord, SetOfExercise, Workout
+
+
+@pytest.fixture
+def sets(db):
+    exercise = Exercise.objects.create(code="sq", name="Squat")
+    sets = []
+    for day, n_repetitions, weight in [
+        (1, 5, "100"),
+        (1, 10, "80"),
+        (2, 1, "120"),
+        (3, 20, "50"),
+    ]:
+        workout, _ = Workout.objects.get_or_create(date=datetime.date(2024, 1, day))
+        sets.append(
+            SetOfExercise.objects.create(
+                workout=workout,
+                exercise=exercise,
+                n_repetitions=n_repetitions,
+                weight=Decimal(weight),
+            )
+        )
+    return sets
+
+
+def _records():
+    return {
+        record.kind: (record.value, record.set_of_exercise_id)
+        for record in PersonalRecord.objects.all()
+    }
+
+
+def test_estimate_one_rep_max():
+    assert PersonalRecord.estimate_one_rep_max(Decimal("100"), 1) == Decimal("100")
+    assert PersonalRecord.estimate_one_rep_max(Decimal("100"), 10) == Decimal("133.3")
+
+
+def test_records_maintained_on_create(sets):
+    five, ten, one, twenty = sets
+    assert _records() == {
+        "weight": (Decimal("120"), one.id),
+        "volume": (Decimal("1000"), twenty.id),
+        "estimated_1rm": (Decimal("120"), one.id),
+        "weight_low": (Decimal("120"), one.id),
+        "weight_medium": (Decimal("80"), ten.id),
+        "weight_very_high": (Decimal("50"), twenty.id),
+    }
+
+
+def test_records_maintained_on_update_and_delete(sets):
+    five, ten, one, twenty = sets
+    expected_records = _records()
+    PersonalRecord.objects.rebuild()
+    assert _records() == expected_records
+
+    one.weight = Decimal("90")
+    one.save()
+    assert _records()["weight"] == (Decimal("100"), five.id)
+    assert _records()["estimated_1rm"] == (Decimal("116.7"), five.id)
+    five.delete()
+    assert _records()["weight"] == (Decimal("90"), one.id)
+    assert _records()["estimated_1rm"] == (Decimal("106.7"), ten.id)
+
+
+def test_records_maintained_on_bulk_update(sets):
+    five, ten, one, twenty = sets
+    SetOfExercise.objects.filter(pk__in=[one.pk, twenty.pk]).update(
+        weight=Decimal("10")
+    )
+    assert _records()["weight"] == (Decimal("100"), five.id)
+    assert _records()["volume"] == (Decimal("800"), ten.id)
+
+
+def test_records_maintained_on_bulk_create(db):
+    SetOfExercise.objects.create_from_rows(
+        [
+            Row("sq", datetime.date(2024, 1, 1), 5, Decimal("100"), None),
+            Row("sq", datetime.date(2024, 1, 2), 5, Decimal("110"), None),
+        ]
+    )
+    assert _records()["weight"][0] == Decimal("110")
+    assert "weight_medium" not in _records()
+
+
+def test_records_by_exercise_one_query(sets, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        records = PersonalRecord.objects.by_exercise()
+        assert [str(exercise) for exercise in records] == [str(sets[0].exercise)]
+        assert records[sets[0].exercise]["weight"].set_of_exercise == sets[2]
+
+
+def test_rebuild_personal_records_command(sets):
+    expected_records = _records()
+    PersonalRecord.objects.all().delete()
+    call_command("rebuild_personal_records")
+    assert _records() == expected_records
+
+
+def test_records_view(client, sets):
+    response = client.get(reverse("records"))
+    assert response.status_code == 200
+    assert "Heaviest weight" in response.content.decode()
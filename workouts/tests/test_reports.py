@@ -0,0 +1,118 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+
+from workouts import reports
+from workouts.models import DataVersion, Exercise, SetOfExercise, Workout
+from workouts.routers import ReadOnlyRouter, read_only_database
+
+START_DATE = datetime.date(2000, 1, 1)
+END_DATE = datetime.date(2000, 1, 31)
+
+
+@pytest.fixture
+def set_of_exercise(db):
+    return SetOfExercise.objects.create(
+        exercise=Exercise.objects.create(code="BP", name="Bench Press"),
+        workout=Workout.objects.create(date=datetime.date(2000, 1, 10)),
+        n_repetitions=10,
+        weight=50,
+    )
+
+
+def test_writes_bump_data_version(db):
+    version = DataVersion.objects.current().version
+    exercise = Exercise.objects.create(code="BP", name="Bench Press")
+    assert DataVersion.objects.current().version == version + 1
+    exercise.delete()
+    assert DataVersion.objects.current().version == version + 2
+
+
+def test_report_served_from_cache(set_of_exercise, django_assert_num_queries):
+    reports.reset_cache_stats()
+    report = reports.get_report(START_DATE, END_DATE, "total", per_exercise=True)
+    # Only the data version is read from the database.
+    with django_assert_num_queries(1):
+        cached_report = reports.get_report(
+            START_DATE, END_DATE, "total", per_exercise=True
+        )
+    assert cached_report == report
+    assert reports.get_cache_stats() == {"hits": 1, "misses": 1}
+
+
+def test_report_cache_invalidated_by_writes(set_of_exercise):
+    report = reports.get_report(START_DATE, END_DATE, "total", per_exercise=False)
+    assert report["n_sets"] == 1
+    SetOfExercise.objects.create(
+        exercise=set_of_exercise.exercise,
+        workout=set_of_exercise.workout,
+        n_repetitions=5,
+        weight=60,
+    )
+    report = reports.get_report(START_DATE, END_DATE, "total", per_exercise=False)
+    assert report["n_sets"] == 2
+
+
+def test_report_cache_invalidated_by_bulk_updates(set_of_exercise):
+    report = reports.get_report(START_DATE, END_DATE, "total", per_exercise=False)
+    assert report["max_weight"] == 50
+    SetOfExercise.objects.filter(pk=set_of_exercise.pk).update(weight=1)
+    report = reports.get_report(START_DATE, END_DATE, "total", per_exercise=False)
+    assert report["max_weight"] == 1
+
+
+@pytest.fixture
+def set_of_exercise_today(transactional_db):
+    # Async views query from worker threads, on connections of their own, so
+    # the data must be committed.
+    return SetOfExercise.objects.create(
+        exercise=Exercise.objects.create(code="BP", name="Bench Press"),
+        workout=Workout.objects.create(date=datetime.date.today()),
+        n_repetitions=10,
+        weight=50,
+    )
+
+
+def test_index_async_same_as_index(client, set_of_exercise_today):
+    response = client.get(reverse("index"))
+    response_async = client.get(reverse("index_async"))
+    assert response_async.status_code == 200
+    assert response_async.content == response.content
+    assert b"Bench Press" in response.content
+
+
+def test_chart_data_async_same_as_chart_data(client, set_of_exercise_today):
+    params = {
+        "start_date": set_of_exercise_today.workout_date.isoformat(),
+        "end_date": set_of_exercise_today.workout_date.isoformat(),
+        "exercises": ["BP"],
+    }
+    response = client.get(reverse("chart_data"), params)
+    response_async = client.get(reverse("chart_data_async"), params)
+    assert response_async.json() == response.json()
+    assert response_async["ETag"] == response["ETag"]
+    response_async = client.get(
+        reverse("chart_data_async"), params, headers={"If-None-Match": response["ETag"]}
+    )
+    assert response_async.status_code == 304
+
+
+def test_read_only_router(settings):
+    router = ReadOnlyRouter()
+    assert router.db_for_read(SetOfExercise) is None
+    with read_only_database():
+        assert router.db_for_read(SetOfExercise) is None
+        settings.WORKOUTS_READ_ONLY_DATABASE = "read_only"
+        assert router.db_for_read(SetOfExercise) == "read_only"
+        assert router.db_for_write(SetOfExercise) is None
+    assert router.db_for_read(SetOfExercise) is None
+    assert router.allow_migrate("read_only", "workouts") is False
+    assert router.allow_migrate("default", "workouts") is None
+
+
+def test_read_only_router_not_within_transactions(db, settings):
+    settings.WORKOUTS_READ_ONLY_DATABASE = "read_only"
+    with read_only_database():
+        # Tests run within a transaction, whose writes must stay visible.
+        assert ReadOnlyRouter().db_for_read(SetOfExercise) is None
@@ -0,0 +1,201 @@
+import datetime
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import transaction
+
+from workouts import charts, snapshots
+from workouts.models import DataVersion, Exercise, SetOfExercise, Workout
+
+START_DATE = datetime.date(2023, 1, 1)
+
+
+@pytest.fixture
+def snapshot_dir(settings, tmp_path, monkeypatch):
+    settings.WORKOUTS_SNAPSHOT_DIR = str(tmp_path)
+    monkeypatch.setattr(snapshots, "_loaded", None)
+    return tmp_path
+
+
+@pytest.fixture
+def exercises(transactional_db, snapshot_dir):
+    return [
+        Exercise.objects.create(code="BP", name="Bench Press"),
+        Exercise.objects.create(code="SQ", name="Squat"),
+    ]
+
+
+def _log_workouts(exercises, n_days=20):
+    for day in range(n_days):
+        SetOfExercise.objects.log_workout(
+            START_DATE + datetime.timedelta(days=day),
+            [
+                {
+                    "exercise": exercises[i % 2],
+                    "n_repetitions": 5 + i,
+                    "weight": 40 + day + i / 2,
+                }
+                for i in range(3)
+            ],
+        )
+
+
+def _generations(snapshot_dir) -> dict[str, int]:
+    manifest = json.loads((snapshot_dir / snapshots.MANIFEST).read_text())
+    return {code: entry["generation"] for code, entry in manifest["exercises"].items()}
+
+
+def test_snapshots_written_after_writes(exercises):
+    _log_workouts(exercises)
+    snapshot = snapshots.load()
+    assert snapshot is not None
+    assert snapshot.version == DataVersion.objects.current().key
+    bench_press = snapshot.exercises["BP"]
+    assert bench_press.name == "Bench Press"
+    assert len(bench_press) == 40
+    assert isinstance(bench_press.weight, np.memmap)
+    assert {
+        column: getattr(bench_press, column).dtype for column in snapshots.COLUMNS
+    } == {column: np.dtype(dtype) for column, dtype in snapshots.COLUMNS.items()}
+    assert snapshots.from_days(bench_press.days[-1]) == datetime.date(2023, 1, 20)
+    assert bench_press.volume[:2].tolist() == [200.0, 287.0]
+    assert snapshots.load() is snapshot
+
+
+def test_snapshot_dataframe(exercises):
+    _log_workouts(exercises)
+    start_date, end_date = datetime.date(2023, 1, 5), datetime.date(2023, 1, 10)
+    df = snapshots.sets_dataframe(start_date, end_date)
+    expected = (
+        SetOfExercise.objects.to_dataframe(start_date, end_date)
+        .sort_values(["date", "exercise"], kind="stable")
+        .reset_index(drop=True)
+    )
+    assert df.equals(expected)
+
+
+def test_snapshots_refreshed_incrementally(exercises, snapshot_dir):
+    _log_workouts(exercises)
+    generations = _generations(snapshot_dir)
+    set_ = SetOfExercise.objects.filter(exercise__code="SQ").first()
+    set_.weight = 100
+    set_.save()
+    new_generations = _generations(snapshot_dir)
+    assert new_generations["BP"] == generations["BP"]
+    assert new_generations["SQ"] > generations["SQ"]
+    assert len(list((snapshot_dir / str(exercises[1].pk)).iterdir())) == 4
+    assert snapshots.load().exercises["SQ"].weight.max() == 100
+
+
+def test_snapshots_rebuilt_after_missed_refresh(exercises, snapshot_dir):
+    _log_workouts(exercises)
+    DataVersion.objects.bump()
+    assert snapshots.load() is None
+    SetOfExercise.objects.filter(exercise__code="BP").first().delete()
+    assert set(_generations(snapshot_dir).values()) == {
+        DataVersion.objects.current().version
+    }
+    assert len(snapshots.load().exercises["BP"]) == 39
+
+
+def test_snapshots_refreshed_after_bulk_update(exercises, snapshot_dir):
+    _log_workouts(exercises)
+    SetOfExercise.objects.filter(exercise__code="SQ").update(exercise=exercises[0])
+    snapshot = snapshots.load()
+    assert snapshot is not None
+    assert len(snapshot.exercises["BP"]) == 60
+    assert len(snapshot.exercises["SQ"]) == 0
+
+
+def test_snapshots_refreshed_after_rollback(exercises):
+    with pytest.raises(RuntimeError), transaction.atomic():
+        Exercise.objects.create(code="DL", name="Deadlift")
+        raise RuntimeError
+    _log_workouts(exercises, n_days=1)
+    snapshot = snapshots.load()
+    assert snapshot is not None
+    assert set(snapshot.exercises) == {"BP", "SQ"}
+
+
+def test_snapshots_refreshed_once_per_file(exercises, tmp_path, monkeypatch):
+    file = tmp_path / "workouts.csv"
+    pd.DataFrame(
+        {
+            "Date": [f"2023-01-{day:02}" for day in range(1, 11)],
+            "Exercise": ["BP", "SQ"] * 5,
+            "Weight": 50.0,
+            "Reps": 5,
+        }
+    ).to_csv(file, index=False)
+    writes = []
+    write = snapshots.write
+    monkeypatch.setattr(
+        snapshots, "write", lambda *args: writes.append(args) or write(*args)
+    )
+    SetOfExercise.objects.create_from_file(file, chunk_size=2)
+    assert len(writes) == 1
+    snapshot = snapshots.load()
+    assert snapshot is not None
+    assert len(snapshot.exercises["BP"]) == len(snapshot.exercises["SQ"]) == 5
+
+
+def test_snapshots_of_moved_and_deleted(exercises):
+    _log_workouts(exercises, n_days=2)
+    workout = Workout.objects.get(date=START_DATE)
+    workout.date = datetime.date(2023, 2, 1)
+    workout.save()
+    exercises[1].delete()
+    snapshot = snapshots.load()
+    assert set(snapshot.exercises) == {"BP"}
+    assert [snapshots.from_days(days) for days in snapshot.exercises["BP"].days] == [
+        datetime.date(2023, 1, 2)
+    ] * 2 + [datetime.date(2023, 2, 1)] * 2
+
+
+@pytest.mark.parametrize("exercise_codes", [None, ["SQ"]])
+def test_chart_series_from_snapshots(exercises, settings, exercise_codes):
+    _log_workouts(exercises)
+    assert snapshots.load() is not None
+    args = (START_DATE, datetime.date(2023, 1, 31), list(charts.METRICS))
+    series = charts.get_chart_series(*args, exercises=exercise_codes, n_points=10)
+    settings.WORKOUTS_SNAPSHOT_DIR = None
+    assert series == charts.get_chart_series(
+        *args, exercises=exercise_codes, n_points=10
+    )
+
+
+def test_rebuild_snapshots_command(exercises, settings, snapshot_dir):
+    _log_workouts(exercises, n_days=1)
+    (snapshot_dir / snapshots.MANIFEST).unlink()
+    call_command("rebuild_snapshots")
+    assert len(snapshots.load().exercises["BP"]) == 2
+    settings.WORKOUTS_SNAPSHOT_DIR = None
+    with pytest.raises(CommandError):
+        call_command("rebuild_snapshots")
+
+
+def test_snapshots_refreshed_after_generate_workouts(exercises, monkeypatch):
+    _log_workouts(exercises, n_days=1)
+    writes = []
+    write = snapshots.write
+    monkeypatch.setattr(
+        snapshots, "write", lambda *args: writes.append(args) or write(*args)
+    )
+    call_command(
+        "generate_workouts",
+        years=1,
+        exercises=3,
+        end_date=datetime.date(2000, 12, 31),
+        batch_size=100,
+        stdout=io.StringIO(),
+    )
+    assert len(writes) == 1
+    snapshot = snapshots.load()
+    assert snapshot is not None
+    assert sum(len(exercise) for exercise in snapshot.exercises.values()) == (
+        SetOfExercise.objects.count()
+    )
@@ -4,5 +4,17 @@ from . import views
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("async/", views.index_async, name="index_async"),
     path("chart/", views.chart, name="chart"),
+    path("chart/data/", views.chart_data, name="chart_data"),
+    path("chart/data/async/", views.chart_data_async, name="chart_data_async"),
+    path("list/", views.workouts, name="workouts"),
+    path("records/", views.records, name="records"),
+    path("export/sets/", views.export_sets, name="export_sets"),
+    path("export/report/", views.export_report, name="export_report"),
+    path("api/sets/", views.api_sets, name="api_sets"),
+    path("api/workouts/", views.api_workouts, name="api_workouts"),
+    path("api/exercises/", views.api_exercises, name="api_exercises"),
+    path("api/workouts/log/", views.api_log_workout, name="api_log_workout"),
+    path("api/changes/", views.api_changes, name="api_changes"),
 ]
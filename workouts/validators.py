@@ -0,0 +1,9 @@
+from django.core.validators import RegexValidator
+
+validator_only_latin_letters = RegexValidator(
+    r"^[a-zA-Z]*$", message="Only latin letters are allowed."
+)
+validator_latin_words_single_spaces = RegexValidator(
+    r"^[a-zA-Z]+(?: [a-zA-Z]+)*$",
+    message="Only latin letters and single spaces are allowed, no trailing spaces.",
+)
@@ -1,26 +1,67 @@
 import datetime
+import json
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
 
-from .forms import DateRangeForm
-from .models import SetOfExercise, get_start_end_dates_from_period
+from . import changes, exports, metrics, pagination, serializers
+from .charts import get_chart_series
+from .concurrency import in_worker_thread
+from .forms import (
+    ApiSetsForm,
+    ApiWorkoutsForm,
+    ChartForm,
+    ExportReportForm,
+    ExportSetsForm,
+    KeysetPageForm,
+    LogWorkoutForm,
+)
+from .models import (
+    DataVersion,
+    Exercise,
+    PersonalRecord,
+    SetOfExercise,
+    Workout,
+    get_start_end_dates_from_period,
+)
+from .reports import aget_report, get_report
 
 
-def index(request):
+def _index_period() -> tuple[datetime.date, datetime.date]:
     # TODO: create a form to choose the period
     # use DateRangeField
     # By default the form should be initialized with the current month
-    start_date, end_date = get_start_end_dates_from_period(
-        datetime.date.today(), "month"
+    return get_start_end_dates_from_period(datetime.date.today(), "month")
+
+
+def index(request):
+    start_date, end_date = _index_period()
+    exercises, interval_statistics = get_report(
+        start_date, end_date, periodicity="total", with_totals=True
+    )
+    context = {
+        "exercises": exercises,
+        "interval_statistics": interval_statistics,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    return render(request, "workouts/index.html", context)
+
+
+async def index_async(request):
+    """Like `index`, computing its report in a worker thread when served by ASGI."""
+    start_date, end_date = _index_period()
+    exercises, interval_statistics = await aget_report(
+        start_date, end_date, periodicity="total", with_totals=True
     )
     context = {
-        "exercises": SetOfExercise.objects.compute_report(
-            start_date, end_date, periodicity="total", per_exercise=True
-        ),
-        "interval_statistics": SetOfExercise.objects.compute_report(
-            start_date, end_date, periodicity="total", per_exercise=False
-        ),
+        "exercises": exercises,
+        "interval_statistics": interval_statistics,
         "start_date": start_date,
         "end_date": end_date,
     }
@@ -28,25 +69,274 @@ def index(request):
 
 
 def chart(request):
-    if request.method == "POST":
-        form = DateRangeForm(request.POST)
-        if form.is_valid():
-            start_date = form.cleaned_data["start_date"]
-            end_date = form.cleaned_data["end_date"]
-
-            # Get all sets of exercises for the given period, counting the amount of sets per day
-            workouts = SetOfExercise.objects.compute_report(
-                start_date, end_date, periodicity="daily", per_exercise=False
-            )
-
-            # Prepare data for the chart
-            chart_data = {
-                "labels": [w["date"].isoformat() for w in workouts],
-                "values": [w["n_sets"] for w in workouts],
-            }
-
-            return JsonResponse(chart_data)
-    else:
-        form = DateRangeForm()
-
-    return render(request, "workouts/chart.html", {"form": form})
+    return render(request, "workouts/chart.html", {"form": ChartForm()})
+
+
+def _data_version(request) -> DataVersion:
+    """Look up the version of the data once per request."""
+    if not hasattr(request, "_data_version"):
+        request._data_version = DataVersion.objects.current()
+    return request._data_version
+
+
+def _chart_form(request) -> ChartForm:
+    """Validate the chart form once per request."""
+    if not hasattr(request, "_chart_form"):
+        request._chart_form = ChartForm(request.GET)
+        request._chart_form.is_valid()
+    return request._chart_form
+
+
+# Errors do not depend on the data, so they are neither tagged nor dated.
+def _chart_data_etag(request) -> str | None:
+    if not _chart_form(request).is_valid():
+        return None
+    return f"chart-{_data_version(request).key}"
+
+
+def _chart_data_last_modified(request) -> datetime.datetime | None:
+    if not _chart_form(request).is_valid():
+        return None
+    return _data_version(request).modified
+
+
+def _get_chart_data(form: ChartForm) -> JsonResponse:
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    series = get_chart_series(
+        form.cleaned_data["start_date"],
+        form.cleaned_data["end_date"],
+        metrics=form.cleaned_data["metrics"],
+        exercises=[exercise.code for exercise in form.cleaned_data["exercises"]],
+        n_points=form.cleaned_data["n_points"],
+    )
+    return JsonResponse({"series": series})
+
+
+# Chart data changes only when the data version does, so clients and proxies
+# may store it but must revalidate it, which costs a single version lookup.
+@require_GET
+@cache_control(no_cache=True)
+@condition(etag_func=_chart_data_etag, last_modified_func=_chart_data_last_modified)
+def chart_data(request):
+    return _get_chart_data(_chart_form(request))
+
+
+@require_GET
+@cache_control(no_cache=True)
+async def chart_data_async(request):
+    """Like `chart_data`, without blocking the event loop when served by ASGI."""
+    # `condition` calls its functions synchronously, so validate the form, which
+    # looks the exercises up, and look the version up beforehand.
+    await in_worker_thread(_chart_form)(request)
+    request._data_version = await DataVersion.objects.acurrent()
+    return await _conditional_chart_data(request)
+
+
+@condition(etag_func=_chart_data_etag, last_modified_func=_chart_data_last_modified)
+async def _conditional_chart_data(request):
+    return await in_worker_thread(_get_chart_data)(_chart_form(request))
+
+
+def workouts(request):
+    paginator = Paginator(Workout.objects.with_statistics().order_by("-date"), 100)
+    context = {"page": paginator.get_page(request.GET.get("page"))}
+    return render(request, "workouts/workouts.html", context)
+
+
+def records(request):
+    context = {
+        "records": PersonalRecord.objects.by_exercise(),
+    }
+    return render(request, "workouts/records.html", context)
+
+
+def _streaming_export(format: str, name: str, columns, rows) -> StreamingHttpResponse:
+    export_format = exports.FORMATS[format]
+    response = StreamingHttpResponse(
+        exports.stream(format, columns, rows), content_type=export_format.content_type
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}.{export_format.extension}"'
+    )
+    return response
+
+
+@require_GET
+def export_sets(request):
+    form = ExportSetsForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    sets = SetOfExercise.objects.all()
+    if form.cleaned_data["start_date"] is not None:
+        sets = sets.filter(workout_date__gte=form.cleaned_data["start_date"])
+    if form.cleaned_data["end_date"] is not None:
+        sets = sets.filter(workout_date__lte=form.cleaned_data["end_date"])
+    columns, rows = exports.iter_sets(sets)
+    return _streaming_export(form.cleaned_data["format"], "sets", columns, rows)
+
+
+@require_GET
+def export_report(request):
+    form = ExportReportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    report = SetOfExercise.objects.compute_report(
+        form.cleaned_data["start_date"],
+        form.cleaned_data["end_date"],
+        periodicity=form.cleaned_data["periodicity"],
+        per_exercise=form.cleaned_data["per_exercise"],
+    )
+    columns, rows = exports.iter_report(report)
+    return _streaming_export(form.cleaned_data["format"], "report", columns, rows)
+
+
+@require_GET
+@cache_control(no_store=True)
+def prometheus_metrics(request):
+    """Metrics of this process, in the text format scraped by Prometheus.
+
+    Served only to staff users and to the `WORKOUTS_METRICS_ALLOWED_IPS`, as
+    they reveal the traffic and the slow parts of the site.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR")
+    if not (
+        request.user.is_staff or remote_addr in settings.WORKOUTS_METRICS_ALLOWED_IPS
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _keyset_response(
+    request, form: KeysetPageForm, queryset, keys: list[str], serialize, **kwargs
+) -> JsonResponse:
+    """Page of a queryset, with the URL of the next one, as JSON."""
+    try:
+        page = pagination.keyset_page(
+            queryset,
+            keys,
+            cursor=form.cleaned_data["cursor"],
+            limit=form.cleaned_data["limit"],
+            **kwargs,
+        )
+    except ValueError:
+        return JsonResponse({"errors": {"cursor": ["Invalid cursor."]}}, status=400)
+    next_url = None
+    if page.next_cursor is not None:
+        params = request.GET.copy()
+        params["cursor"] = page.next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return JsonResponse(
+        {
+            "results": [serialize(obj) for obj in page.objects],
+            "next_cursor": page.next_cursor,
+            "next": next_url,
+        }
+    )
+
+
+def _filter_dates(queryset, form: ApiWorkoutsForm, field: str):
+    if form.cleaned_data["start_date"] is not None:
+        queryset = queryset.filter(**{f"{field}__gte": form.cleaned_data["start_date"]})
+    if form.cleaned_data["end_date"] is not None:
+        queryset = queryset.filter(**{f"{field}__lte": form.cleaned_data["end_date"]})
+    return queryset
+
+
+# Pages of sets and workouts go back in time from the latest, keyed on their
+# date and id, so that every page is read from an index.
+@require_GET
+def api_sets(request):
+    form = ApiSetsForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    sets = _filter_dates(
+        SetOfExercise.objects.select_related("exercise"), form, "workout_date"
+    )
+    if form.cleaned_data["exercise"] is not None:
+        sets = sets.filter(exercise=form.cleaned_data["exercise"])
+    if form.cleaned_data["repetitions_range"]:
+        sets = sets.repetitions_range(form.cleaned_data["repetitions_range"])
+    return _keyset_response(
+        request,
+        form,
+        sets,
+        ["workout_date", "pk"],
+        serializers.serialize_set,
+    )
+
+
+@require_GET
+def api_workouts(request):
+    form = ApiWorkoutsForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    workouts = _filter_dates(Workout.objects.all(), form, "date").with_statistics()
+    return _keyset_response(
+        request,
+        form,
+        workouts,
+        ["date", "pk"],
+        serializers.serialize_workout,
+    )
+
+
+@require_GET
+def api_exercises(request):
+    form = KeysetPageForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    return _keyset_response(
+        request,
+        form,
+        Exercise.objects.all(),
+        ["code"],
+        serializers.serialize_exercise,
+        descending=False,
+    )
+
+
+@require_GET
+def api_changes(request):
+    """Changes after the cursor of the last batch, from the start without one."""
+    form = KeysetPageForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    try:
+        batch = changes.get_changes(
+            form.cleaned_data["cursor"], limit=form.cleaned_data["limit"]
+        )
+    except ValueError:
+        return JsonResponse({"errors": {"cursor": ["Invalid cursor."]}}, status=400)
+    return JsonResponse(
+        {
+            "changes": batch.changes,
+            "cursor": batch.cursor,
+            "has_more": batch.has_more,
+        }
+    )
+
+
+# Logging a workout is a single request and transaction, whatever its number of
+# sets. Like any other POST, it must pass the CSRF token, e.g. in the
+# `X-CSRFToken` header.
+@require_POST
+def api_log_workout(request):
+    """Add the sets of a JSON document to the workout of its date."""
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"errors": {"__all__": ["Invalid JSON."]}}, status=400)
+    form = LogWorkoutForm(data if isinstance(data, dict) else {})
+    if not form.is_valid():
+        errors = form.errors | ({"sets": form.set_errors} if form.set_errors else {})
+        return JsonResponse({"errors": errors}, status=400)
+    workout, sets = SetOfExercise.objects.log_workout(
+        form.cleaned_data["date"],
+        [set_form.cleaned_data for set_form in form.set_forms],
+    )
+    return JsonResponse(
+        {"workout": workout.pk, "sets": [set_.pk for set_ in sets]}, status=201
+    )